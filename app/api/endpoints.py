@@ -1,56 +1,178 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter, ValidationError
 from sqlmodel.ext.asyncio.session import AsyncSession
-from starlette.responses import RedirectResponse
 
+from app.api.routing import FoundResponse, PathParamRoute, etag_matches, not_modified
+from app.cache.short_url import CachedShortURL, short_url_cache
+from app.core.setting import settings
 from app.db.models import ShortURL
-from app.db.session import get_session
-from app.exceptions.short_url import ShortURLGenerationError, ShortURLNotFoundError
+from app.db.session import get_read_session, get_session
+from app.exceptions.short_url import ShortURLExpiredError, ShortURLGenerationError, ShortURLNotFoundError
+from app.exceptions.view_log import ViewTimeseriesRangeError
 from app.schemas.short_url import ShortURLCreateRequest, ShortURLResponse
-from app.schemas.view_log import ShortURLStatsResponse
+from app.schemas.view_log import ShortURLStatsResponse, ShortURLViewTimeseriesResponse, ViewGranularity
+from app.services.code_allocator import code_allocator
+from app.services.redirect import redirect_resolver
 from app.services.short_url import ShortURLService
 
 router = APIRouter()
 
+_batch_adapter = TypeAdapter(list[ShortURLCreateRequest])
+
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/jsonl")
+
+# Links never change once created, so a permanent redirect may be cached by browsers and CDNs.
+if settings.REDIRECT_PERMANENT:
+    REDIRECT_STATUS = 301
+    REDIRECT_CACHE_CONTROL = f"public, max-age={settings.REDIRECT_PERMANENT_MAX_AGE}".encode()
+else:
+    REDIRECT_STATUS = 302
+    REDIRECT_CACHE_CONTROL = settings.REDIRECT_CACHE_CONTROL.encode() or None
+
+
+def _batch_url(item: ShortURLCreateRequest) -> str:
+    # Batches deduplicate by URL, which links with a lifetime never are.
+    if item.has_lifetime:
+        raise HTTPException(status_code=422, detail="expires_at and max_clicks are only accepted by /shorten")
+    return str(item.original_url)
+
+
+async def _read_batch_urls(request: Request) -> list[str]:
+    """Read a JSON array or an NDJSON stream of `ShortURLCreateRequest` objects."""
+    max_items = settings.SHORTEN_BATCH_MAX_ITEMS
+    if not request.headers.get("content-type", "").startswith(NDJSON_CONTENT_TYPES):
+        try:
+            items = _batch_adapter.validate_json(await request.body())
+        except ValidationError as e:
+            raise _validation_error(e)
+        if len(items) > max_items:
+            raise HTTPException(status_code=413, detail=f"Batch exceeds {max_items} URLs")
+        return [_batch_url(item) for item in items]
+
+    urls: list[str] = []
+    pending = b""
+    async for chunk in request.stream():
+        *lines, pending = (pending + chunk).split(b"\n")
+        for line in lines:
+            if line.strip():
+                urls.append(_ndjson_url(line, len(urls)))
+        if len(urls) > max_items:
+            raise HTTPException(status_code=413, detail=f"Batch exceeds {max_items} URLs")
+    if pending.strip():
+        urls.append(_ndjson_url(pending, len(urls)))
+    return urls
+
+
+def _ndjson_url(line: bytes, index: int) -> str:
+    try:
+        return _batch_url(ShortURLCreateRequest.model_validate_json(line))
+    except ValidationError as e:
+        raise _validation_error(e, index)
+
+
+def _validation_error(e: ValidationError, index: int | None = None) -> HTTPException:
+    """422 with the errors of a batch; NDJSON errors are located by item like those of a JSON array."""
+    errors = e.errors(include_url=False, include_context=False)
+    if index is not None:
+        errors = [error | {"loc": (index, *error["loc"])} for error in errors]
+    # Inputs of lines that are not JSON are raw bytes.
+    return HTTPException(status_code=422, detail=jsonable_encoder(errors))
+
 
 @router.post("/shorten", response_model=ShortURLResponse)
 async def create_short_url(
     request: ShortURLCreateRequest,
     session: AsyncSession = Depends(get_session),
 ):
-    service = ShortURLService(session=session)
+    if request.max_clicks is not None and short_url_cache.redis_url is None:
+        # Without a shared counter every worker would admit max_clicks redirects of its own.
+        raise HTTPException(status_code=422, detail="max_clicks needs a shared cache, set REDIS_URL")
+    service = ShortURLService(session=session, cache=short_url_cache, allocator=code_allocator)
     try:
-        short_url: ShortURL = await service.create_short_url(original_url=str(request.original_url))
+        short_url: ShortURL = await service.create_short_url(
+            original_url=str(request.original_url), expires_at=request.expires_at, max_clicks=request.max_clicks
+        )
         return ShortURLResponse(
             id=short_url.id,
             original_url=short_url.original_url,
             short_code=short_url.short_code,
             created_at=short_url.created_at,
+            expires_at=short_url.expires_at,
+            max_clicks=short_url.max_clicks,
         )
     except ShortURLGenerationError:
         raise HTTPException(status_code=400, detail="Could not generate unique short code")
 
 
-@router.get("/{short_code}")
-async def redirect_to_url(
-    short_code: str,
+@router.post("/shorten/batch", response_model=list[ShortURLResponse])
+async def create_short_urls(
+    request: Request,
     session: AsyncSession = Depends(get_session),
 ):
-    service = ShortURLService(session=session)
+    original_urls = await _read_batch_urls(request)
+    service = ShortURLService(session=session, cache=short_url_cache, allocator=code_allocator)
     try:
-        original_url = await service.log_view_and_get_url(short_code)
-        return RedirectResponse(url=original_url, status_code=302)
-    except ShortURLNotFoundError:
+        short_urls = await service.create_short_urls(original_urls, chunk_size=settings.SHORTEN_BATCH_CHUNK_SIZE)
+        return [ShortURLResponse.model_validate(short_url) for short_url in short_urls]
+    except ShortURLGenerationError:
+        raise HTTPException(status_code=400, detail="Could not generate unique short code")
+
+
+def _redirect_caching(short_url: CachedShortURL) -> tuple[int, bytes | None]:
+    """Status and Cache-Control of a redirect; links with a lifetime are never cached past it."""
+    if not short_url.has_lifetime:
+        return REDIRECT_STATUS, REDIRECT_CACHE_CONTROL
+    if short_url.max_clicks is not None or not settings.REDIRECT_PERMANENT:
+        # Every click has to come back to be counted, or to be refused once the link expired.
+        return 302, b"no-store"
+    remaining = int((short_url.expires_at - datetime.now(timezone.utc)).total_seconds())
+    return 301, f"public, max-age={max(0, min(settings.REDIRECT_PERMANENT_MAX_AGE, remaining))}".encode()
+
+
+async def redirect_to_url(short_code: str):
+    short_url = await redirect_resolver.resolve(short_code)
+    if short_url is None:
         raise HTTPException(status_code=404, detail="Short URL not found")
+    try:
+        await redirect_resolver.admit(short_url)
+    except ShortURLExpiredError:
+        raise HTTPException(status_code=410, detail="Short URL has expired")
+    await redirect_resolver.log_view(short_url.id)
+    return FoundResponse(short_url.original_url, *_redirect_caching(short_url))
+
+
+# Hot path: no session, no dependency resolution, no ORM entity, no response validation.
+router.add_api_route(
+    "/{short_code}",
+    redirect_to_url,
+    methods=["GET"],
+    response_class=FoundResponse,
+    status_code=REDIRECT_STATUS,
+    route_class_override=PathParamRoute,
+)
 
 
 @router.get("/{short_code}/stats", response_model=ShortURLStatsResponse)
 async def get_short_url_stats(
     short_code: str,
+    request: Request,
+    response: Response,
     session: AsyncSession = Depends(get_session),
+    read_session: AsyncSession = Depends(get_read_session),
 ):
-    service = ShortURLService(session=session)
+    service = ShortURLService(session=session, read_session=read_session, cache=short_url_cache)
     try:
         stats = await service.get_short_url_with_stats(short_code)
+        # Everything but the count is immutable, so the count alone versions the response.
+        etag = f'W/"{stats["id"]}-{stats["view_count"]}"'
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return not_modified(etag, settings.STATS_CACHE_CONTROL)
+        response.headers["etag"] = etag
+        if settings.STATS_CACHE_CONTROL:
+            response.headers["cache-control"] = settings.STATS_CACHE_CONTROL
         return ShortURLStatsResponse(
             short_code=stats["short_code"],
             original_url=stats["original_url"],
@@ -59,3 +181,28 @@ async def get_short_url_stats(
         )
     except ShortURLNotFoundError:
         raise HTTPException(status_code=404, detail="Short URL not found")
+
+
+@router.get("/{short_code}/stats/timeseries", response_model=ShortURLViewTimeseriesResponse)
+async def get_short_url_view_timeseries(
+    short_code: str,
+    start: datetime = Query(alias="from"),
+    end: datetime = Query(alias="to"),
+    granularity: ViewGranularity = ViewGranularity.hour,
+    session: AsyncSession = Depends(get_session),
+    read_session: AsyncSession = Depends(get_read_session),
+):
+    service = ShortURLService(session=session, read_session=read_session, cache=short_url_cache)
+    try:
+        timeseries = await service.get_short_url_view_timeseries(
+            short_code,
+            granularity=granularity,
+            start=start,
+            end=end,
+            max_points=settings.STATS_TIMESERIES_MAX_POINTS,
+        )
+        return ShortURLViewTimeseriesResponse(**timeseries)
+    except ShortURLNotFoundError:
+        raise HTTPException(status_code=404, detail="Short URL not found")
+    except ViewTimeseriesRangeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.core.readiness import readiness
+
+router = APIRouter(include_in_schema=False)
+
+
+@router.get("/health_check")
+async def health_check():
+    if readiness.ready:
+        return {"status": "ok"}
+    return JSONResponse({"status": "draining" if readiness.draining else "starting"}, status_code=503)
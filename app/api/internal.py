@@ -0,0 +1,22 @@
+from fastapi import APIRouter
+
+from app.cache.short_url import short_url_cache
+from app.services.view_ingestion import view_ingestion_pipeline
+from app.utils.url import normalize_url_cache_info
+
+router = APIRouter(prefix="/_internal", include_in_schema=False)
+
+
+@router.get("/cache")
+async def get_cache_stats():
+    return short_url_cache.stats()
+
+
+@router.get("/view-ingestion")
+async def get_view_ingestion_stats():
+    return view_ingestion_pipeline.stats()
+
+
+@router.get("/url-normalization")
+async def get_url_normalization_stats():
+    return normalize_url_cache_info()._asdict()
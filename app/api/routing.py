@@ -0,0 +1,57 @@
+from urllib.parse import quote
+
+from fastapi.routing import APIRoute
+from starlette.responses import Response
+
+# Same characters Starlette's RedirectResponse leaves unescaped in the Location header.
+LOCATION_SAFE = ":/%#?=@[]!$&'()*+,;"
+
+
+class PathParamRoute(APIRoute):
+    """
+    APIRoute for hot endpoints that only take `str` path parameters and return a `Response`.
+
+    The endpoint is awaited with the raw path parameters, skipping dependency resolution,
+    validation and response serialization. The route is still documented in the OpenAPI
+    schema and still sets `scope["route"]` for the logging and metrics middlewares.
+    """
+
+    def get_route_handler(self):
+        endpoint = self.endpoint
+
+        async def handler(request) -> Response:
+            return await endpoint(**request.path_params)
+
+        return handler
+
+
+class FoundResponse(Response):
+    """Bodiless redirect (302 unless told otherwise) with only Location, Content-Length and Cache-Control headers."""
+
+    def __init__(self, url: str, status_code: int = 302, cache_control: bytes | None = None):
+        self.status_code = status_code
+        self.background = None
+        self.body = b""
+        self.raw_headers = [
+            (b"location", quote(url, safe=LOCATION_SAFE).encode("latin-1")),
+            (b"content-length", b"0"),
+        ]
+        if cache_control:
+            self.raw_headers.append((b"cache-control", cache_control))
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison of `etag` against an If-None-Match header, as RFC 9110 requires for GET."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+def not_modified(etag: str, cache_control: str | None = None) -> Response:
+    headers = {"etag": etag}
+    if cache_control:
+        headers["cache-control"] = cache_control
+    return Response(status_code=304, headers=headers)
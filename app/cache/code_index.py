@@ -0,0 +1,211 @@
+import asyncio
+import fcntl
+import os
+from logging import getLogger
+from time import monotonic, perf_counter
+from typing import Callable, Iterable
+
+from app.core.metrics import registry
+from app.core.setting import settings
+from app.db.session import async_session_factory
+from app.repositories.short_url import ShortURLRepository
+from app.utils.bloom import BloomFilter, bloom_parameters
+
+logger = getLogger(__name__)
+
+# Only the newest missing ids can belong to transactions still in flight; older gaps are
+# ids burnt by rollbacks and ON CONFLICT DO NOTHING.
+MAX_GAPS = 10_000
+
+
+class ShortCodeIndex:
+    """
+    Bloom filter over every existing short code, answering "definitely not a link" without the database.
+
+    The filter is filled by a streaming scan of `shorturl` in a background task and answers
+    "maybe" for everything until then. Afterwards it is kept current by adding codes as this
+    process creates them and by scanning ids past the last one seen every `refresh_interval`
+    seconds for links created elsewhere. Ids missing from a scan may belong to transactions
+    that have not committed yet, so they are scanned again for `settle_time` seconds.
+
+    With a `path`, the filter lives in a shared mmap of that file: the first worker builds
+    it while holding a lock and the others, as well as later restarts, open it and only
+    catch up from the id recorded in its header. Only then is the index `shared`: a filter
+    per process misses codes created by other workers until its next refresh, so its
+    negatives are merely a hint.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable,
+        capacity: int = 10_000_000,
+        error_rate: float = 0.01,
+        path: str | None = None,
+        refresh_interval: float = 1.0,
+        batch_size: int = 10_000,
+        settle_time: float = 30.0,
+    ):
+        self.session_factory = session_factory
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.path = path or None
+        self.refresh_interval = refresh_interval
+        self.batch_size = batch_size
+        self.settle_time = settle_time
+        self._filter: BloomFilter | None = None
+        # Scans restart at the lowest id that may still show up, `_next_id` when there is none.
+        self._next_id = 1
+        self._gaps: dict[int, float] = {}
+        self._task: asyncio.Task | None = None
+
+        self.rejected = 0
+
+    @property
+    def ready(self) -> bool:
+        return self._filter is not None
+
+    @property
+    def shared(self) -> bool:
+        """True when every worker on the host adds its codes to the same filter."""
+        return self.path is not None
+
+    @property
+    def size(self) -> int:
+        return self._filter.count if self._filter is not None else 0
+
+    def might_contain(self, short_code: str) -> bool:
+        """False only for codes that certainly do not exist; True for everything until loaded."""
+        if self._filter is None or short_code in self._filter:
+            return True
+        self.rejected += 1
+        return False
+
+    def contains(self, short_code: str) -> bool:
+        """True for codes that probably exist; False for everything until loaded."""
+        return self._filter is not None and short_code in self._filter
+
+    def add(self, short_codes: Iterable[str]):
+        if self._filter is not None:
+            self._filter.add_many(short_codes)
+
+    async def load(self):
+        started = perf_counter()
+        self._next_id = 1
+        self._gaps = {}
+        if self.path is None:
+            bloom = BloomFilter.create(self.capacity, self.error_rate)
+            await self._scan(bloom)
+        else:
+            bloom = await self._load_shared()
+        self._filter = bloom
+        logger.info("Loaded short code index with %d codes in %.3fs", bloom.count, perf_counter() - started)
+        if bloom.count > self.capacity:
+            logger.warning(
+                "Short code index holds %d codes, more than its capacity of %d; raise CODE_INDEX_CAPACITY",
+                bloom.count,
+                self.capacity,
+            )
+
+    async def refresh(self) -> int:
+        """Add codes created by other processes since the last scan; returns how many were new."""
+        return await self._scan(self._filter)
+
+    async def _load_shared(self) -> BloomFilter:
+        lock_fd = os.open(self.path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            await asyncio.to_thread(fcntl.flock, lock_fd, fcntl.LOCK_EX)
+            try:
+                bloom = BloomFilter.open(self.path)
+            except (OSError, ValueError):
+                bloom = None
+            if bloom is not None and (bloom.bits, bloom.hashes) == bloom_parameters(self.capacity, self.error_rate):
+                self._next_id = bloom.watermark
+                await self._scan(bloom)
+                return bloom
+            if bloom is not None:
+                bloom.close()
+
+            # Built next to the final file and renamed, so a crash never leaves a half-filled filter behind.
+            building = self.path + ".building"
+            bloom = BloomFilter.create(self.capacity, self.error_rate, building)
+            await self._scan(bloom)
+            bloom.flush()
+            os.replace(building, self.path)
+            return bloom
+        finally:
+            os.close(lock_fd)
+
+    async def _scan(self, bloom: BloomFilter) -> int:
+        now = monotonic()
+        self._gaps = {gap: seen_at for gap, seen_at in self._gaps.items() if now - seen_at < self.settle_time}
+        start = min(self._gaps, default=self._next_id)
+        expected = self._next_id
+        added = 0
+        async with self.session_factory() as session:
+            async for rows in ShortURLRepository(session).iter_codes(start, self.batch_size):
+                added += bloom.add_many(short_code for _, short_code in rows)
+                for short_url_id, _ in rows:
+                    self._gaps.pop(short_url_id, None)
+                    if short_url_id > expected:
+                        first_gap = max(expected, short_url_id - MAX_GAPS)
+                        self._gaps.update(dict.fromkeys(range(first_gap, short_url_id), now))
+                    expected = max(expected, short_url_id + 1)
+                if len(self._gaps) > 2 * MAX_GAPS:
+                    self._gaps = {gap: self._gaps[gap] for gap in sorted(self._gaps)[-MAX_GAPS:]}
+        if len(self._gaps) > MAX_GAPS:
+            self._gaps = {gap: self._gaps[gap] for gap in sorted(self._gaps)[-MAX_GAPS:]}
+        self._next_id = expected
+        bloom.watermark = min(self._gaps, default=self._next_id)
+        return added
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="short-code-index")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._filter is not None:
+            self._filter.close()
+            self._filter = None
+
+    async def _run(self):
+        while self._filter is None:
+            try:
+                await self.load()
+            except Exception:
+                logger.exception("Failed to load the short code index")
+                await asyncio.sleep(self.refresh_interval)
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Failed to refresh the short code index")
+
+
+short_code_index = ShortCodeIndex(
+    session_factory=async_session_factory,
+    capacity=settings.CODE_INDEX_CAPACITY,
+    error_rate=settings.CODE_INDEX_ERROR_RATE,
+    path=settings.CODE_INDEX_PATH,
+    refresh_interval=settings.CODE_INDEX_REFRESH_INTERVAL,
+)
+
+
+registry.callback(
+    "short_code_index_size",
+    "Codes added to the short code index",
+    lambda: [((), short_code_index.size)],
+)
+registry.callback(
+    "short_code_index_rejections",
+    "Lookups answered as not found by the short code index",
+    lambda: [((), short_code_index.rejected)],
+    metric_type="counter",
+)
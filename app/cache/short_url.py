@@ -0,0 +1,271 @@
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from json import dumps as json_dumps
+from json import loads as json_loads
+from logging import getLogger
+
+from app.cache.code_index import ShortCodeIndex, short_code_index
+from app.cache.local import MISSING, LocalTTLCache
+from app.core.metrics import registry
+from app.core.setting import settings
+
+logger = getLogger(__name__)
+
+_NEGATIVE = ""
+
+
+@dataclass(frozen=True, slots=True)
+class CachedShortURL:
+    """
+    Immutable snapshot of a `ShortURL` row, safe to share between requests and sessions.
+
+    For links with `max_clicks`, `clicks` is the rolled-up view count when the row was read,
+    or None when it was not read along (e.g. from an ORM entity).
+    """
+
+    id: int
+    original_url: str
+    short_code: str
+    created_at: datetime
+    expires_at: datetime | None = None
+    max_clicks: int | None = None
+    clicks: int | None = None
+
+    @classmethod
+    def from_model(cls, short_url, clicks: int | None = None) -> "CachedShortURL":
+        return cls(
+            id=short_url.id,
+            original_url=short_url.original_url,
+            short_code=short_url.short_code,
+            created_at=short_url.created_at,
+            expires_at=short_url.expires_at,
+            max_clicks=short_url.max_clicks,
+            clicks=clicks,
+        )
+
+    @property
+    def has_lifetime(self) -> bool:
+        return self.expires_at is not None or self.max_clicks is not None
+
+    def expired(self, now: datetime) -> bool:
+        return self.expires_at is not None and self.expires_at <= now
+
+    def dumps(self) -> str:
+        data = asdict(self)
+        data["created_at"] = self.created_at.isoformat()
+        if self.expires_at is not None:
+            data["expires_at"] = self.expires_at.isoformat()
+        return json_dumps(data, separators=(",", ":"))
+
+    @classmethod
+    def loads(cls, raw: str | bytes) -> "CachedShortURL":
+        data = json_loads(raw)
+        data["created_at"] = datetime.fromisoformat(data["created_at"])
+        if data.get("expires_at") is not None:
+            data["expires_at"] = datetime.fromisoformat(data["expires_at"])
+        return cls(**data)
+
+
+class ShortURLCache:
+    """
+    Read-through cache for short_code -> ShortURL lookups.
+
+    Lookups go to a bounded in-process LRU/TTL tier first and then, if `redis_url` is set,
+    to a shared Redis tier. Codes that do not exist are remembered for `negative_ttl`
+    seconds so that scanners probing random codes do not reach the database. With a shared
+    `code_index`, codes it has never seen are answered as missing after both tiers missed.
+    Redis failures are logged and treated as misses; they never fail a request.
+
+    Links with a lifetime are cached no longer than they live, and clicks of links with
+    `max_clicks` are counted here in Redis, on top of the count they were read with. Such
+    links can only be created with Redis configured; while it is unreachable, each worker
+    counts on its own.
+    """
+
+    key_prefix = "shorturl:code:"
+    clicks_key_prefix = "shorturl:clicks:"
+
+    def __init__(
+        self,
+        local_max_size: int,
+        local_ttl: float,
+        shared_ttl: int,
+        negative_ttl: int,
+        redis_url: str | None = None,
+        code_index: ShortCodeIndex | None = None,
+    ):
+        self.local = LocalTTLCache(max_size=local_max_size, ttl=local_ttl)
+        self.clicks = LocalTTLCache(max_size=local_max_size, ttl=local_ttl)
+        self.shared_ttl = shared_ttl
+        self.negative_ttl = negative_ttl
+        self.redis_url = redis_url or None
+        self.code_index = code_index
+        self._redis = None
+
+        self.shared_hits = 0
+        self.shared_misses = 0
+        self.shared_errors = 0
+        self.negative_hits = 0
+
+    @property
+    def redis(self):
+        if self._redis is None and self.redis_url:
+            from redis.asyncio import Redis  # noqa: PLC0415
+
+            self._redis = Redis.from_url(self.redis_url)
+        return self._redis
+
+    async def lookup(self, short_code: str) -> tuple[bool, CachedShortURL | None]:
+        """
+        Return `(True, entry)` when the cache knows the answer, where `entry` is None for a
+        code known to be missing, and `(False, None)` when the database must be asked.
+        """
+        entry = self.local.get(short_code)
+        if entry is not MISSING:
+            if entry is None:
+                self.negative_hits += 1
+            return True, entry
+
+        if self.redis is None:
+            return self._check_index(short_code)
+        try:
+            raw = await self.redis.get(self.key_prefix + short_code)
+        except Exception:
+            self.shared_errors += 1
+            logger.warning("Shared cache lookup failed for %s", short_code, exc_info=True)
+            return False, None
+        if raw is None:
+            self.shared_misses += 1
+            return self._check_index(short_code)
+
+        self.shared_hits += 1
+        if raw in (b"", _NEGATIVE):
+            self.negative_hits += 1
+            self.local.set(short_code, None, ttl=self.negative_ttl)
+            return True, None
+        entry = CachedShortURL.loads(raw)
+        self.local.set(short_code, entry, ttl=self._ttls(entry)[0])
+        return True, entry
+
+    def _check_index(self, short_code: str) -> tuple[bool, CachedShortURL | None]:
+        # Checked after the shared tier, where links created by other instances show up first.
+        # A per-process index has not seen codes other workers created since its last refresh,
+        # so only a shared one may answer for the database.
+        if self.code_index is not None and self.code_index.shared and not self.code_index.might_contain(short_code):
+            return True, None
+        return False, None
+
+    def probably_taken(self, short_code: str) -> bool:
+        """True when the code index has seen `short_code`; always False without an index."""
+        return self.code_index is not None and self.code_index.contains(short_code)
+
+    def add_codes(self, short_codes):
+        """Record newly created codes in the code index."""
+        if self.code_index is not None:
+            self.code_index.add(short_codes)
+
+    async def store(self, short_code: str, short_url) -> CachedShortURL | None:
+        """Cache a database result; `short_url` may be a model, a cached entry or None for a miss."""
+        if short_url is None:
+            entry = None
+            self.local.set(short_code, None, ttl=self.negative_ttl)
+            raw, ttl = _NEGATIVE, self.negative_ttl
+        else:
+            entry = short_url if isinstance(short_url, CachedShortURL) else CachedShortURL.from_model(short_url)
+            local_ttl, ttl = self._ttls(entry)
+            self.local.set(short_code, entry, ttl=local_ttl)
+            self.add_codes((short_code,))
+            raw = entry.dumps()
+
+        if self.redis is not None:
+            try:
+                await self.redis.set(self.key_prefix + short_code, raw, ex=ttl)
+            except Exception:
+                self.shared_errors += 1
+                logger.warning("Shared cache store failed for %s", short_code, exc_info=True)
+        return entry
+
+    def warm(self, short_urls) -> int:
+        """Preload the local tier with known links, e.g. the most viewed ones at startup."""
+        for short_url in short_urls:
+            entry = short_url if isinstance(short_url, CachedShortURL) else CachedShortURL.from_model(short_url)
+            self.local.set(entry.short_code, entry, ttl=self._ttls(entry)[0])
+        return len(short_urls)
+
+    def _ttls(self, entry: CachedShortURL) -> tuple[float, int]:
+        """Local and shared TTL of `entry`: expired links are remembered like missing codes."""
+        if entry.expires_at is None:
+            return self.local.ttl, self.shared_ttl
+        remaining = (entry.expires_at - datetime.now(timezone.utc)).total_seconds()
+        remaining = max(remaining, self.negative_ttl)
+        return min(self.local.ttl, remaining), int(min(self.shared_ttl, remaining))
+
+    async def count_click(self, entry: CachedShortURL) -> int:
+        """Count a click of a link with `max_clicks`; returns its clicks including this one."""
+        if self.redis is not None:
+            key = self.clicks_key_prefix + str(entry.id)
+            try:
+                # The first click seeds the counter with the count the link was read with.
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    pipe.set(key, entry.clicks or 0, ex=self._ttls(entry)[1], nx=True)
+                    pipe.incr(key)
+                    _, clicks = await pipe.execute()
+                return clicks
+            except Exception:
+                self.shared_errors += 1
+                logger.warning("Shared click count failed for %s", entry.short_code, exc_info=True)
+
+        clicks = self.clicks.get(entry.id, entry.clicks or 0) + 1
+        self.clicks.set(entry.id, clicks, ttl=self._ttls(entry)[0])
+        return clicks
+
+    async def close(self):
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    def stats(self) -> dict:
+        return {
+            "local": self.local.stats(),
+            "shared": {
+                "enabled": self.redis_url is not None,
+                "hits": self.shared_hits,
+                "misses": self.shared_misses,
+                "errors": self.shared_errors,
+            },
+            "negative_hits": self.negative_hits,
+        }
+
+
+short_url_cache = ShortURLCache(
+    local_max_size=settings.CACHE_LOCAL_MAX_SIZE,
+    local_ttl=settings.CACHE_LOCAL_TTL,
+    shared_ttl=settings.CACHE_SHARED_TTL,
+    negative_ttl=settings.CACHE_NEGATIVE_TTL,
+    redis_url=settings.REDIS_URL,
+    code_index=short_code_index if settings.CODE_INDEX_ENABLED else None,
+)
+
+
+def _cache_lookups():
+    local = short_url_cache.local
+    yield ("local", "hit"), local.hits
+    yield ("local", "miss"), local.misses
+    yield ("shared", "hit"), short_url_cache.shared_hits
+    yield ("shared", "miss"), short_url_cache.shared_misses
+    yield ("shared", "error"), short_url_cache.shared_errors
+
+
+registry.callback(
+    "short_url_cache_lookups",
+    "Short URL cache lookups per tier and outcome",
+    _cache_lookups,
+    ("tier", "result"),
+    metric_type="counter",
+)
+registry.callback(
+    "short_url_cache_negative_hits",
+    "Lookups answered by a cached not-found entry",
+    lambda: [((), short_url_cache.negative_hits)],
+    metric_type="counter",
+)
@@ -0,0 +1,43 @@
+"""
+Fill `shorturl.original_url_hash` for rows that do not have one yet.
+
+The migration backfills existing rows; run this afterwards to pick up rows written by
+instances that were still running the previous release during the deploy.
+
+Usage:
+    python -m app.commands.backfill_url_hashes [--batch-size 10000]
+"""
+
+import argparse
+import asyncio
+
+from app.db.session import dispose_engines, get_session_sync
+from app.repositories.short_url import ShortURLRepository
+
+
+async def backfill(batch_size: int):
+    session_factory = get_session_sync()
+    after_id = 0
+    total = 0
+    try:
+        while True:
+            async with session_factory() as session:
+                last_id, updated = await ShortURLRepository(session).backfill_original_url_hashes(after_id, batch_size)
+            if last_id is None:
+                break
+            total += updated
+            after_id = last_id
+            print(f"scanned up to id {after_id}, hashed {total} rows")
+    finally:
+        await dispose_engines()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    args = parser.parse_args()
+    asyncio.run(backfill(args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
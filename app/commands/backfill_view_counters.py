@@ -0,0 +1,39 @@
+"""
+Fold every pending view log into the per-link view counters.
+
+Usage:
+    python -m app.commands.backfill_view_counters [--batch-size 50000]
+"""
+
+import argparse
+import asyncio
+from time import monotonic
+
+from app.db.session import dispose_engines, get_session_sync
+from app.services.view_rollup import ViewRollupWorker
+
+
+async def backfill(batch_size: int):
+    worker = ViewRollupWorker(session_factory=get_session_sync(), batch_size=batch_size)
+    started = monotonic()
+    total = 0
+    try:
+        while True:
+            folded = await worker.run_once(max_batches=1)
+            total += folded
+            print(f"folded {total} views ({total / max(monotonic() - started, 1e-9):.0f} views/s)")
+            if folded < batch_size:
+                break
+    finally:
+        await dispose_engines()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    args = parser.parse_args()
+    asyncio.run(backfill(args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
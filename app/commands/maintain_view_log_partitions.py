@@ -0,0 +1,42 @@
+"""
+Create the upcoming view log partitions and archive the expired ones once, e.g. from cron.
+
+Usage:
+    python -m app.commands.maintain_view_log_partitions [--retention-months 12] [--archive-dir DIR]
+"""
+
+import argparse
+import asyncio
+
+from app.core.setting import settings
+from app.db.session import dispose_engines, get_session_sync
+from app.services.view_log_partitions import ViewLogPartitionManager
+
+
+async def maintain(premake_months: int, retention_months: int, archive_dir: str):
+    manager = ViewLogPartitionManager(
+        session_factory=get_session_sync(),
+        premake_months=premake_months,
+        retention_months=retention_months,
+        archive_dir=archive_dir,
+    )
+    try:
+        for name in await manager.ensure_partitions():
+            print(f"created {name}")
+        for path in await manager.archive_expired():
+            print(f"archived {path}")
+    finally:
+        await dispose_engines()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--premake-months", type=int, default=settings.VIEW_LOG_PARTITION_PREMAKE_MONTHS)
+    parser.add_argument("--retention-months", type=int, default=settings.VIEW_LOG_RETENTION_MONTHS)
+    parser.add_argument("--archive-dir", default=settings.VIEW_LOG_ARCHIVE_DIR)
+    args = parser.parse_args()
+    asyncio.run(maintain(args.premake_months, args.retention_months, args.archive_dir))
+
+
+if __name__ == "__main__":
+    main()
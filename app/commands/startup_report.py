@@ -0,0 +1,102 @@
+"""
+Report what starting the app costs: import time per module and the time to build the app.
+
+The app is imported and built in a fresh interpreter under `python -X importtime`, so the
+numbers are those of a cold worker. Each module's own cost includes its module-level
+initialization, e.g. the singletons it creates; the cumulative cost adds the modules it
+imported first. Third-party modules are summed per top-level package.
+
+Usage:
+    python -m app.commands.startup_report [--top 15] [--budget-ms 1500]
+
+With a budget, the command exits with status 1 when importing and building the app takes
+longer, so it can guard against slow imports creeping back in, e.g. in CI.
+"""
+
+import argparse
+import subprocess
+import sys
+from collections import defaultdict
+from dataclasses import dataclass
+
+PROBE = (
+    "from time import perf_counter\n"
+    "started = perf_counter()\n"
+    "from app.main import create_app\n"
+    "imported = perf_counter()\n"
+    "create_app()\n"
+    "print(imported - started, perf_counter() - imported)\n"
+)
+
+
+@dataclass
+class ModuleCost:
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(output: str) -> list[ModuleCost]:
+    """Parse the `import time: self | cumulative | module` lines written by `-X importtime`."""
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line.removeprefix("import time:").split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the header line
+        name = fields[2].rstrip()
+        stripped = name.lstrip()
+        depth = (len(name) - len(stripped) - 1) // 2
+        modules.append(ModuleCost(stripped, int(fields[0]), int(fields[1]), depth))
+    return modules
+
+
+def measure() -> tuple[list[ModuleCost], float, float]:
+    """Import costs, the import time of `app.main` and the time `create_app` took, in seconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE], capture_output=True, text=True, check=False
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"Importing the app failed:\n{result.stderr[-4000:]}")
+    import_seconds, build_seconds = (float(value) for value in result.stdout.split()[-2:])
+    return parse_importtime(result.stderr), import_seconds, build_seconds
+
+
+def report(modules: list[ModuleCost], import_seconds: float, build_seconds: float, top: int):
+    own = sorted((module for module in modules if module.name.split(".")[0] == "app"), key=lambda m: -m.self_us)
+    packages: dict[str, int] = defaultdict(int)
+    for module in modules:
+        package = module.name.split(".")[0]
+        if package != "app":
+            packages[package] += module.self_us
+
+    print(f"import app.main  {import_seconds * 1000:8.1f} ms")
+    print(f"create_app()     {build_seconds * 1000:8.1f} ms")
+    print()
+    print(f"{'app module':<48} {'self ms':>9} {'cumulative ms':>14}")
+    for module in own[:top]:
+        print(f"{module.name:<48} {module.self_us / 1000:>9.1f} {module.cumulative_us / 1000:>14.1f}")
+    print()
+    print(f"{'package':<48} {'self ms':>9}")
+    for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"{package:<48} {self_us / 1000:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=15, help="Rows per table")
+    parser.add_argument("--budget-ms", type=float, default=0, help="Fail when importing and building takes longer")
+    args = parser.parse_args()
+
+    modules, import_seconds, build_seconds = measure()
+    report(modules, import_seconds, build_seconds, args.top)
+    total_ms = (import_seconds + build_seconds) * 1000
+    if args.budget_ms and total_ms > args.budget_ms:
+        print(f"\nStartup took {total_ms:.1f} ms, over the budget of {args.budget_ms:.1f} ms", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Export tables to files and import them back, e.g. to reseed staging or for disaster-recovery drills.
+
+Rows are streamed from a server-side cursor and loaded with COPY in batches, so memory
+stays constant whatever the table size. The format follows the file name (.ndjson/.jsonl,
+.csv, .parquet); NDJSON and CSV files ending in .gz are gzip compressed. Parquet needs the
+optional pyarrow package.
+
+Usage:
+    python -m app.commands.transfer_data export shorturl links.ndjson.gz [--batch-size 10000]
+    python -m app.commands.transfer_data import urlviewlog views.parquet [--batch-size 100000] [--skip N] [--reprocess]
+
+Imports keep the ids from the file and move the id sequence past them. Import `shorturl`
+before `urlviewlog`, and create the view log partitions for the imported months first
+(maintain_view_log_partitions), otherwise the rows land in the default partition. Each
+batch is committed on its own; rerun an interrupted import with --skip set to the last
+reported row count. View counters are not part of the export: pass --reprocess to
+load views as unprocessed and let the rollup rebuild them.
+"""
+
+import argparse
+import asyncio
+from time import monotonic
+
+from app.db.session import dispose_engines, get_session_sync
+from app.services.data_transfer import FORMATS, TABLES, detect_format, export_table, import_table
+
+
+def _progress(verb: str):
+    started = monotonic()
+
+    def report(total: int):
+        print(f"{verb} {total} rows ({total / max(monotonic() - started, 1e-9):.0f} rows/s)")
+
+    return report
+
+
+async def transfer(args: argparse.Namespace):
+    fmt = args.format or detect_format(args.path)
+    try:
+        if args.command == "export":
+            total = await export_table(
+                get_session_sync(), args.table, args.path, fmt, args.batch_size, progress=_progress("exported")
+            )
+        else:
+            total = await import_table(
+                get_session_sync(),
+                args.table,
+                args.path,
+                fmt,
+                args.batch_size,
+                skip=args.skip,
+                reprocess=args.reprocess,
+                progress=_progress("imported"),
+            )
+        print(f"done, {total} rows")
+    finally:
+        await dispose_engines()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="write a table to a file")
+    export_parser.add_argument("--batch-size", type=int, default=10_000)
+
+    import_parser = commands.add_parser("import", help="COPY a file into a table")
+    import_parser.add_argument("--batch-size", type=int, default=100_000)
+    import_parser.add_argument("--skip", type=int, default=0, help="rows of the file already imported")
+    import_parser.add_argument("--reprocess", action="store_true", help="load view logs as unprocessed")
+
+    for subparser in (export_parser, import_parser):
+        subparser.add_argument("table", choices=sorted(TABLES))
+        subparser.add_argument("path")
+        subparser.add_argument("--format", choices=FORMATS)
+
+    asyncio.run(transfer(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""
+In-process metrics registry with Prometheus text exposition.
+
+Metrics are only recorded from the event loop thread, so children are plain objects with
+integer/float fields and no locks: recording a sample is a dict lookup plus an addition.
+Values that already live elsewhere (cache counters, queue depth, pool usage) are read
+through callbacks at scrape time instead of being mirrored on every event.
+"""
+
+from bisect import bisect_left
+from functools import wraps
+from inspect import iscoroutinefunction
+from time import perf_counter
+from typing import Callable, Iterable
+
+DEFAULT_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(labelnames: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], object] = {}
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def expose(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+    def _samples(self):
+        for values, child in self._children.items():
+            yield f"{self.name}_total{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+
+
+class _GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+    def _samples(self):
+        for values, child in self._children.items():
+            yield f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self):
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ("child", "started")
+
+    def __init__(self, child: _HistogramChild):
+        self.child = child
+
+    def __enter__(self):
+        self.started = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.child.observe(perf_counter() - self.started)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def _samples(self):
+        for values, child in self._children.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), child.counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, values, f'le="{_format_value(bound)}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, values)
+            yield f"{self.name}_sum{labels} {_format_value(child.sum)}"
+            yield f"{self.name}_count{labels} {child.count}"
+
+
+class CallbackMetric(_Metric):
+    """Metric whose samples are produced by `func` at scrape time as (label values, value) pairs."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        func: Callable[[], Iterable[tuple[tuple[str, ...], float]]],
+        labelnames: Iterable[str] = (),
+        metric_type: str = "gauge",
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.func = func
+        self.type = metric_type
+
+    def _samples(self):
+        suffix = "_total" if self.type == "counter" else ""
+        for values, value in self.func():
+            yield f"{self.name}{suffix}{_format_labels(self.labelnames, values)} {_format_value(value)}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name: str, documentation: str, func, labelnames: Iterable[str] = (), metric_type: str = "gauge"):
+        return self.register(CallbackMetric(name, documentation, func, labelnames, metric_type))
+
+    def expose(self) -> str:
+        return "\n".join(metric.expose() for metric in self._metrics.values()) + "\n"
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route", "status"),
+)
+DB_POOL_CHECKOUT_DURATION = registry.histogram(
+    "db_pool_checkout_duration_seconds",
+    "Time spent waiting for a connection from the SQLAlchemy pool",
+    ("pool",),
+)
+DB_QUERY_DURATION = registry.histogram(
+    "db_query_duration_seconds",
+    "Repository method latency",
+    ("repository", "method"),
+)
+SHORT_CODE_COLLISIONS = registry.counter(
+    "short_code_collision_retries",
+    "Short code inserts retried because the code was already taken",
+)
+# Export the zero sample before the first collision so rate() has a baseline.
+SHORT_CODE_COLLISIONS.labels()
+
+
+def timed_repository(repository: str):
+    """Class decorator recording the latency of every public coroutine method in `DB_QUERY_DURATION`."""
+
+    def decorate(cls):
+        for name, method in list(vars(cls).items()):
+            if name.startswith("_") or not iscoroutinefunction(method):
+                continue
+            setattr(cls, name, _timed(method, DB_QUERY_DURATION.labels(repository, name)))
+        return cls
+
+    return decorate
+
+
+def _timed(method, child: _HistogramChild):
+    @wraps(method)
+    async def wrapper(*args, **kwargs):
+        started = perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            child.observe(perf_counter() - started)
+
+    return wrapper
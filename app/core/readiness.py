@@ -0,0 +1,19 @@
+class Readiness:
+    """
+    Whether this worker should receive traffic.
+
+    A worker is ready once its startup (including cache warmup) finished, and stops being
+    ready as soon as it starts draining for shutdown, so load balancers polling the health
+    check move traffic away before the listening socket closes.
+    """
+
+    def __init__(self):
+        self.started = False
+        self.draining = False
+
+    @property
+    def ready(self) -> bool:
+        return self.started and not self.draining
+
+
+readiness = Readiness()
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 from enum import Enum
 from pathlib import Path
+from typing import Literal
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -46,6 +47,173 @@ class Settings(BaseSettings):
     DB_POOL_RECYCLE: int = Field(default=3600, description="Recycle connections after N seconds")
     DB_POOL_PRE_PING: bool = Field(default=True, description="Validate connections before use")
     DB_ECHO: bool = Field(default=False, description="Enable SQL query logging")
+    DB_RAW_POOL_MIN_SIZE: int = Field(default=1, description="Connections kept open by the redirect fast path pool")
+    DB_RAW_POOL_MAX_SIZE: int = Field(default=10, description="Maximum connections of the redirect fast path pool")
+
+    # Read Replica Configuration
+    POSTGRES_REPLICA_HOSTS: list[str] = Field(
+        default_factory=list,
+        description='Read replicas as "host" or "host:port"; they share the primary\'s credentials and database',
+    )
+    DB_REPLICA_MAX_LAG: float = Field(
+        default=5.0, description="Replication lag (seconds) above which a replica is skipped"
+    )
+    DB_REPLICA_CHECK_INTERVAL: float = Field(default=5.0, description="Seconds between replica health checks")
+    DB_REPLICA_CHECK_TIMEOUT: float = Field(default=1.0, description="Timeout (seconds) of one replica health check")
+
+    # Server Configuration
+    SERVER_HOST: str = Field(default="0.0.0.0", description="Address app.server binds to")
+    SERVER_PORT: int = Field(default=8000, description="Port app.server binds to")
+    SERVER_WORKERS: int = Field(default=1, description="Worker processes started by app.server")
+    SERVER_GRACEFUL_TIMEOUT: float = Field(default=30.0, description="Seconds in-flight requests get on shutdown")
+    SERVER_DRAIN_DELAY: float = Field(
+        default=5.0, description="Seconds a worker keeps serving, failing health checks, after SIGTERM"
+    )
+    DB_CONNECTION_BUDGET: int = Field(
+        default=0, description="Postgres connections all app.server workers may open per server, 0 keeps DB_POOL_*"
+    )
+    CACHE_WARMUP_SIZE: int = Field(default=1_000, description="Most viewed links loaded into the cache at startup")
+    CACHE_REFRESH_INTERVAL: float = Field(
+        default=0.0, description="Seconds between reloads of the most viewed links into the cache, 0 disables"
+    )
+
+    # HTTP Caching Configuration
+    STATS_CACHE_CONTROL: str = Field(
+        default="public, max-age=5", description="Cache-Control of stats responses, empty sends none"
+    )
+    REDIRECT_CACHE_CONTROL: str = Field(default="", description="Cache-Control of 302 redirects, empty sends none")
+    REDIRECT_PERMANENT: bool = Field(
+        default=False, description="Answer redirects with a cacheable 301; cached clicks are not counted"
+    )
+    REDIRECT_PERMANENT_MAX_AGE: int = Field(default=86_400, description="max-age (seconds) of 301 redirects")
+
+    # Logging Configuration
+    LOG_FORMAT: Literal["text", "json"] = Field(default="text", description="Access log output format")
+    LOG_MAX_BODY_SIZE: int = Field(default=4096, description="Maximum request/response body bytes captured per log")
+    LOG_SAMPLE_RATE: float = Field(default=1.0, description="Fraction of requests logged when no other rate matches")
+    LOG_STATUS_SAMPLE_RATES: dict[str, float] = Field(
+        default_factory=dict,
+        description='Sample rate per status class, e.g. {"5xx": 1.0, "3xx": 0.01}',
+    )
+    LOG_ROUTE_SAMPLE_RATES: dict[str, dict[str, float]] = Field(
+        default_factory=dict,
+        description='Sample rates per route and status class, e.g. {"GET /{short_code}": {"3xx": 0.01, "*": 1.0}}',
+    )
+
+    # Rate Limit Configuration
+    RATE_LIMIT_POLICIES: dict[str, dict[str, float]] = Field(
+        default_factory=dict,
+        description='Token bucket per route template, e.g. {"POST /shorten": {"rate": 5, "burst": 20}, "*": {...}}',
+    )
+    RATE_LIMIT_MAX_CLIENTS: int = Field(default=100_000, description="Maximum client buckets kept per worker")
+    RATE_LIMIT_JWT_SECRET: str | None = Field(
+        default=None, description="Key verifying bearer tokens so clients are limited by JWT subject instead of IP"
+    )
+    RATE_LIMIT_JWT_ALGORITHMS: list[str] = Field(default=["HS256"], description="Accepted bearer token algorithms")
+    RATE_LIMIT_TRUSTED_PROXIES: int = Field(
+        default=0, description="Reverse proxies in front of the app whose X-Forwarded-For entries are trusted"
+    )
+    RATE_LIMIT_REDIS_SYNC: bool = Field(default=False, description="Share admitted request counts through REDIS_URL")
+    RATE_LIMIT_SYNC_INTERVAL: float = Field(default=1.0, description="Seconds between batched Redis syncs")
+    RATE_LIMIT_WINDOW: float = Field(default=10.0, description="Seconds of the cluster-wide counting window")
+
+    # View Ingestion Configuration
+    VIEW_INGEST_ENABLED: bool = Field(default=True, description="Buffer view logs and write them in batches")
+    VIEW_INGEST_QUEUE_SIZE: int = Field(default=50_000, description="Maximum number of buffered view logs")
+    VIEW_INGEST_BATCH_SIZE: int = Field(default=1_000, description="Maximum number of view logs per insert")
+    VIEW_INGEST_FLUSH_INTERVAL: float = Field(default=0.5, description="Maximum seconds a view log stays buffered")
+    VIEW_INGEST_ENQUEUE_TIMEOUT: float = Field(
+        default=1.0, description="Seconds a redirect waits for queue space before the view is dropped"
+    )
+
+    # Cache Configuration
+    REDIS_URL: str | None = Field(default=None, description="Redis URL for the shared cache tier (disabled if unset)")
+    CACHE_LOCAL_MAX_SIZE: int = Field(default=100_000, description="Maximum entries in the in-process cache")
+    CACHE_LOCAL_TTL: float = Field(default=600, description="Seconds an entry lives in the in-process cache")
+    CACHE_SHARED_TTL: int = Field(default=86_400, description="Seconds an entry lives in the shared cache")
+    CACHE_NEGATIVE_TTL: int = Field(default=30, description="Seconds an unknown short code is remembered as missing")
+
+    # Short Code Index Configuration
+    CODE_INDEX_ENABLED: bool = Field(
+        default=False, description="Answer lookups of never seen codes from an in-memory Bloom filter"
+    )
+    CODE_INDEX_CAPACITY: int = Field(default=10_000_000, description="Codes the filter holds at its error rate")
+    CODE_INDEX_ERROR_RATE: float = Field(default=0.01, description="Target false positive rate of the filter")
+    CODE_INDEX_PATH: str = Field(
+        default="", description="File the filter is shared through via mmap; lookups only use a shared filter"
+    )
+    CODE_INDEX_REFRESH_INTERVAL: float = Field(
+        default=1.0, description="Seconds between scans for codes created by other processes"
+    )
+
+    # Short Code Allocation Configuration
+    SHORT_CODE_ALLOCATOR: Literal["random", "sequence", "pool"] = Field(
+        default="random", description="Strategy used to allocate short codes for new links"
+    )
+    SHORT_CODE_MIN_LENGTH: int = Field(default=6, description="Minimum short code length; longer codes follow growth")
+    SHORT_CODE_PERMUTATION_KEY: str | None = Field(
+        default=None, description="Secret used to shuffle sequence-based codes, required by the sequence allocator"
+    )
+    SHORT_CODE_POOL_SIZE: int = Field(default=10_000, description="Number of pre-generated codes kept by the pool")
+
+    # URL Normalization Configuration
+    URL_SORT_QUERY_PARAMS: bool = Field(default=False, description="Sort query parameters by name when normalizing")
+    URL_STRIP_TRACKING_PARAMS: bool = Field(default=False, description="Drop utm_*, fbclid, gclid and similar params")
+    URL_NORMALIZE_CACHE_SIZE: int = Field(default=65_536, description="Maximum memoized URL normalizations")
+
+    # Batch Shortening Configuration
+    SHORTEN_BATCH_MAX_ITEMS: int = Field(default=100_000, description="Maximum URLs accepted by /shorten/batch")
+    SHORTEN_BATCH_CHUNK_SIZE: int = Field(default=1_000, description="URLs deduplicated and inserted per statement")
+
+    # View Rollup Configuration
+    VIEW_ROLLUP_ENABLED: bool = Field(default=True, description="Fold view logs into per-link counters in background")
+    VIEW_ROLLUP_INTERVAL: float = Field(default=5.0, description="Seconds between view rollup runs")
+    VIEW_ROLLUP_BATCH_SIZE: int = Field(default=10_000, description="Maximum view logs folded per transaction")
+    STATS_TIMESERIES_MAX_POINTS: int = Field(default=10_000, description="Maximum buckets returned by a timeseries")
+
+    # View Log Partition Configuration
+    VIEW_LOG_PARTITION_MAINTENANCE_ENABLED: bool = Field(
+        default=True, description="Create upcoming view log partitions and archive expired ones in background"
+    )
+    VIEW_LOG_PARTITION_INTERVAL: float = Field(default=3600.0, description="Seconds between partition maintenance runs")
+    VIEW_LOG_PARTITION_CRON: str = Field(
+        default="",
+        description='Cron schedule of partition maintenance in UTC, e.g. "15 3 * * *"; replaces the interval',
+    )
+    VIEW_LOG_PARTITION_PREMAKE_MONTHS: int = Field(default=3, description="Monthly partitions created ahead of time")
+    VIEW_LOG_RETENTION_MONTHS: int = Field(
+        default=0, description="Full months of view logs kept before archiving, 0 keeps everything"
+    )
+    VIEW_LOG_ARCHIVE_DIR: str = Field(default="archive/urlviewlog", description="Directory for archived partitions")
+
+    # Link Expiry Configuration
+    LINK_EXPIRY_SWEEP_ENABLED: bool = Field(default=True, description="Delete expired links in background")
+    LINK_EXPIRY_SWEEP_INTERVAL: float = Field(default=60.0, description="Seconds between expiry sweeps")
+    LINK_EXPIRY_SWEEP_BATCH_SIZE: int = Field(default=1_000, description="Maximum links deleted per transaction")
+    LINK_EXPIRY_GRACE: float = Field(
+        default=86_400.0, description="Seconds expired links answer 410 Gone before they are deleted"
+    )
+    LINK_EXPIRY_ARCHIVE_DIR: str = Field(
+        default="", description="Directory receiving deleted links as NDJSON, empty deletes without archiving"
+    )
+
+    # Background Job Scheduler Configuration
+    SCHEDULER_MAX_CONCURRENCY: int = Field(default=2, description="Background jobs running at once per worker")
+    SCHEDULER_LEADER_ELECTION: bool = Field(
+        default=True, description="Run singleton jobs only on the worker holding a Postgres advisory lock"
+    )
+    SCHEDULER_LEADER_CHECK_INTERVAL: float = Field(
+        default=10.0, description="Seconds between leader lock checks and takeover attempts"
+    )
+
+    # Event Outbox Configuration
+    OUTBOX_ENABLED: bool = Field(
+        default=False, description="Write create and view events to the outbox and relay them in background"
+    )
+    OUTBOX_SINK: Literal["file", "memory"] = Field(default="file", description="Where the relay publishes events")
+    OUTBOX_FILE_PATH: str = Field(default="events/outbox.ndjson", description="NDJSON file of the file sink")
+    OUTBOX_BATCH_SIZE: int = Field(default=500, description="Maximum events published per relay transaction")
+    OUTBOX_LINGER: float = Field(default=0.5, description="Seconds the relay waits for a batch to fill up")
 
 
 settings = Settings()
@@ -1,4 +1,7 @@
+from .outbox import OutboxEvent
 from .short_url import ShortURL
+from .view_bucket import ShortURLViewBucket
+from .view_counter import ShortURLViewCounter
 from .view_log import URLViewLog
 
-__all__ = ["ShortURL", "URLViewLog"]
+__all__ = ["OutboxEvent", "ShortURL", "ShortURLViewBucket", "ShortURLViewCounter", "URLViewLog"]
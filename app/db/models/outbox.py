@@ -0,0 +1,25 @@
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from sqlalchemy import BigInteger
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import TIMESTAMP, Column, Field, SQLModel
+
+SHORT_URL_CREATED = "short_url.created"
+SHORT_URL_VIEWED = "short_url.viewed"
+
+
+class OutboxEvent(SQLModel, table=True):
+    """
+    An event waiting to be published, written in the same transaction as the change it describes.
+
+    `OutboxRelay` publishes rows in id order and deletes them once the sink accepted them.
+    """
+
+    id: Optional[int] = Field(default=None, sa_column=Column(BigInteger, primary_key=True, autoincrement=True))
+    event_type: str = Field(nullable=False, max_length=64)
+    payload: dict[str, Any] = Field(sa_column=Column(JSONB, nullable=False))
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column=Column(TIMESTAMP(timezone=True), nullable=False),
+    )
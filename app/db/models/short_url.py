@@ -1,7 +1,7 @@
 from datetime import datetime, timezone
 from typing import TYPE_CHECKING, List, Optional
 
-from sqlalchemy import TIMESTAMP, Column
+from sqlalchemy import TIMESTAMP, Column, Index, LargeBinary, text
 from sqlmodel import Field, Relationship, SQLModel
 
 if TYPE_CHECKING:
@@ -10,10 +10,25 @@ if TYPE_CHECKING:
 
 class ShortURL(SQLModel, table=True):
     id: int | None = Field(default=None, primary_key=True)
-    original_url: str = Field(nullable=False, index=True)
+    original_url: str = Field(nullable=False)
+    # SHA-256 of `original_url`; NULL for rows that duplicate an older row's URL and for links
+    # with a lifetime, which are never handed out to other requests for the same URL.
+    original_url_hash: bytes | None = Field(default=None, sa_column=Column(LargeBinary, nullable=True))
     short_code: str = Field(nullable=False, unique=True, index=True)
     created_at: datetime = Field(
         default_factory=lambda: datetime.now(timezone.utc),
         sa_column=Column(TIMESTAMP(timezone=True), nullable=False),
     )
-    view_logs: Optional[List["URLViewLog"]] = Relationship(back_populates="shorturl")
+    # Redirects answer 410 Gone from `expires_at` on, or once `max_clicks` views were counted.
+    expires_at: datetime | None = Field(default=None, sa_column=Column(TIMESTAMP(timezone=True), nullable=True))
+    max_clicks: int | None = Field(default=None, nullable=True)
+    view_logs: Optional[List["URLViewLog"]] = Relationship(
+        back_populates="shorturl",
+        sa_relationship_kwargs={"primaryjoin": "ShortURL.id == foreign(URLViewLog.shorturl_id)"},
+    )
+
+    __table_args__ = (
+        Index("ux_shorturl_original_url_hash", "original_url_hash", unique=True),
+        # Only links with a lifetime are indexed, for the expiry sweep.
+        Index("ix_shorturl_expires_at", "expires_at", postgresql_where=text("expires_at IS NOT NULL")),
+    )
@@ -0,0 +1,11 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Column
+from sqlmodel import TIMESTAMP, Field, SQLModel
+
+
+class ShortURLViewBucket(SQLModel, table=True):
+    shorturl_id: int = Field(foreign_key="shorturl.id", primary_key=True)
+    granularity: str = Field(primary_key=True, max_length=8)
+    bucket_start: datetime = Field(sa_column=Column(TIMESTAMP(timezone=True), primary_key=True))
+    view_count: int = Field(default=0, sa_column=Column(BigInteger, nullable=False, server_default="0"))
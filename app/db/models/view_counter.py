@@ -0,0 +1,16 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import BigInteger, Column, Index, text
+from sqlmodel import TIMESTAMP, Field, SQLModel
+
+
+class ShortURLViewCounter(SQLModel, table=True):
+    shorturl_id: int = Field(foreign_key="shorturl.id", primary_key=True)
+    view_count: int = Field(default=0, sa_column=Column(BigInteger, nullable=False, server_default="0"))
+    updated_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column=Column(TIMESTAMP(timezone=True), nullable=False),
+    )
+
+    # Serves `get_most_viewed` as an index scan that stops after `limit` rows.
+    __table_args__ = (Index("ix_shorturlviewcounter_view_count", text("view_count DESC")),)
@@ -1,20 +1,36 @@
 from datetime import datetime, timezone
 from typing import TYPE_CHECKING, Optional
 
-from sqlmodel import TIMESTAMP, Column, Field, Index, Relationship, SQLModel
+from sqlalchemy import BigInteger
+from sqlmodel import TIMESTAMP, Column, Field, Index, Relationship, SQLModel, text
 
 if TYPE_CHECKING:
     from app.db.models.short_url import ShortURL
 
 
 class URLViewLog(SQLModel, table=True):
-    id: Optional[int] = Field(default=None, primary_key=True)
-    shorturl_id: int = Field(foreign_key="shorturl.id", nullable=False, index=True)
-    shorturl: Optional["ShortURL"] = Relationship(back_populates="view_logs")
+    """
+    One row per view, range partitioned by month on `viewed_at` (see `ViewLogPartitionManager`).
+
+    The partition key has to be part of the primary key. Only unprocessed rows are indexed
+    beyond the primary key, so history that has been rolled up costs no index maintenance.
+    """
+
+    id: Optional[int] = Field(default=None, sa_column=Column(BigInteger, primary_key=True, autoincrement=True))
+    # No foreign key: history outlives expired links and is purged with its partition.
+    shorturl_id: int = Field(nullable=False)
+    shorturl: Optional["ShortURL"] = Relationship(
+        back_populates="view_logs",
+        sa_relationship_kwargs={"primaryjoin": "ShortURL.id == foreign(URLViewLog.shorturl_id)"},
+    )
     viewed_at: datetime = Field(
         default_factory=lambda: datetime.now(timezone.utc),
-        sa_column=Column(TIMESTAMP(timezone=True), nullable=False),
+        sa_column=Column(TIMESTAMP(timezone=True), primary_key=True, nullable=False),
     )
-    processed: bool = Field(default=False, nullable=False, index=True)
+    processed: bool = Field(default=False, nullable=False)
 
-    __table_args__ = (Index("is_shorturl_processed", "shorturl_id", "processed"),)
+    __table_args__ = (
+        Index("ix_urlviewlog_unprocessed_id", "id", postgresql_where=text("processed = false")),
+        Index("ix_urlviewlog_unprocessed_shorturl_id", "shorturl_id", postgresql_where=text("processed = false")),
+        {"postgresql_partition_by": "RANGE (viewed_at)"},
+    )
@@ -0,0 +1,47 @@
+import asyncio
+from time import perf_counter
+
+import asyncpg
+
+from app.core.metrics import DB_POOL_CHECKOUT_DURATION
+
+
+class RawPool:
+    """
+    Lazily opened asyncpg pool for hot read paths that bypass SQLAlchemy and the ORM.
+
+    Statements go through `fetchrow`, so asyncpg prepares each one once per connection and
+    reuses it from its statement cache afterwards.
+    """
+
+    def __init__(self, dsn: str, name: str, min_size: int = 1, max_size: int = 10, timeout: float = 30.0):
+        self.dsn = dsn
+        self.name = name
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self._pool: asyncpg.Pool | None = None
+        self._lock = asyncio.Lock()
+
+    async def open(self) -> asyncpg.Pool:
+        async with self._lock:
+            if self._pool is None:
+                self._pool = await asyncpg.create_pool(
+                    self.dsn,
+                    min_size=self.min_size,
+                    max_size=self.max_size,
+                    server_settings={"application_name": "bimahbazar_app"},
+                )
+        return self._pool
+
+    async def fetchrow(self, query: str, *args) -> asyncpg.Record | None:
+        pool = self._pool or await self.open()
+        started = perf_counter()
+        async with pool.acquire(timeout=self.timeout) as connection:
+            DB_POOL_CHECKOUT_DURATION.labels(self.name).observe(perf_counter() - started)
+            return await connection.fetchrow(query, *args)
+
+    async def close(self):
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
@@ -0,0 +1,129 @@
+import asyncio
+from itertools import count
+from logging import getLogger
+from typing import TYPE_CHECKING, Callable
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.db.raw import RawPool
+
+if TYPE_CHECKING:
+    from app.db.session import Database
+
+logger = getLogger(__name__)
+
+# Seconds the replica is behind the primary. A replica that has replayed everything it
+# received reports 0 even when the primary has been idle for a while.
+REPLICA_LAG = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+
+class Replica:
+    def __init__(self, name: str, database: "Database", raw_pool: RawPool):
+        self.name = name
+        self.database = database
+        self.raw_pool = raw_pool
+        self.healthy = False
+        self.lag: float | None = None
+
+    @property
+    def engine(self) -> AsyncEngine:
+        return self.database.engine
+
+    @property
+    def session_factory(self) -> Callable:
+        return self.database
+
+
+class ReplicaRouter:
+    """
+    Picks the session factory for read-only queries.
+
+    Replicas are used round-robin once a health check has found them reachable and no more
+    than `max_lag` seconds behind. Until the first check, and whenever no replica is
+    healthy, reads go to the primary.
+    """
+
+    def __init__(
+        self,
+        primary_session_factory: Callable,
+        replicas: list[Replica],
+        max_lag: float = 5.0,
+        check_interval: float = 5.0,
+        check_timeout: float = 1.0,
+    ):
+        self.primary_session_factory = primary_session_factory
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self._turn = count()
+        self._task: asyncio.Task | None = None
+
+    def choose(self) -> Replica | None:
+        """Next healthy replica in round-robin order, or None to use the primary."""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._turn) % len(healthy)]
+
+    def mark_failed(self, replica: Replica):
+        """Take `replica` out of rotation until the next successful health check."""
+        if replica.healthy:
+            logger.warning("Read replica %s failed, routing its reads to the primary", replica.name)
+        replica.healthy = False
+
+    async def check(self, replica: Replica):
+        try:
+            async with asyncio.timeout(self.check_timeout):
+                async with replica.engine.connect() as connection:
+                    lag = float((await connection.execute(REPLICA_LAG)).scalar() or 0)
+        except Exception as e:
+            replica.lag = None
+            if replica.healthy:
+                logger.warning("Read replica %s health check failed: %r", replica.name, e)
+            replica.healthy = False
+            return
+
+        replica.lag = lag
+        healthy = lag <= self.max_lag
+        if healthy != replica.healthy:
+            if healthy:
+                logger.info("Read replica %s is healthy (lag %.1fs)", replica.name, lag)
+            else:
+                logger.warning("Read replica %s lags %.1fs behind, routing its reads to the primary", replica.name, lag)
+        replica.healthy = healthy
+
+    async def check_all(self):
+        await asyncio.gather(*(self.check(replica) for replica in self.replicas))
+
+    async def start(self):
+        if self.replicas and self._task is None:
+            await self.check_all()
+            self._task = asyncio.create_task(self._run(), name="replica-health-check")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for replica in self.replicas:
+            replica.healthy = False
+            await replica.database.dispose()
+            await replica.raw_pool.close()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await self.check_all()
@@ -1,37 +1,174 @@
+from functools import cached_property
+from time import perf_counter
 from typing import AsyncGenerator
 
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.core.metrics import DB_POOL_CHECKOUT_DURATION, registry
 from app.core.setting import settings
+from app.db.raw import RawPool
+from app.db.replicas import Replica, ReplicaRouter
 
-PG_DSN = f"postgresql+asyncpg://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}@{settings.POSTGRES_HOST}:{settings.POSTGRES_PORT}/{settings.POSTGRES_DBNAME}"
-
-# Create engine with connection pooling configuration
-# Note: For async engines, SQLAlchemy automatically uses the appropriate pool class
-engine = create_async_engine(
-    url=PG_DSN,
-    echo=settings.DB_ECHO,
-    # Connection pooling configuration
-    pool_size=settings.DB_POOL_SIZE,
-    max_overflow=settings.DB_MAX_OVERFLOW,
-    pool_pre_ping=settings.DB_POOL_PRE_PING,
-    pool_recycle=settings.DB_POOL_RECYCLE,
-    pool_timeout=settings.DB_POOL_TIMEOUT,
-    # Connection configuration
-    connect_args={"server_settings": {"application_name": "bimahbazar_app"}},
+
+def _dsn(host: str, port: int, scheme: str = "postgresql+asyncpg") -> str:
+    return f"{scheme}://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}@{host}:{port}/{settings.POSTGRES_DBNAME}"
+
+
+PG_DSN = _dsn(settings.POSTGRES_HOST, settings.POSTGRES_PORT)
+
+
+class InstrumentedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """Async queue pool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        started = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_DURATION.labels(self.logging_name).observe(perf_counter() - started)
+
+
+def _create_engine(dsn: str, name: str):
+    return create_async_engine(
+        url=dsn,
+        echo=settings.DB_ECHO,
+        poolclass=InstrumentedAsyncAdaptedQueuePool,
+        pool_logging_name=name,
+        # Connection pooling configuration
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        # Connection configuration
+        connect_args={"server_settings": {"application_name": "bimahbazar_app"}},
+    )
+
+
+def _session_factory(bind):
+    return sessionmaker(
+        bind=bind,
+        class_=AsyncSession,
+        autoflush=False,
+        expire_on_commit=False,
+        autocommit=False,
+    )
+
+
+def _create_raw_pool(host: str, port: int, name: str) -> RawPool:
+    return RawPool(
+        _dsn(host, port, scheme="postgresql"),
+        name=f"raw:{name}",
+        min_size=settings.DB_RAW_POOL_MIN_SIZE,
+        max_size=settings.DB_RAW_POOL_MAX_SIZE,
+        timeout=settings.DB_POOL_TIMEOUT,
+    )
+
+
+class Database:
+    """
+    Engine and session factory of one Postgres server, both created on first use.
+
+    Creating an engine loads the SQLAlchemy asyncpg dialect, so it is left to the first
+    session instead of the import of this module. Calling the database opens a session,
+    which makes it a drop-in session factory.
+    """
+
+    def __init__(self, name: str, dsn: str):
+        self.name = name
+        self.dsn = dsn
+
+    @cached_property
+    def engine(self) -> AsyncEngine:
+        return _create_engine(self.dsn, self.name)
+
+    @cached_property
+    def session_factory(self) -> sessionmaker:
+        return _session_factory(self.engine)
+
+    @property
+    def created(self) -> bool:
+        return "engine" in self.__dict__
+
+    def __call__(self) -> AsyncSession:
+        return self.session_factory()
+
+    def connect(self) -> AsyncConnection:
+        """A connection outside any session, e.g. to hold a session-level advisory lock."""
+        return self.engine.connect()
+
+    async def dispose(self):
+        if self.created:
+            await self.engine.dispose()
+
+
+def _create_replica(entry: str) -> Replica:
+    """Build a replica from a "host" or "host:port" entry; the port defaults to the primary's."""
+    host, separator, port = entry.rpartition(":")
+    if not separator:
+        host, port = entry, settings.POSTGRES_PORT
+    name = f"replica:{host}:{port}"
+    return Replica(name, Database(name, _dsn(host, int(port))), _create_raw_pool(host, int(port), name))
+
+
+primary = Database("primary", PG_DSN)
+# Used by the redirect fast path, which skips the session and the ORM.
+raw_pool = _create_raw_pool(settings.POSTGRES_HOST, settings.POSTGRES_PORT, "primary")
+read_replicas = [_create_replica(entry) for entry in settings.POSTGRES_REPLICA_HOSTS]
+
+
+def __getattr__(name: str):
+    # `engine` used to be created at import; it is still importable, created on first access.
+    if name == "engine":
+        return primary.engine
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _pool_usage():
+    capacity = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    for database in [primary] + [replica.database for replica in read_replicas]:
+        if not database.created:
+            continue
+        pool = database.engine.pool
+        yield (database.name, "checked_out"), pool.checkedout()
+        yield (database.name, "idle"), pool.checkedin()
+        yield (database.name, "saturation"), pool.checkedout() / capacity if capacity else 0.0
+
+
+registry.callback(
+    "db_pool_connections",
+    "SQLAlchemy pool usage; saturation is checked out connections over pool_size + max_overflow",
+    _pool_usage,
+    ("pool", "state"),
 )
 
-# Create session factory
-async_session_factory = sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
-    autoflush=False,
-    expire_on_commit=False,
-    autocommit=False,
+# Sessions on the primary; the engine is created by the first one.
+async_session_factory = primary
+
+replica_router = ReplicaRouter(
+    primary_session_factory=async_session_factory,
+    replicas=read_replicas,
+    max_lag=settings.DB_REPLICA_MAX_LAG,
+    check_interval=settings.DB_REPLICA_CHECK_INTERVAL,
+    check_timeout=settings.DB_REPLICA_CHECK_TIMEOUT,
 )
 
 
+def _replica_state():
+    for replica in read_replicas:
+        yield (replica.name, "healthy"), int(replica.healthy)
+        if replica.lag is not None:
+            yield (replica.name, "lag_seconds"), replica.lag
+
+
+registry.callback("db_replica", "Read replica health and replication lag", _replica_state, ("replica", "state"))
+
+
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     """
     Dependency to get database session with proper connection pooling.
@@ -47,6 +184,32 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
+async def get_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency to get a session for read-only queries.
+    The session is bound to a healthy read replica, or to the primary when there is none.
+    Never use it for writes or for reads that must see a write made by this request.
+    """
+    replica = replica_router.choose()
+    factory = replica.session_factory if replica is not None else async_session_factory
+    async with factory() as session:
+        try:
+            yield session
+        except Exception as e:
+            await session.rollback()
+            if replica is not None and isinstance(e, (OperationalError, InterfaceError, PoolTimeoutError, OSError)):
+                replica_router.mark_failed(replica)
+            raise e
+        finally:
+            await session.close()
+
+
+async def dispose_engines():
+    """Close every pooled connection of the primary; replicas are closed by `replica_router.stop`."""
+    await raw_pool.close()
+    await primary.dispose()
+
+
 def get_session_sync():
     """
     Synchronous function to get session factory for manual session management.
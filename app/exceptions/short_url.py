@@ -8,3 +8,9 @@ class ShortURLGenerationError(Exception):
     """Raised when a unique short code cannot be generated."""
 
     pass
+
+
+class ShortURLExpiredError(Exception):
+    """Raised when a short URL has passed its expiry time or used up its clicks."""
+
+    pass
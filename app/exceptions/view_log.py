@@ -0,0 +1,4 @@
+class ViewTimeseriesRangeError(Exception):
+    """Raised when a requested view timeseries range is invalid or too large."""
+
+    pass
@@ -1,8 +1,110 @@
+from contextlib import asynccontextmanager
+from logging import getLogger
+from time import perf_counter
+
 from fastapi import FastAPI
 
-from app.api import endpoints
+from app.api import endpoints, health, internal, metrics
+from app.cache.code_index import short_code_index
+from app.cache.short_url import short_url_cache
+from app.core.readiness import readiness
+from app.core.setting import settings
+from app.db.session import async_session_factory, dispose_engines, replica_router
 from app.middleware import register_middlewares
+from app.middleware.logging import configure_logging
+from app.middleware.rate_limit import rate_limiter
+from app.services.cache_warmup import warm_short_url_cache
+from app.services.code_allocator import code_allocator
+from app.services.jobs import background_jobs
+from app.services.outbox import outbox_relay
+from app.services.scheduler import scheduler
+from app.services.view_ingestion import view_ingestion_pipeline
+
+logger = getLogger(__name__)
+
+
+class StartupTimer:
+    """Wall time of each lifespan startup step, logged once the app is ready."""
+
+    def __init__(self):
+        self.steps: dict[str, float] = {}
+
+    @asynccontextmanager
+    async def step(self, name: str):
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            self.steps[name] = perf_counter() - started
+
+    def log(self):
+        logger.info(
+            "Started in %.3fs: %s",
+            sum(self.steps.values()),
+            ", ".join(f"{name} {seconds:.3f}s" for name, seconds in self.steps.items()),
+        )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    timer = app.state.startup_timer = StartupTimer()
+    if settings.VIEW_INGEST_ENABLED:
+        async with timer.step("view_ingestion"):
+            await view_ingestion_pipeline.start()
+    if settings.OUTBOX_ENABLED:
+        async with timer.step("outbox"):
+            await outbox_relay.start()
+    if settings.CODE_INDEX_ENABLED:
+        async with timer.step("code_index"):
+            await short_code_index.start()
+    async with timer.step("code_allocator"):
+        await code_allocator.start()
+    async with timer.step("replicas"):
+        await replica_router.start()
+    async with timer.step("rate_limiter"):
+        await rate_limiter.start()
+    async with timer.step("cache_warmup"):
+        await warm_short_url_cache(short_url_cache, async_session_factory, settings.CACHE_WARMUP_SIZE)
+    async with timer.step("scheduler"):
+        for job in background_jobs():
+            scheduler.add(job)
+        await scheduler.start()
+    timer.log()
+    readiness.started = True
+    try:
+        yield
+    finally:
+        readiness.started = False
+        await scheduler.stop()
+        await rate_limiter.stop()
+        await replica_router.stop()
+        await code_allocator.stop()
+        await short_code_index.stop()
+        await outbox_relay.stop()
+        await view_ingestion_pipeline.stop()
+        await short_url_cache.close()
+        # Last, so the workers above can still flush through the pools while stopping.
+        await dispose_engines()
+
+
+def create_app() -> FastAPI:
+    """
+    Build the application. Nothing connects to Postgres or Redis before the lifespan starts,
+    and the engines are created by their first session.
+    """
+    configure_logging()
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(health.router)
+    app.include_router(internal.router)
+    app.include_router(metrics.router)
+    app.include_router(endpoints.router)
+    register_middlewares(app)
+    return app
+
 
-app = FastAPI()
-app.include_router(endpoints.router)
-register_middlewares(app)
+def __getattr__(name: str):
+    # `app.main:app` keeps working for uvicorn and scripts; the app is built on first access.
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,7 +1,11 @@
 from app.middleware.logging import LoggingMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.rate_limit import RateLimitMiddleware
 
 MIDDLEWARE_CLASSES = [
+    RateLimitMiddleware,
     LoggingMiddleware,
+    MetricsMiddleware,
 ]
 
 
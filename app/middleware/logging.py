@@ -1,24 +1,97 @@
+import atexit
 from datetime import datetime, timezone
+from json import dumps as json_dumps
 from json import loads as json_loads
-from logging import INFO, Formatter, StreamHandler, getLogger
-from time import time
+from logging import INFO, Formatter, LogRecord, StreamHandler, getLogger
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+from random import random
+from time import perf_counter
+
+from app.core.setting import settings
+
+try:
+    from orjson import dumps as _orjson_dumps
+
+    def _dumps(data: dict) -> str:
+        return _orjson_dumps(data, default=str).decode()
+
+except ImportError:  # pragma: no cover - orjson is optional
+
+    def _dumps(data: dict) -> str:
+        return json_dumps(data, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+class JSONFormatter(Formatter):
+    """One JSON object per line: timestamp, level, message and the record's `access` fields."""
+
+    def format(self, record: LogRecord) -> str:
+        data = {
+            "timestamp": record.created,
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        access = getattr(record, "access", None)
+        if access:
+            data.update(access)
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        return _dumps(data)
+
+
+class InProcessQueueHandler(QueueHandler):
+    """
+    Queue handler that hands records to the listener thread untouched.
+
+    The stock `QueueHandler.prepare` formats the message on the calling thread so the
+    record can be pickled; records never leave this process, so formatting is left to
+    the listener thread and the event loop only pays for the enqueue.
+    """
+
+    def prepare(self, record):
+        return record
 
-from fastapi import Request, Response
-from jwt import decode as jwt_decode
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response as StarletteResponse
 
 logger = getLogger(__name__)
-logger.setLevel(INFO)
-ch = StreamHandler()
-ch.setLevel(INFO)
-formatter = Formatter("%(asctime)s - %(levelname)s - %(message)s")
-ch.setFormatter(formatter)
-logger.addHandler(ch)
-getLogger("uvicorn.access").disabled = True
+log_queue = SimpleQueue()
+log_listener = QueueListener(log_queue, respect_handler_level=True)
+
+
+def configure_logging():
+    """
+    Print the access log to stderr from a listener thread; called by `create_app`, repeat calls do nothing.
+
+    Until then the logger has no handler and stays at the root's level, so importing this
+    module neither starts a thread nor changes how anything else logs.
+    """
+    if logger.handlers:
+        return
+    handler = StreamHandler()
+    handler.setLevel(INFO)
+    handler.setFormatter(
+        JSONFormatter() if settings.LOG_FORMAT == "json" else Formatter("%(asctime)s - %(levelname)s - %(message)s")
+    )
+    log_listener.handlers = (handler,)
+    logger.setLevel(INFO)
+    logger.addHandler(InProcessQueueHandler(log_queue))
+    log_listener.start()
+    atexit.register(log_listener.stop)
+    getLogger("uvicorn.access").disabled = True
+
 
 EXCLUDE_PATHS = [
     "/health_check",
+    "/metrics",
+]
+
+SKIP_BODY_PATHS: list[str] = []
+
+SKIP_BODY_CONTENT_TYPES = [
+    "application/octet-stream",
+    "multipart/form-data",
+    "image/",
+    "audio/",
+    "video/",
 ]
 
 SENSITIVE_FIELDS = [
@@ -28,70 +101,226 @@ SENSITIVE_FIELDS = [
 ]
 
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next) -> Response:
-        if any(request.url.path.startswith(p) for p in EXCLUDE_PATHS):
-            return await call_next(request)
+class _BodyCapture:
+    """Keeps at most `limit` bytes of a streamed body without copying the chunks that pass through."""
+
+    __slots__ = ("chunks", "size", "limit", "truncated")
+
+    def __init__(self, limit: int):
+        self.chunks: list[bytes] = []
+        self.size = 0
+        self.limit = limit
+        self.truncated = False
+
+    def feed(self, chunk: bytes):
+        if not chunk:
+            return
+        room = self.limit - self.size
+        if room <= 0:
+            self.truncated = True
+            return
+        if len(chunk) > room:
+            chunk = chunk[:room]
+            self.truncated = True
+        self.chunks.append(chunk)
+        self.size += len(chunk)
+
+    def parse(self):
+        if not self.chunks:
+            return None
+        body = b"".join(self.chunks)
+        if not self.truncated:
+            try:
+                return json_loads(body)
+            except Exception:  # noqa
+                pass
+        return str(body)
+
+
+def _skip_body(content_type: str, skip_content_types: list[str]) -> bool:
+    return any(content_type.startswith(t) for t in skip_content_types)
+
+
+def _content_type(raw_headers) -> str:
+    for key, value in raw_headers:
+        if key.lower() == b"content-type":
+            return value.decode("latin-1")
+    return ""
 
-        start_time = time()
 
-        body_bytes = await request.body()
+class AccessLogSampler:
+    """
+    Decides which requests get an access log line.
+
+    Rates are looked up by route ("GET /{short_code}") and status class ("3xx"): a route's
+    status-class rate wins over the route's "*" rate, which wins over the global
+    status-class rate and finally `default_rate`.
+    """
+
+    def __init__(
+        self,
+        default_rate: float = 1.0,
+        status_rates: dict[str, float] | None = None,
+        route_rates: dict[str, dict[str, float]] | None = None,
+    ):
+        self.default_rate = default_rate
+        self.status_rates = status_rates or {}
+        self.route_rates = route_rates or {}
+
+    def rate(self, route: str, status_code: int) -> float:
+        status_class = f"{status_code // 100}xx"
+        rates = self.route_rates.get(route)
+        if rates:
+            if status_class in rates:
+                return rates[status_class]
+            if "*" in rates:
+                return rates["*"]
+        return self.status_rates.get(status_class, self.default_rate)
+
+    def should_log(self, route: str, status_code: int) -> bool:
+        rate = self.rate(route, status_code)
+        return rate >= 1.0 or (rate > 0.0 and random() < rate)
+
+
+class _PathSet:
+    """Paths and everything below them: "/metrics" covers "/metrics/x" but not the short code "/metricsAb1"."""
+
+    def __init__(self, paths):
+        self.paths = frozenset(path.rstrip("/") or "/" for path in paths)
+        self.prefixes = tuple(path.rstrip("/") + "/" for path in paths)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self.paths or path.startswith(self.prefixes)
+
+
+class LoggingMiddleware:
+    """
+    Pure ASGI access-log middleware.
+
+    Request and response bodies are teed chunk by chunk as they stream through, capped at
+    `max_body_size` bytes each, and are not captured at all for `skip_body_paths` or for
+    `skip_body_content_types`. Records go through a `QueueHandler`, so formatting and I/O
+    happen on the listener thread instead of the event loop.
+
+    Each finished request is sampled by route template and status class first; headers,
+    JWT claims and parsed bodies are only built for sampled records when the JSON format,
+    which is the only one that writes them, is enabled.
+    """
+
+    def __init__(
+        self,
+        app,
+        max_body_size: int | None = None,
+        exclude_paths: list[str] | None = None,
+        skip_body_paths: list[str] | None = None,
+        skip_body_content_types: list[str] | None = None,
+        sampler: AccessLogSampler | None = None,
+        structured: bool | None = None,
+    ):
+        self.app = app
+        self.max_body_size = settings.LOG_MAX_BODY_SIZE if max_body_size is None else max_body_size
+        self.exclude_paths = _PathSet(EXCLUDE_PATHS if exclude_paths is None else exclude_paths)
+        self.skip_body_paths = _PathSet(SKIP_BODY_PATHS if skip_body_paths is None else skip_body_paths)
+        self.skip_body_content_types = (
+            SKIP_BODY_CONTENT_TYPES if skip_body_content_types is None else skip_body_content_types
+        )
+        self.sampler = sampler or AccessLogSampler(
+            default_rate=settings.LOG_SAMPLE_RATE,
+            status_rates=settings.LOG_STATUS_SAMPLE_RATES,
+            route_rates=settings.LOG_ROUTE_SAMPLE_RATES,
+        )
+        self.structured = settings.LOG_FORMAT == "json" if structured is None else structured
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        start_time = perf_counter()
+        capture_bodies = self.structured and self.max_body_size > 0 and scope["path"] not in self.skip_body_paths
+
+        request_body = None
+        if capture_bodies and not _skip_body(_content_type(scope["headers"]), self.skip_body_content_types):
+            request_body = _BodyCapture(self.max_body_size)
+        response_body = None
+        status_code = 500
+
+        async def receive_wrapper():
+            message = await receive()
+            if request_body is not None and message["type"] == "http.request":
+                request_body.feed(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message):
+            nonlocal status_code, response_body
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if capture_bodies and not _skip_body(
+                    _content_type(message.get("headers", ())), self.skip_body_content_types
+                ):
+                    response_body = _BodyCapture(self.max_body_size)
+            elif message["type"] == "http.response.body" and response_body is not None:
+                response_body.feed(message.get("body", b""))
+            await send(message)
+
         try:
-            request_body = json_loads(body_bytes)
-        except Exception:
-            request_body = str(body_bytes)
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            process_time = perf_counter() - start_time
+            route = scope.get("route")
+            route_name = f"{scope['method']} {route.path if route is not None else scope['path']}"
+            if logger.isEnabledFor(INFO) and self.sampler.should_log(route_name, status_code):
+                self._log(scope, route_name, status_code, process_time, request_body, response_body)
 
-        if isinstance(request_body, dict):
+    def _log(self, scope, route: str, status_code: int, process_time: float, request_body, response_body):
+        method = scope["method"]
+        path = scope["path"]
+        if not self.structured:
+            logger.info("%s %s %s %.3fs", method, path, status_code, process_time)
+            return
+
+        headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]}
+        parsed_request_body = request_body.parse() if request_body is not None else None
+        if isinstance(parsed_request_body, dict):
             for key in SENSITIVE_FIELDS:
-                request_body.pop(key, None)
+                parsed_request_body.pop(key, None)
 
-        headers = dict(request.headers)
         auth_data = {}
-        if "authorization" in headers:
-            auth_header = headers.get("authorization")
-            headers.pop("authorization", None)
+        auth_header = headers.pop("authorization", None)
+        if auth_header is not None:
             try:
                 _, token = auth_header.split(" ")
+                from jwt import decode as jwt_decode  # noqa: PLC0415
+
                 auth_data = jwt_decode(token, options={"verify_signature": False})
             except Exception:  # noqa
                 auth_data = {}
 
-        response = await call_next(request)
-        body = [section async for section in response.body_iterator]  # noqa
-        response_bytes = b"".join(body)
-
-        new_response = StarletteResponse(
-            content=response_bytes,
-            status_code=response.status_code,
-            headers=dict(response.headers),
-            media_type=response.media_type,
-        )
-
-        process_time = time() - start_time
-        try:
-            response_body = json_loads(response_bytes)
-        except Exception:  # noqa
-            response_body = str(response_bytes)
-
-        ip = request.headers.get("x-forwarded-for", request.client.host if request.client else None)
-        timestamp = datetime.now(timezone.utc).timestamp()
+        client = scope.get("client")
+        ip = headers.get("x-forwarded-for", client[0] if client else None)
 
         logger.info(
-            f"{request.method} {request.url.path} {response.status_code} {process_time:.3f}s",
+            "%s %s %s %.3fs",
+            method,
+            path,
+            status_code,
+            process_time,
             extra={
-                "method": request.method,
-                "path": request.url.path,
-                "status_code": response.status_code,
-                "process_time": process_time,
-                "request_body": request_body,
-                "response_body": response_body,
-                "request_headers": headers,
-                "authorization_data": auth_data,
-                "client_ip": ip,
-                "timestamp": timestamp,
+                "access": {
+                    "method": method,
+                    "path": path,
+                    "route": route,
+                    "status_code": status_code,
+                    "process_time": process_time,
+                    "request_body": parsed_request_body,
+                    "response_body": response_body.parse() if response_body is not None else None,
+                    "request_headers": headers,
+                    "authorization_data": auth_data,
+                    "client_ip": ip,
+                    "timestamp": datetime.now(timezone.utc).timestamp(),
+                }
             },
         )
-        return new_response
 
 
 def add_logging_middleware(app):
@@ -0,0 +1,45 @@
+from time import perf_counter
+
+from app.core.metrics import HTTP_REQUEST_DURATION
+
+EXCLUDE_PATHS = [
+    "/metrics",
+]
+
+# Label for requests no route matched, so stray paths cannot blow up the label cardinality.
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording request latency in `HTTP_REQUEST_DURATION`.
+
+    Requests are labelled with the matched route template ("/{short_code}"), never the raw
+    path, so the number of series stays bounded by the number of routes.
+    """
+
+    def __init__(self, app, exclude_paths: list[str] | None = None):
+        self.app = app
+        self.exclude_paths = tuple(EXCLUDE_PATHS if exclude_paths is None else exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exclude_paths):
+            await self.app(scope, receive, send)
+            return
+
+        start_time = perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.labels(
+                scope["method"], route.path if route is not None else UNMATCHED_ROUTE, str(status_code)
+            ).observe(perf_counter() - start_time)
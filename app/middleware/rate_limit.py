@@ -0,0 +1,338 @@
+import asyncio
+from collections import OrderedDict, defaultdict
+from logging import getLogger
+from math import ceil
+from time import monotonic, time
+
+from starlette.routing import compile_path
+
+from app.core.metrics import registry
+from app.core.setting import settings
+
+logger = getLogger(__name__)
+
+RATE_LIMITED = registry.counter("rate_limited_requests", "Requests rejected with 429 per policy", ("policy",))
+
+_TOO_MANY_REQUESTS_BODY = b'{"detail":"Too Many Requests"}'
+
+
+class RateLimitPolicy:
+    """`rate` requests per second sustained, with bursts of up to `burst` requests."""
+
+    __slots__ = ("name", "rate", "burst")
+
+    def __init__(self, name: str, rate: float, burst: float):
+        if rate <= 0 or burst < 1:
+            raise ValueError(f"Rate limit policy {name!r} needs rate > 0 and burst >= 1")
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+
+
+class PolicyMatcher:
+    """
+    Maps a request to the policy of its route template.
+
+    Policies are keyed like the access log routes ("POST /shorten", "GET /{short_code}"),
+    plus an optional "*" fallback. Templates without parameters are exact dict lookups;
+    parametrized ones are tried in configuration order, except on paths the app serves
+    from a route without parameters (e.g. "GET /metrics" is not "GET /{short_code}").
+    """
+
+    def __init__(self, policies: dict[str, dict[str, float]]):
+        self.exact: dict[tuple[str, str], RateLimitPolicy] = {}
+        self.patterns: dict[str, list[tuple]] = defaultdict(list)
+        self.default: RateLimitPolicy | None = None
+        self._static_routes: frozenset[tuple[str, str]] | None = None
+        for name, options in policies.items():
+            policy = RateLimitPolicy(name, float(options["rate"]), float(options.get("burst", options["rate"])))
+            if name == "*":
+                self.default = policy
+                continue
+            method, template = name.split(" ", 1)
+            regex, _, convertors = compile_path(template)
+            if convertors:
+                self.patterns[method.upper()].append((regex, policy))
+            else:
+                self.exact[(method.upper(), template)] = policy
+
+    def __bool__(self) -> bool:
+        return bool(self.exact or self.patterns or self.default)
+
+    def match(self, method: str, path: str, app=None) -> RateLimitPolicy | None:
+        policy = self.exact.get((method, path))
+        if policy is not None:
+            return policy
+        patterns = self.patterns.get(method)
+        if patterns and (method, path) not in self._static_routes_of(app):
+            for regex, policy in patterns:
+                if regex.match(path):
+                    return policy
+        return self.default
+
+    def _static_routes_of(self, app) -> frozenset[tuple[str, str]]:
+        # Routes are fixed once the app serves requests, so they are collected on the first one.
+        if self._static_routes is None:
+            if app is None:
+                return frozenset()
+            self._static_routes = frozenset(
+                (method, route.path)
+                for route in app.router.routes
+                if not getattr(route, "param_convertors", True)
+                for method in getattr(route, "methods", None) or ()
+            )
+        return self._static_routes
+
+
+class RateLimiter:
+    """
+    Token buckets per (policy, client) in a bounded LRU.
+
+    With `redis_url` set, the requests each worker admitted are also added to a shared
+    per-window counter every `sync_interval` seconds with one pipelined round trip, and
+    clients that went over the cluster-wide allowance of a window are rejected locally
+    until the window ends. Between syncs, each worker only enforces its own buckets.
+    """
+
+    key_prefix = "ratelimit:"
+
+    def __init__(
+        self,
+        policies: dict[str, dict[str, float]],
+        max_clients: int = 100_000,
+        redis_url: str | None = None,
+        sync_interval: float = 1.0,
+        window: float = 10.0,
+    ):
+        self.matcher = PolicyMatcher(policies)
+        self.max_clients = max_clients
+        self.redis_url = redis_url or None
+        self.sync_interval = sync_interval
+        self.window = window
+        # (policy name, client) -> [tokens, last refill]
+        self._buckets: OrderedDict[tuple[str, str], list[float]] = OrderedDict()
+        self._pending: dict[tuple[str, str], int] = defaultdict(int)
+        self._blocked: dict[tuple[str, str], float] = {}
+        self._redis = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.matcher)
+
+    def acquire(self, policy: RateLimitPolicy, client: str) -> float:
+        """Take one token; returns 0 when admitted, otherwise the seconds until a retry can succeed."""
+        key = (policy.name, client)
+        now = monotonic()
+        blocked_until = self._blocked.get(key)
+        if blocked_until is not None:
+            if blocked_until > now:
+                return blocked_until - now
+            del self._blocked[key]
+
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [policy.burst, now]
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(policy.burst, bucket[0] + (now - bucket[1]) * policy.rate)
+            bucket[1] = now
+
+        if bucket[0] < 1:
+            return (1 - bucket[0]) / policy.rate
+        bucket[0] -= 1
+        if self.redis_url is not None:
+            self._pending[key] += 1
+        return 0.0
+
+    @property
+    def redis(self):
+        if self._redis is None and self.redis_url:
+            from redis.asyncio import Redis  # noqa: PLC0415
+
+            self._redis = Redis.from_url(self.redis_url)
+        return self._redis
+
+    async def sync(self):
+        """Push the admitted counts to Redis and block clients over the cluster-wide allowance."""
+        if self._blocked:
+            # Clients that never came back would otherwise stay here for good.
+            now = monotonic()
+            self._blocked = {key: until for key, until in self._blocked.items() if until > now}
+        if not self._pending or self.redis is None:
+            return
+        pending, self._pending = self._pending, defaultdict(int)
+        window_index = int(time() // self.window)
+        window_left = self.window - time() % self.window
+        keys = list(pending)
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for name, client in keys:
+                    redis_key = f"{self.key_prefix}{name}:{client}:{window_index}"
+                    pipe.incrby(redis_key, pending[(name, client)])
+                    pipe.expire(redis_key, ceil(self.window) + 1)
+                totals = (await pipe.execute())[::2]
+        except Exception:
+            logger.warning("Rate limit sync to Redis failed", exc_info=True)
+            return
+
+        policies = {policy.name: policy for policy in self._policies()}
+        now = monotonic()
+        for key, total in zip(keys, totals):
+            policy = policies.get(key[0])
+            if policy is not None and total >= policy.burst + policy.rate * self.window:
+                self._blocked[key] = now + window_left
+
+    def _policies(self):
+        yield from self.matcher.exact.values()
+        for patterns in self.matcher.patterns.values():
+            for _, policy in patterns:
+                yield policy
+        if self.matcher.default is not None:
+            yield self.matcher.default
+
+    async def start(self):
+        if self.enabled and self.redis_url is not None and self._task is None:
+            self._task = asyncio.create_task(self._run(), name="rate-limit-sync")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            await self.sync()
+
+
+class ClientIdentifier:
+    """
+    Identifies the client a request is rate limited as.
+
+    That is the JWT `sub` when a bearer token verifies against `jwt_secret`, otherwise the
+    client IP. `X-Forwarded-For` is only honoured behind `trusted_proxies` proxies, using
+    the address the outermost trusted proxy saw, so clients cannot pick their own key.
+    Verified tokens are remembered in a small LRU so each is only checked once.
+    """
+
+    def __init__(
+        self,
+        jwt_secret: str | None = None,
+        jwt_algorithms: list[str] | None = None,
+        trusted_proxies: int = 0,
+        token_cache_size: int = 10_000,
+    ):
+        self.jwt_secret = jwt_secret or None
+        self.jwt_algorithms = jwt_algorithms or ["HS256"]
+        self.trusted_proxies = trusted_proxies
+        self.token_cache_size = token_cache_size
+        # token -> (subject or None, expiry as a unix timestamp)
+        self._tokens: OrderedDict[bytes, tuple[str | None, float]] = OrderedDict()
+
+    def __call__(self, scope) -> str:
+        if self.jwt_secret is None and not self.trusted_proxies:
+            client = scope.get("client")
+            return client[0] if client else ""
+
+        authorization = forwarded_for = None
+        for key, value in scope["headers"]:
+            if key == b"authorization":
+                authorization = value
+            elif key == b"x-forwarded-for":
+                forwarded_for = value
+        if authorization is not None and self.jwt_secret is not None:
+            subject = self._subject(authorization)
+            if subject is not None:
+                return "sub:" + subject
+        if forwarded_for is not None and self.trusted_proxies:
+            hops = forwarded_for.decode("latin-1").split(",")
+            if len(hops) >= self.trusted_proxies:
+                return hops[-self.trusted_proxies].strip()
+        client = scope.get("client")
+        return client[0] if client else ""
+
+    def _subject(self, authorization: bytes) -> str | None:
+        scheme, _, token = authorization.partition(b" ")
+        if scheme.lower() != b"bearer" or not token:
+            return None
+        cached = self._tokens.get(token)
+        if cached is not None and cached[1] > time():
+            return cached[0]
+
+        from jwt import decode as jwt_decode  # noqa: PLC0415
+
+        try:
+            claims = jwt_decode(token, self.jwt_secret, algorithms=self.jwt_algorithms)
+        except Exception:  # noqa
+            claims = {}
+        subject = claims.get("sub")
+        subject = str(subject) if subject is not None else None
+        self._tokens[token] = (subject, float(claims.get("exp", time() + 300)))
+        if len(self._tokens) > self.token_cache_size:
+            self._tokens.popitem(last=False)
+        return subject
+
+
+class RateLimitMiddleware:
+    """
+    Pure ASGI middleware answering 429 with Retry-After once a client's bucket for the
+    request's route policy is empty. Requests no policy applies to pass straight through.
+    """
+
+    def __init__(self, app, limiter: "RateLimiter | None" = None, identify: ClientIdentifier | None = None):
+        self.app = app
+        self.limiter = rate_limiter if limiter is None else limiter
+        self.identify = client_identifier if identify is None else identify
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.limiter.enabled:
+            await self.app(scope, receive, send)
+            return
+        policy = self.limiter.matcher.match(scope["method"], scope["path"], scope.get("app"))
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        retry_after = self.limiter.acquire(policy, self.identify(scope))
+        if not retry_after:
+            await self.app(scope, receive, send)
+            return
+
+        RATE_LIMITED.labels(policy.name).inc()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(_TOO_MANY_REQUESTS_BODY)).encode()),
+                    (b"retry-after", str(ceil(retry_after)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": _TOO_MANY_REQUESTS_BODY})
+
+
+rate_limiter = RateLimiter(
+    policies=settings.RATE_LIMIT_POLICIES,
+    max_clients=settings.RATE_LIMIT_MAX_CLIENTS,
+    redis_url=settings.REDIS_URL if settings.RATE_LIMIT_REDIS_SYNC else None,
+    sync_interval=settings.RATE_LIMIT_SYNC_INTERVAL,
+    window=settings.RATE_LIMIT_WINDOW,
+)
+
+client_identifier = ClientIdentifier(
+    jwt_secret=settings.RATE_LIMIT_JWT_SECRET,
+    jwt_algorithms=settings.RATE_LIMIT_JWT_ALGORITHMS,
+    trusted_proxies=settings.RATE_LIMIT_TRUSTED_PROXIES,
+)
@@ -0,0 +1,44 @@
+from typing import AsyncIterator, Sequence
+
+from sqlalchemy import Table, select, text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.metrics import timed_repository
+
+
+@timed_repository("bulk")
+class BulkTransferRepository:
+    """Whole-table reads and writes for exports and imports, bypassing the ORM entities."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def iter_rows(
+        self, table: Table, columns: Sequence[str], batch_size: int = 10_000
+    ) -> AsyncIterator[list[tuple]]:
+        """Stream `columns` of every row over a server-side cursor, `batch_size` rows at a time, in any order."""
+        query = select(*(table.c[name] for name in columns)).execution_options(yield_per=batch_size)
+        result = await self.session.stream(query)
+        async for rows in result.partitions():
+            yield [tuple(row) for row in rows]
+
+    async def copy_rows(self, table: Table, columns: Sequence[str], rows: Sequence[tuple]) -> int:
+        """COPY `rows` into `table` and commit; a duplicate key fails the whole batch."""
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(table.name, records=rows, columns=list(columns))
+        await self.session.commit()
+        return len(rows)
+
+    async def sync_id_sequence(self, table: Table) -> int:
+        """Move the id sequence of `table` past the highest imported id; returns the new value."""
+        result = await self.session.exec(  # type: ignore
+            text(
+                "SELECT setval(pg_get_serial_sequence(:table, 'id'), coalesce(max(id), 0) + 1, false) "
+                f"FROM {table.name}"
+            ),
+            params={"table": table.name},
+        )
+        value = result.scalar_one()
+        await self.session.commit()
+        return value
@@ -0,0 +1,73 @@
+from datetime import datetime
+from typing import Sequence
+
+from sqlmodel import col, delete, insert, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.metrics import timed_repository
+from app.db.models.outbox import SHORT_URL_CREATED, SHORT_URL_VIEWED, OutboxEvent
+from app.db.models.short_url import ShortURL
+
+
+@timed_repository("outbox")
+class OutboxRepository:
+    """
+    Outbox rows are only added here, never committed: the caller's repository commits them
+    together with the change they describe.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def add(self, events: Sequence[tuple[str, dict, datetime]]):
+        """Stage (event_type, payload, created_at) events in the current transaction."""
+        if not events:
+            return
+        query = insert(OutboxEvent).values(
+            [
+                {"event_type": event_type, "payload": payload, "created_at": created_at}
+                for event_type, payload, created_at in events
+            ]
+        )
+        await self.session.exec(query)  # type: ignore
+
+    async def add_created(self, short_urls: Sequence[ShortURL]):
+        await self.add(
+            [
+                (
+                    SHORT_URL_CREATED,
+                    {
+                        "id": short_url.id,
+                        "short_code": short_url.short_code,
+                        "original_url": short_url.original_url,
+                        "created_at": short_url.created_at.isoformat(),
+                    },
+                    short_url.created_at,
+                )
+                for short_url in short_urls
+            ]
+        )
+
+    async def add_viewed(self, views: Sequence[tuple[int, datetime]]):
+        await self.add(
+            [
+                (SHORT_URL_VIEWED, {"shorturl_id": shorturl_id, "viewed_at": viewed_at.isoformat()}, viewed_at)
+                for shorturl_id, viewed_at in views
+            ]
+        )
+
+    async def claim_batch(self, limit: int) -> list[OutboxEvent]:
+        """
+        Lock the oldest `limit` unclaimed events until the transaction ends.
+
+        SKIP LOCKED lets several relays share the table; events are then only ordered
+        within a batch.
+        """
+        query = select(OutboxEvent).order_by(col(OutboxEvent.id)).limit(limit).with_for_update(skip_locked=True)
+        result = await self.session.exec(query)  # type: ignore
+        return list(result.all())
+
+    async def delete(self, ids: Sequence[int]):
+        if ids:
+            await self.session.exec(delete(OutboxEvent).where(col(OutboxEvent.id).in_(ids)))  # type: ignore
+        await self.session.commit()
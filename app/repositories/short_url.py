@@ -1,30 +1,255 @@
-from typing import Optional
+from datetime import datetime, timezone
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Optional, Sequence
 
-from sqlmodel import select
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import col, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.core.metrics import timed_repository
+from app.core.setting import settings
 from app.db.models.short_url import ShortURL
+from app.db.models.view_counter import ShortURLViewCounter
+from app.repositories.outbox import OutboxRepository
+from app.utils.url import url_digest
 
+SHORT_CODE_SEQUENCE = "shorturl_code_seq"
 
+# Fills missing digests for one keyset page of ids. Only the first row per digest gets it,
+# and never when another row already holds that digest, so the unique index stays valid.
+BACKFILL_ORIGINAL_URL_HASHES = text(
+    """
+    WITH page AS (
+        SELECT id, original_url_hash IS NULL AS missing, sha256(convert_to(original_url, 'UTF8')) AS digest
+        FROM shorturl
+        WHERE id > :after_id
+        ORDER BY id
+        LIMIT :batch_size
+    ), candidates AS (
+        SELECT DISTINCT ON (digest) id, digest FROM page WHERE missing ORDER BY digest, id
+    ), updated AS (
+        UPDATE shorturl SET original_url_hash = candidates.digest
+        FROM candidates
+        WHERE shorturl.id = candidates.id
+        AND NOT EXISTS (SELECT 1 FROM shorturl AS other WHERE other.original_url_hash = candidates.digest)
+        RETURNING shorturl.id
+    )
+    SELECT (SELECT max(id) FROM page), (SELECT count(*) FROM updated)
+    """
+)
+
+
+# Expired links of one sweep batch, oldest first, found through the partial expiry index.
+# SKIP LOCKED lets a batch pass over links a concurrent sweep is already deleting.
+SELECT_EXPIRED = text(
+    """
+    SELECT id FROM shorturl
+    WHERE expires_at <= :before
+    ORDER BY expires_at
+    LIMIT :batch_size
+    FOR UPDATE SKIP LOCKED
+    """
+)
+
+
+@timed_repository("short_url")
 class ShortURLRepository:
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, publish_events: bool = settings.OUTBOX_ENABLED):
         self.session = session
+        # Created links are written to the outbox in the same transaction when events are published.
+        self.outbox = OutboxRepository(session) if publish_events else None
 
     async def get_by_original_url(self, original_url: str) -> Optional[ShortURL]:
-        query = select(ShortURL).where(ShortURL.original_url == original_url)
+        # The digest hits the unique index; the string compare guards against digest collisions.
+        query = select(ShortURL).where(
+            ShortURL.original_url_hash == url_digest(original_url),
+            ShortURL.original_url == original_url,
+        )
         result = await self.session.exec(query)  # type: ignore
         return result.first()
 
+    async def get_by_original_urls(self, original_urls: Sequence[str]) -> dict[str, ShortURL]:
+        """Existing links keyed by original URL, looked up with a single IN query on the digest index."""
+        original_urls = set(original_urls)
+        digests = [url_digest(url) for url in original_urls]
+        query = select(ShortURL).where(col(ShortURL.original_url_hash).in_(digests))
+        result = await self.session.exec(query)  # type: ignore
+        return {
+            short_url.original_url: short_url for short_url in result.all() if short_url.original_url in original_urls
+        }
+
     async def get_by_code(self, short_code: str) -> Optional[ShortURL]:
         query = select(ShortURL).where(ShortURL.short_code == short_code)
         result = await self.session.exec(query)  # type: ignore
         return result.first()
 
-    async def create(self, original_url: str, short_code: str) -> ShortURL:
-        short_url = ShortURL(original_url=original_url, short_code=short_code)
+    async def get_most_viewed(self, limit: int) -> list[ShortURL]:
+        """The `limit` links with the highest rolled-up view counts, most viewed first."""
+        query = (
+            select(ShortURL)
+            .join(ShortURLViewCounter, col(ShortURLViewCounter.shorturl_id) == ShortURL.id)
+            .order_by(col(ShortURLViewCounter.view_count).desc())
+            .limit(limit)
+        )
+        result = await self.session.exec(query)  # type: ignore
+        return list(result.all())
 
-        self.session.add(short_url)
-        await self.session.commit()
-        await self.session.refresh(short_url)
+    async def iter_codes(self, from_id: int = 1, batch_size: int = 10_000) -> AsyncIterator[list[tuple[int, str]]]:
+        """Stream (id, short_code) pairs from `from_id` on in id order, `batch_size` rows at a time."""
+        query = (
+            select(ShortURL.id, ShortURL.short_code)
+            .where(ShortURL.id >= from_id)
+            .order_by(ShortURL.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self.session.stream(query)
+        async for rows in result.partitions():
+            yield [(short_url_id, short_code) for short_url_id, short_code in rows]
+
+    async def get_existing_codes(self, short_codes: Iterable[str]) -> set[str]:
+        query = select(ShortURL.short_code).where(col(ShortURL.short_code).in_(list(short_codes)))
+        result = await self.session.exec(query)  # type: ignore
+        return set(result.all())
+
+    async def estimate_count(self) -> int:
+        """Planner estimate of the table size; cheap, but only as fresh as the last ANALYZE."""
+        result = await self.session.exec(  # type: ignore
+            text("SELECT greatest(reltuples, 0)::bigint FROM pg_class WHERE oid = 'shorturl'::regclass")
+        )
+        return result.scalar() or 0
+
+    async def get_code_block_size(self) -> int:
+        result = await self.session.exec(  # type: ignore
+            text("SELECT increment_by FROM pg_sequences WHERE sequencename = :name"),
+            params={"name": SHORT_CODE_SEQUENCE},
+        )
+        return result.scalar_one()
+
+    async def lease_code_block(self) -> int:
+        """Reserve the next block of ids; the block spans `get_code_block_size()` values."""
+        result = await self.session.exec(text(f"SELECT nextval('{SHORT_CODE_SEQUENCE}')"))  # type: ignore
+        return result.scalar_one()
 
+    async def create(
+        self,
+        original_url: str,
+        short_code: str,
+        expires_at: datetime | None = None,
+        max_clicks: int | None = None,
+    ) -> Optional[ShortURL]:
+        """
+        Insert a link with INSERT ... ON CONFLICT DO NOTHING.
+
+        Returns None when the URL digest or the short code is already taken; the caller tells
+        the two apart with `get_by_original_url`. Links with a lifetime get no digest, so they
+        never conflict on the URL and are never found by it.
+        """
+        has_lifetime = expires_at is not None or max_clicks is not None
+        query = (
+            insert(ShortURL)
+            .values(
+                original_url=original_url,
+                original_url_hash=None if has_lifetime else url_digest(original_url),
+                short_code=short_code,
+                created_at=datetime.now(timezone.utc),
+                expires_at=expires_at,
+                max_clicks=max_clicks,
+            )
+            .on_conflict_do_nothing()
+            .returning(ShortURL)
+        )
+        result = await self.session.exec(query)  # type: ignore
+        short_url = result.scalars().first()
+        if short_url is not None and self.outbox is not None:
+            await self.outbox.add_created([short_url])
+        await self.session.commit()
         return short_url
+
+    async def bulk_create(self, rows: Sequence[tuple[str, str]]) -> list[ShortURL]:
+        """
+        Insert (original_url, short_code) pairs with one multi-row statement.
+
+        Rows whose URL digest or short code is already taken are skipped and simply missing
+        from the result.
+        """
+        if not rows:
+            return []
+        created_at = datetime.now(timezone.utc)
+        query = (
+            insert(ShortURL)
+            .values(
+                [
+                    {
+                        "original_url": original_url,
+                        "original_url_hash": url_digest(original_url),
+                        "short_code": short_code,
+                        "created_at": created_at,
+                    }
+                    for original_url, short_code in rows
+                ]
+            )
+            .on_conflict_do_nothing()
+            .returning(ShortURL)
+        )
+        result = await self.session.exec(query)  # type: ignore
+        created = list(result.scalars().all())
+        if self.outbox is not None:
+            await self.outbox.add_created(created)
+        await self.session.commit()
+        return created
+
+    async def delete_expired(
+        self,
+        before: datetime,
+        batch_size: int,
+        archive: Callable[[list[dict]], Awaitable[None]] | None = None,
+    ) -> list[dict]:
+        """
+        Delete up to `batch_size` links that expired before `before` with their counters,
+        buckets and pending views, and commit; returns the deleted links with their final
+        `view_count`.
+
+        Processed views stay in their partition until it is archived. `archive` gets the
+        deleted links before the commit, so a link is only gone once it has been archived.
+        """
+        result = await self.session.exec(  # type: ignore
+            SELECT_EXPIRED, params={"before": before, "batch_size": batch_size}
+        )
+        ids = list(result.scalars().all())
+        if not ids:
+            await self.session.commit()
+            return []
+
+        params = {"ids": ids}
+        await self.session.exec(  # type: ignore
+            text("DELETE FROM shorturlviewbucket WHERE shorturl_id = ANY(:ids)"), params=params
+        )
+        result = await self.session.exec(  # type: ignore
+            text("DELETE FROM shorturlviewcounter WHERE shorturl_id = ANY(:ids) RETURNING shorturl_id, view_count"),
+            params=params,
+        )
+        view_counts = dict(result.all())
+        await self.session.exec(  # type: ignore
+            text("DELETE FROM urlviewlog WHERE processed = false AND shorturl_id = ANY(:ids)"), params=params
+        )
+        result = await self.session.exec(  # type: ignore
+            text(
+                "DELETE FROM shorturl WHERE id = ANY(:ids) "
+                "RETURNING id, original_url, short_code, created_at, expires_at, max_clicks"
+            ),
+            params=params,
+        )
+        deleted = [dict(row._mapping, view_count=view_counts.get(row.id, 0)) for row in result.all()]
+        if archive is not None:
+            await archive(deleted)
+        await self.session.commit()
+        return deleted
+
+    async def backfill_original_url_hashes(self, after_id: int, batch_size: int) -> tuple[int | None, int]:
+        """Fill missing digests for the next `batch_size` ids; returns (last id seen, rows updated)."""
+        result = await self.session.exec(  # type: ignore
+            BACKFILL_ORIGINAL_URL_HASHES, params={"after_id": after_id, "batch_size": batch_size}
+        )
+        last_id, updated = result.one()
+        await self.session.commit()
+        return last_id, updated
@@ -1,12 +1,90 @@
+from datetime import datetime
+from typing import Awaitable, Callable, Sequence
+
+from sqlalchemy import false, text
 from sqlmodel import func, insert, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.core.metrics import timed_repository
+from app.core.setting import settings
+from app.db.models.view_bucket import ShortURLViewBucket
+from app.db.models.view_counter import ShortURLViewCounter
 from app.db.models.view_log import URLViewLog
+from app.repositories.outbox import OutboxRepository
+
+# Marks a batch of unprocessed views as processed and adds them to the per-link counters
+# and to the minute/hour/day buckets in one statement, so a view is always counted either
+# in the rollups or as pending. Views of links deleted by the expiry sweep are marked but
+# not counted, and links whose count reaches `max_clicks` expire. Rows are upserted in key
+# order so that a fold running next to another one (e.g. the backfill command) cannot deadlock.
+FOLD_UNPROCESSED_VIEWS = text(
+    """
+    WITH batch AS (
+        SELECT id, viewed_at FROM urlviewlog
+        WHERE processed = false
+        ORDER BY id
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    ), marked AS (
+        UPDATE urlviewlog SET processed = true
+        FROM batch
+        WHERE urlviewlog.id = batch.id AND urlviewlog.viewed_at = batch.viewed_at
+        RETURNING urlviewlog.shorturl_id, urlviewlog.viewed_at
+    ), live AS (
+        SELECT marked.shorturl_id, marked.viewed_at FROM marked JOIN shorturl ON shorturl.id = marked.shorturl_id
+    ), counted AS (
+        INSERT INTO shorturlviewcounter (shorturl_id, view_count, updated_at)
+        SELECT shorturl_id, count(*), now() FROM live GROUP BY shorturl_id ORDER BY shorturl_id
+        ON CONFLICT (shorturl_id) DO UPDATE
+        SET view_count = shorturlviewcounter.view_count + EXCLUDED.view_count,
+            updated_at = EXCLUDED.updated_at
+        RETURNING shorturl_id, view_count
+    ), bucketed AS (
+        INSERT INTO shorturlviewbucket (shorturl_id, granularity, bucket_start, view_count)
+        SELECT live.shorturl_id, g.granularity, date_trunc(g.granularity, live.viewed_at, 'UTC'), count(*)
+        FROM live CROSS JOIN (VALUES ('minute'), ('hour'), ('day')) AS g (granularity)
+        GROUP BY 1, 2, 3
+        ORDER BY 1, 2, 3
+        ON CONFLICT (shorturl_id, granularity, bucket_start) DO UPDATE
+        SET view_count = shorturlviewbucket.view_count + EXCLUDED.view_count
+    ), exhausted AS (
+        UPDATE shorturl SET expires_at = now()
+        FROM counted
+        WHERE shorturl.id = counted.shorturl_id
+        AND counted.view_count >= shorturl.max_clicks
+        AND (shorturl.expires_at IS NULL OR shorturl.expires_at > now())
+    )
+    SELECT count(*) FROM marked
+    """
+)
+
+
+# Serializes partition maintenance between app processes; taken per transaction.
+PARTITION_MAINTENANCE_LOCK = text("SELECT pg_try_advisory_xact_lock(hashtext('urlviewlog_partition_maintenance'))")
 
+DEFAULT_PARTITION = "urlviewlog_default"
 
+DEFAULT_PARTITION_HAS_RANGE = text(
+    f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE viewed_at >= :start AND viewed_at < :end)"
+)
+
+LIST_PARTITIONS = text(
+    """
+    SELECT child.relname
+    FROM pg_inherits
+    JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid
+    WHERE pg_inherits.inhparent = 'urlviewlog'::regclass
+    ORDER BY child.relname
+    """
+)
+
+
+@timed_repository("view_log")
 class ViewLogRepository:
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, publish_events: bool = settings.OUTBOX_ENABLED):
         self.session = session
+        # Views are written to the outbox in the same transaction when events are published.
+        self.outbox = OutboxRepository(session) if publish_events else None
 
     async def create_view_log(self, shorturl_id: int) -> URLViewLog:
         view_log = URLViewLog(shorturl_id=shorturl_id)
@@ -17,10 +95,155 @@ class ViewLogRepository:
         )
 
         result = await self.session.exec(query)  # type: ignore
+        created = result.first()
+        if self.outbox is not None:
+            await self.outbox.add_viewed([(shorturl_id, view_log.viewed_at)])
         await self.session.commit()
-        return result.first()
+        return created
+
+    async def bulk_create_view_logs(self, views: Sequence[tuple[int, datetime]]) -> int:
+        """Insert many (shorturl_id, viewed_at) pairs with a single multi-row statement."""
+        if not views:
+            return 0
+        query = insert(URLViewLog).values(
+            [
+                {"shorturl_id": shorturl_id, "viewed_at": viewed_at, "processed": False}
+                for shorturl_id, viewed_at in views
+            ]
+        )
+        await self.session.exec(query)  # type: ignore
+        if self.outbox is not None:
+            await self.outbox.add_viewed(views)
+        await self.session.commit()
+        return len(views)
+
+    async def fold_unprocessed_views(self, batch_size: int) -> int:
+        """Fold up to `batch_size` unprocessed views into the counters; returns how many were folded."""
+        result = await self.session.exec(FOLD_UNPROCESSED_VIEWS, params={"batch_size": batch_size})  # type: ignore
+        folded = result.scalar_one()
+        await self.session.commit()
+        return folded
 
     async def get_view_count(self, shorturl_id: int) -> int:
-        query = select(func.count(URLViewLog.id)).where(URLViewLog.shorturl_id == shorturl_id)
+        """Stored counter plus the views that have not been folded into it yet."""
+        stored = select(ShortURLViewCounter.view_count).where(ShortURLViewCounter.shorturl_id == shorturl_id)
+        pending = select(func.count(URLViewLog.id)).where(
+            URLViewLog.shorturl_id == shorturl_id,
+            URLViewLog.processed == false(),
+        )
+        query = select(func.coalesce(stored.scalar_subquery(), 0) + pending.scalar_subquery())
         result = await self.session.exec(query)  # type: ignore
         return result.first() or 0
+
+    async def get_view_buckets(
+        self, shorturl_id: int, granularity: str, start: datetime, end: datetime
+    ) -> list[tuple[datetime, int]]:
+        """Rolled-up (bucket_start, view_count) pairs in [start, end); empty buckets are not stored."""
+        query = (
+            select(ShortURLViewBucket.bucket_start, ShortURLViewBucket.view_count)
+            .where(
+                ShortURLViewBucket.shorturl_id == shorturl_id,
+                ShortURLViewBucket.granularity == granularity,
+                ShortURLViewBucket.bucket_start >= start,
+                ShortURLViewBucket.bucket_start < end,
+            )
+            .order_by(ShortURLViewBucket.bucket_start)
+        )
+        result = await self.session.exec(query)  # type: ignore
+        return list(result.all())
+
+    async def list_partitions(self) -> list[str]:
+        result = await self.session.exec(LIST_PARTITIONS)  # type: ignore
+        return list(result.scalars().all())
+
+    async def create_partitions(self, partitions: Sequence[tuple[str, datetime, datetime]]) -> dict[str, int]:
+        """
+        Create the missing (name, start, end) partitions in one transaction; returns the names
+        created with the number of views each took over from the default partition.
+
+        Returns nothing without doing anything when another process is maintaining the
+        partitions. A short lock timeout keeps the DDL from queueing inserts behind it.
+        """
+        if not await self._lock_partition_maintenance():
+            return {}
+        existing = set(await self.list_partitions())
+        await self.session.exec(text("SET LOCAL lock_timeout = '5s'"))  # type: ignore
+        created = {}
+        for name, start, end in partitions:
+            if name in existing:
+                continue
+            bounds = f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            params = {"start": start, "end": end}
+            result = await self.session.exec(DEFAULT_PARTITION_HAS_RANGE, params=params)  # type: ignore
+            if result.scalar():
+                created[name] = await self._create_partition_from_default(name, start, end, bounds)
+            else:
+                await self.session.exec(text(f"CREATE TABLE {name} PARTITION OF urlviewlog {bounds}"))  # type: ignore
+                created[name] = 0
+        await self.session.commit()
+        return created
+
+    async def _create_partition_from_default(self, name: str, start: datetime, end: datetime, bounds: str) -> int:
+        # Postgres refuses a partition whose range has rows in the default partition, which is
+        # where views land once maintenance falls behind; they are moved into it before it is attached.
+        await self.session.exec(text(f"CREATE TABLE {name} (LIKE urlviewlog INCLUDING DEFAULTS)"))  # type: ignore
+        result = await self.session.exec(  # type: ignore
+            text(
+                f"""
+                WITH moved AS (
+                    DELETE FROM {DEFAULT_PARTITION}
+                    WHERE viewed_at >= :start AND viewed_at < :end
+                    RETURNING id, shorturl_id, viewed_at, processed
+                ),
+                inserted AS (
+                    INSERT INTO {name} (id, shorturl_id, viewed_at, processed)
+                    SELECT id, shorturl_id, viewed_at, processed FROM moved
+                    RETURNING 1
+                )
+                SELECT count(*) FROM inserted
+                """
+            ),
+            params={"start": start, "end": end},
+        )
+        moved = result.scalar()
+        await self.session.exec(text(f"ALTER TABLE urlviewlog ATTACH PARTITION {name} {bounds}"))  # type: ignore
+        return moved
+
+    async def export_partition(self, name: str, write: Callable[[bytes], Awaitable[None]]) -> bool:
+        """
+        Stream partition `name` as CSV with a header row to `write`.
+
+        Skipped (returns False) while another process is maintaining the partitions or while
+        the partition still holds views that have not been rolled up into the counters.
+        """
+        if not await self._lock_partition_maintenance() or await self._has_pending_views(name):
+            return False
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_from_table(name, output=write, format="csv", header=True)
+        await self.session.commit()
+        return True
+
+    async def drop_partition(self, name: str) -> bool:
+        """Detach and drop partition `name`; skipped under the same conditions as `export_partition`."""
+        if not await self._lock_partition_maintenance() or await self._has_pending_views(name):
+            return False
+        await self.session.exec(text("SET LOCAL lock_timeout = '5s'"))  # type: ignore
+        await self.session.exec(text(f"ALTER TABLE urlviewlog DETACH PARTITION {name}"))  # type: ignore
+        await self.session.exec(text(f"DROP TABLE {name}"))  # type: ignore
+        await self.session.commit()
+        return True
+
+    async def _has_pending_views(self, name: str) -> bool:
+        result = await self.session.exec(text(f"SELECT EXISTS (SELECT 1 FROM {name} WHERE processed = false)"))  # type: ignore
+        if result.scalar():
+            await self.session.rollback()
+            return True
+        return False
+
+    async def _lock_partition_maintenance(self) -> bool:
+        result = await self.session.exec(PARTITION_MAINTENANCE_LOCK)  # type: ignore
+        if result.scalar():
+            return True
+        await self.session.rollback()
+        return False
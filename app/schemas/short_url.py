@@ -1,10 +1,27 @@
-from datetime import datetime
+from datetime import datetime, timezone
 
-from pydantic import BaseModel, HttpUrl, field_validator
+from pydantic import BaseModel, Field, HttpUrl, field_validator
 
 
 class ShortURLCreateRequest(BaseModel):
     original_url: HttpUrl
+    expires_at: datetime | None = None
+    max_clicks: int | None = Field(default=None, ge=1)
+
+    @field_validator("expires_at")
+    def validate_expires_at(cls, v):
+        """Naive times are UTC; a link has to live for at least a moment."""
+        if v is None:
+            return v
+        if v.tzinfo is None:
+            v = v.replace(tzinfo=timezone.utc)
+        if v <= datetime.now(timezone.utc):
+            raise ValueError("expires_at must be in the future")
+        return v
+
+    @property
+    def has_lifetime(self) -> bool:
+        return self.expires_at is not None or self.max_clicks is not None
 
 
 class ShortURLResponse(BaseModel):
@@ -12,6 +29,8 @@ class ShortURLResponse(BaseModel):
     original_url: str  # Changed from HttpUrl to str to match model
     short_code: str
     created_at: datetime
+    expires_at: datetime | None = None
+    max_clicks: int | None = None
 
     model_config = {"from_attributes": True}
 
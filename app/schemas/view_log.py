@@ -1,6 +1,7 @@
 from datetime import datetime
+from enum import Enum
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class ViewLogResponse(BaseModel):
@@ -19,3 +20,22 @@ class ShortURLStatsResponse(BaseModel):
     created_at: datetime
 
     model_config = {"from_attributes": True}
+
+
+class ViewGranularity(str, Enum):
+    minute = "minute"
+    hour = "hour"
+    day = "day"
+
+
+class ViewTimeseriesPoint(BaseModel):
+    bucket_start: datetime
+    view_count: int
+
+
+class ShortURLViewTimeseriesResponse(BaseModel):
+    short_code: str
+    granularity: ViewGranularity
+    start: datetime = Field(serialization_alias="from")
+    end: datetime = Field(serialization_alias="to")
+    points: list[ViewTimeseriesPoint]
@@ -0,0 +1,104 @@
+"""
+Production server: N uvicorn worker processes sharing one listening socket.
+
+Usage:
+    python -m app.server [--workers 8] [--connection-budget 200] [--host 0.0.0.0] [--port 8000]
+
+With a connection budget, each worker's pool sizes are derived from it so that all workers
+together never open more than that many connections per database server. Each worker
+warms its redirect cache before it accepts traffic. On SIGTERM a worker first fails its
+health check for SERVER_DRAIN_DELAY seconds while still serving, then stops accepting
+connections, finishes in-flight requests and runs the lifespan shutdown.
+"""
+
+import argparse
+import os
+import signal
+from logging import getLogger
+from time import monotonic
+
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+
+from app.core.readiness import readiness
+from app.core.setting import settings
+
+logger = getLogger(__name__)
+
+
+def worker_pool_sizes(budget: int, workers: int) -> dict[str, int]:
+    """
+    Split a per-server connection budget into the per-worker pool settings.
+
+    A quarter of each worker's share goes to the raw redirect pool, the rest to the
+    SQLAlchemy engine, half of it kept open and half as overflow.
+    """
+    per_worker = budget // workers
+    if per_worker < 2:
+        raise ValueError(f"A budget of {budget} connections cannot serve {workers} workers")
+    raw = max(1, per_worker // 4)
+    engine_total = per_worker - raw
+    pool_size = max(1, engine_total // 2)
+    return {
+        "DB_POOL_SIZE": pool_size,
+        "DB_MAX_OVERFLOW": engine_total - pool_size,
+        "DB_RAW_POOL_MAX_SIZE": raw,
+        "DB_RAW_POOL_MIN_SIZE": min(settings.DB_RAW_POOL_MIN_SIZE, raw),
+    }
+
+
+class DrainingServer(uvicorn.Server):
+    """uvicorn server that keeps serving for `drain_delay` seconds after SIGTERM while reporting not ready."""
+
+    def __init__(self, config: uvicorn.Config, drain_delay: float = 0.0):
+        super().__init__(config)
+        self.drain_delay = drain_delay
+        self._drain_deadline: float | None = None
+
+    def handle_exit(self, sig, frame):
+        if sig == signal.SIGTERM and self.drain_delay > 0 and self._drain_deadline is None:
+            readiness.draining = True
+            self._drain_deadline = monotonic() + self.drain_delay
+            logger.info("Received SIGTERM, draining for %.1fs before shutting down", self.drain_delay)
+            return
+        super().handle_exit(sig, frame)
+
+    async def on_tick(self, counter: int) -> bool:
+        if self._drain_deadline is not None and not self.should_exit and monotonic() >= self._drain_deadline:
+            super().handle_exit(signal.SIGTERM, None)
+        return await super().on_tick(counter)
+
+
+def serve(host: str, port: int, workers: int, connection_budget: int):
+    if connection_budget:
+        # Workers are spawned processes that read their settings from the environment.
+        for name, value in worker_pool_sizes(connection_budget, workers).items():
+            os.environ[name] = str(value)
+
+    config = uvicorn.Config(
+        "app.main:create_app",
+        factory=True,
+        host=host,
+        port=port,
+        workers=workers,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_TIMEOUT,
+    )
+    server = DrainingServer(config, drain_delay=settings.SERVER_DRAIN_DELAY)
+    if config.workers > 1:
+        Multiprocess(config, target=server.run, sockets=[config.bind_socket()]).run()
+    else:
+        server.run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=settings.SERVER_WORKERS)
+    parser.add_argument("--connection-budget", type=int, default=settings.DB_CONNECTION_BUDGET)
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers, args.connection_budget)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+from logging import getLogger
+from time import perf_counter
+from typing import Callable
+
+from app.cache.short_url import ShortURLCache
+from app.repositories.short_url import ShortURLRepository
+
+logger = getLogger(__name__)
+
+
+async def warm_short_url_cache(cache: ShortURLCache, session_factory: Callable, size: int) -> int:
+    """
+    Load the `size` most viewed links into the local cache tier; returns how many were loaded.
+
+    Runs before the worker accepts traffic, so the hottest redirects never start cold. A
+    failing database only leaves the cache cold, it never fails startup.
+    """
+    if size <= 0:
+        return 0
+    started = perf_counter()
+    try:
+        async with session_factory() as session:
+            short_urls = await ShortURLRepository(session).get_most_viewed(size)
+    except Exception:
+        logger.warning("Short URL cache warmup failed, starting cold", exc_info=True)
+        return 0
+    loaded = cache.warm(short_urls)
+    logger.info("Warmed short URL cache with %d links in %.3fs", loaded, perf_counter() - started)
+    return loaded
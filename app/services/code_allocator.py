@@ -0,0 +1,217 @@
+import asyncio
+from abc import ABC, abstractmethod
+from logging import getLogger
+from time import monotonic
+from typing import Callable
+
+from app.core.setting import settings
+from app.db.session import async_session_factory
+from app.repositories.short_url import ShortURLRepository
+from app.utils.shortener import code_length_for_population, encode_short_code, generate_short_code
+
+logger = getLogger(__name__)
+
+
+class CodeAllocator(ABC):
+    """
+    Hands out short codes for new links without checking the table first.
+
+    The unique index on `shorturl.short_code` stays the source of truth: callers insert
+    with the allocated code and ask for another one if the insert hits a collision.
+    """
+
+    @abstractmethod
+    async def allocate(self, repo: ShortURLRepository) -> str: ...
+
+    async def allocate_many(self, repo: ShortURLRepository, count: int) -> list[str]:
+        return [await self.allocate(repo) for _ in range(count)]
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+
+class RandomCodeAllocator(CodeAllocator):
+    """
+    Random base62 codes whose length grows with the table so collisions stay rare.
+
+    The table size comes from the planner estimate and is refreshed at most every
+    `population_refresh_interval` seconds.
+    """
+
+    def __init__(self, min_length: int = 6, max_load: float = 0.01, population_refresh_interval: float = 300):
+        self.min_length = min_length
+        self.max_load = max_load
+        self.population_refresh_interval = population_refresh_interval
+        self.length = min_length
+        self._population_checked_at: float | None = None
+
+    def set_population(self, population: int):
+        self.length = code_length_for_population(population, self.min_length, self.max_load)
+        self._population_checked_at = monotonic()
+
+    async def _refresh_length(self, repo: ShortURLRepository):
+        checked_at = self._population_checked_at
+        if checked_at is not None and monotonic() - checked_at < self.population_refresh_interval:
+            return
+        self.set_population(await repo.estimate_count())
+
+    async def allocate(self, repo: ShortURLRepository) -> str:
+        await self._refresh_length(repo)
+        return generate_short_code(self.length)
+
+    async def allocate_many(self, repo: ShortURLRepository, count: int) -> list[str]:
+        await self._refresh_length(repo)
+        return [generate_short_code(self.length) for _ in range(count)]
+
+
+class SequenceCodeAllocator(CodeAllocator):
+    """
+    Base62-encoded ids leased in blocks from the `shorturl_code_seq` Postgres sequence.
+
+    One `nextval` reserves a whole block (the sequence's INCREMENT BY), so a worker only
+    talks to the database once per block. Codes get longer on their own as ids outgrow
+    the `min_length` keyspace. With a `permutation_key`, ids are shuffled within each
+    keyspace so consecutive links do not get guessable codes.
+    """
+
+    def __init__(self, min_length: int = 6, permutation_key: bytes | None = None):
+        self.min_length = min_length
+        self.permutation_key = permutation_key
+        self._block_size: int | None = None
+        self._next = 0
+        self._end = 0
+        self._lock = asyncio.Lock()
+
+    async def _take(self, repo: ShortURLRepository, count: int) -> list[int]:
+        ids: list[int] = []
+        async with self._lock:
+            while len(ids) < count:
+                if self._next >= self._end:
+                    if self._block_size is None:
+                        self._block_size = await repo.get_code_block_size()
+                    self._next = await repo.lease_code_block()
+                    self._end = self._next + self._block_size
+                take = min(count - len(ids), self._end - self._next)
+                ids.extend(range(self._next, self._next + take))
+                self._next += take
+        return ids
+
+    async def allocate(self, repo: ShortURLRepository) -> str:
+        (value,) = await self._take(repo, 1)
+        return encode_short_code(value, self.min_length, self.permutation_key)
+
+    async def allocate_many(self, repo: ShortURLRepository, count: int) -> list[str]:
+        values = await self._take(repo, count)
+        return [encode_short_code(value, self.min_length, self.permutation_key) for value in values]
+
+
+class PooledCodeAllocator(CodeAllocator):
+    """
+    Serves codes from a pre-generated in-memory pool that a background task refills.
+
+    Refills draw candidates from `source` and drop the ones already in the table with a
+    single `IN` query, so requests never pay for a lookup. When the pool runs dry the
+    request falls back to `source` directly.
+    """
+
+    def __init__(
+        self,
+        source: CodeAllocator,
+        session_factory: Callable,
+        size: int = 10_000,
+        low_watermark: float = 0.25,
+        refill_interval: float = 1.0,
+    ):
+        self.source = source
+        self.session_factory = session_factory
+        self.size = size
+        self.low_watermark = int(size * low_watermark)
+        self.refill_interval = refill_interval
+        self._pool: list[str] = []
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def depth(self) -> int:
+        return len(self._pool)
+
+    async def start(self):
+        await self.source.start()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="short-code-pool-refill")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.source.stop()
+
+    async def allocate(self, repo: ShortURLRepository) -> str:
+        if len(self._pool) <= self.low_watermark:
+            self._wakeup.set()
+        if self._pool:
+            return self._pool.pop()
+        return await self.source.allocate(repo)
+
+    async def allocate_many(self, repo: ShortURLRepository, count: int) -> list[str]:
+        codes = self._pool[-count:] if count else []
+        del self._pool[len(self._pool) - len(codes) :]
+        if len(self._pool) <= self.low_watermark:
+            self._wakeup.set()
+        if len(codes) < count:
+            codes.extend(await self.source.allocate_many(repo, count - len(codes)))
+        return codes
+
+    async def refill(self):
+        missing = self.size - len(self._pool)
+        if missing <= 0:
+            return
+        async with self.session_factory() as session:
+            repo = ShortURLRepository(session)
+            if isinstance(self.source, RandomCodeAllocator):
+                self.source.set_population(await repo.estimate_count())
+            candidates = set(await self.source.allocate_many(repo, missing))
+            candidates -= await repo.get_existing_codes(candidates)
+            await session.commit()
+        candidates.difference_update(self._pool)
+        self._pool.extend(candidates)
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refill()
+            except Exception:
+                logger.exception("Failed to refill the short code pool")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.refill_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+
+def build_code_allocator() -> CodeAllocator:
+    key = settings.SHORT_CODE_PERMUTATION_KEY
+    permutation_key = key.encode()[:64] if key else None
+
+    if settings.SHORT_CODE_ALLOCATOR == "sequence":
+        if permutation_key is None:
+            # Unshuffled ids would let anyone walk every link from 000001 on.
+            raise ValueError("SHORT_CODE_ALLOCATOR=sequence needs a SHORT_CODE_PERMUTATION_KEY")
+        return SequenceCodeAllocator(min_length=settings.SHORT_CODE_MIN_LENGTH, permutation_key=permutation_key)
+    if settings.SHORT_CODE_ALLOCATOR == "pool":
+        return PooledCodeAllocator(
+            source=RandomCodeAllocator(min_length=settings.SHORT_CODE_MIN_LENGTH),
+            session_factory=async_session_factory,
+            size=settings.SHORT_CODE_POOL_SIZE,
+        )
+    return RandomCodeAllocator(min_length=settings.SHORT_CODE_MIN_LENGTH)
+
+
+code_allocator = build_code_allocator()
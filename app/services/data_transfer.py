@@ -0,0 +1,252 @@
+import csv
+import gzip
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Iterator
+
+from sqlalchemy import Table
+
+from app.db.models import ShortURL, URLViewLog
+from app.repositories.bulk import BulkTransferRepository
+
+FORMATS = ("ndjson", "csv", "parquet")
+
+
+@dataclass(frozen=True)
+class Column:
+    name: str
+    type: str  # int, text, bytes, datetime or bool
+    nullable: bool = False
+
+
+@dataclass(frozen=True)
+class TableSpec:
+    table: Table
+    columns: tuple[Column, ...]
+
+    @property
+    def names(self) -> list[str]:
+        return [column.name for column in self.columns]
+
+
+TABLES = {
+    "shorturl": TableSpec(
+        ShortURL.__table__,  # type: ignore
+        (
+            Column("id", "int"),
+            Column("original_url", "text"),
+            Column("original_url_hash", "bytes", nullable=True),
+            Column("short_code", "text"),
+            Column("created_at", "datetime"),
+            Column("expires_at", "datetime", nullable=True),
+            Column("max_clicks", "int", nullable=True),
+        ),
+    ),
+    "urlviewlog": TableSpec(
+        URLViewLog.__table__,  # type: ignore
+        (
+            Column("id", "int"),
+            Column("shorturl_id", "int"),
+            Column("viewed_at", "datetime"),
+            Column("processed", "bool"),
+        ),
+    ),
+}
+
+
+def detect_format(path: str) -> str:
+    name = path.removesuffix(".gz")
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith(".parquet"):
+        return "parquet"
+    raise ValueError(f"Cannot tell the format of {path}, pass --format")
+
+
+def _encode(column: Column, value):
+    """Python value -> JSON/CSV friendly value."""
+    if value is None:
+        return None
+    if column.type == "bytes":
+        return value.hex()
+    if column.type == "datetime":
+        return value.isoformat()
+    return value
+
+
+def _decode(column: Column, value):
+    """JSON/CSV value -> the Python value COPY expects."""
+    if value is None or (value == "" and column.nullable):
+        return None
+    if column.type == "int":
+        return int(value)
+    if column.type == "bytes":
+        return bytes.fromhex(value)
+    if column.type == "datetime":
+        return datetime.fromisoformat(value)
+    if column.type == "bool":
+        return value if isinstance(value, bool) else value.lower() in ("true", "t", "1")
+    return value
+
+
+def _open_text(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8", newline="")
+    return open(path, mode, encoding="utf-8", newline="")
+
+
+def _arrow_schema(spec: TableSpec):
+    try:
+        import pyarrow as pa  # noqa: PLC0415
+    except ImportError:
+        raise RuntimeError("Parquet files need the optional pyarrow package: pip install pyarrow")
+
+    types = {
+        "int": pa.int64(),
+        "text": pa.string(),
+        "bytes": pa.binary(),
+        "datetime": pa.timestamp("us", tz="UTC"),
+        "bool": pa.bool_(),
+    }
+    return pa.schema([pa.field(column.name, types[column.type], nullable=column.nullable) for column in spec.columns])
+
+
+class RowWriter:
+    def __init__(self, spec: TableSpec, path: str, fmt: str):
+        self.spec = spec
+        self.fmt = fmt
+        if fmt == "parquet":
+            self._schema = _arrow_schema(spec)
+            import pyarrow.parquet as pq  # noqa: PLC0415
+
+            self._writer = pq.ParquetWriter(path, self._schema, compression="zstd")
+        else:
+            self._file = _open_text(path, "w")
+            if fmt == "csv":
+                self._csv = csv.writer(self._file)
+                self._csv.writerow(spec.names)
+
+    def write(self, rows: list[tuple]):
+        columns = self.spec.columns
+        if self.fmt == "parquet":
+            import pyarrow as pa  # noqa: PLC0415
+
+            records = [dict(zip(self.spec.names, row)) for row in rows]
+            self._writer.write_table(pa.Table.from_pylist(records, self._schema))
+        elif self.fmt == "csv":
+            self._csv.writerows(
+                ["" if value is None else _encode(column, value) for column, value in zip(columns, row)] for row in rows
+            )
+        else:
+            self._file.writelines(
+                json.dumps({column.name: _encode(column, value) for column, value in zip(columns, row)}) + "\n"
+                for row in rows
+            )
+
+    def close(self):
+        if self.fmt == "parquet":
+            self._writer.close()
+        else:
+            self._file.close()
+
+
+def read_batches(spec: TableSpec, path: str, fmt: str, batch_size: int) -> Iterator[list[tuple]]:
+    """Rows of `path` as tuples in `spec` column order, `batch_size` at a time."""
+    if fmt == "parquet":
+        _arrow_schema(spec)
+        import pyarrow.parquet as pq  # noqa: PLC0415
+
+        parquet = pq.ParquetFile(path)
+        present = [name for name in spec.names if name in parquet.schema_arrow.names]
+        for batch in parquet.iter_batches(batch_size=batch_size, columns=present):
+            missing = [None] * batch.num_rows
+            yield list(zip(*(batch.column(name).to_pylist() if name in present else missing for name in spec.names)))
+        return
+
+    with _open_text(path, "r") as file:
+        if fmt == "csv":
+            reader = csv.reader(file)
+            header = next(reader)
+            # Nullable columns added after a file was exported read as empty.
+            positions = [
+                None if column.nullable and column.name not in header else header.index(column.name)
+                for column in spec.columns
+            ]
+            records = (["" if position is None else fields[position] for position in positions] for fields in reader)
+        else:
+            records = ([json.loads(line).get(name) for name in spec.names] for line in file if line.strip())
+        batch = []
+        for values in records:
+            batch.append(tuple(_decode(column, value) for column, value in zip(spec.columns, values)))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+async def export_table(
+    session_factory: Callable,
+    name: str,
+    path: str,
+    fmt: str,
+    batch_size: int = 10_000,
+    progress: Callable[[int], None] | None = None,
+) -> int:
+    """Write every row of table `name` to `path`; returns the number of rows."""
+    spec = TABLES[name]
+    writer = RowWriter(spec, path, fmt)
+    total = 0
+    try:
+        async with session_factory() as session:
+            async for rows in BulkTransferRepository(session).iter_rows(spec.table, spec.names, batch_size):
+                writer.write(rows)
+                total += len(rows)
+                if progress is not None:
+                    progress(total)
+    finally:
+        writer.close()
+    return total
+
+
+async def import_table(
+    session_factory: Callable,
+    name: str,
+    path: str,
+    fmt: str,
+    batch_size: int = 100_000,
+    skip: int = 0,
+    reprocess: bool = False,
+    progress: Callable[[int], None] | None = None,
+) -> int:
+    """
+    COPY the rows of `path` into table `name`, committing every batch; returns the number of rows copied.
+
+    `progress` gets the number of rows of the file committed so far, including skipped ones,
+    so an interrupted import can be resumed with `skip` set to the last reported value. With
+    `reprocess`, view logs are loaded as unprocessed so the rollup rebuilds the counters.
+    """
+    spec = TABLES[name]
+    processed = spec.names.index("processed") if reprocess and "processed" in spec.names else None
+    skipped = skip
+    total = 0
+    for batch in read_batches(spec, path, fmt, batch_size):
+        rows = batch
+        if skip:
+            dropped = min(skip, len(rows))
+            rows, skip = rows[dropped:], skip - dropped
+            if not rows:
+                continue
+        if processed is not None:
+            rows = [row[:processed] + (False,) + row[processed + 1 :] for row in rows]
+        async with session_factory() as session:
+            total += await BulkTransferRepository(session).copy_rows(spec.table, spec.names, rows)
+        if progress is not None:
+            progress(skipped + total)
+
+    async with session_factory() as session:
+        await BulkTransferRepository(session).sync_id_sequence(spec.table)
+    return total
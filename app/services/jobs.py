@@ -0,0 +1,49 @@
+from functools import partial
+
+from app.cache.short_url import short_url_cache
+from app.core.setting import settings
+from app.db.session import async_session_factory
+from app.services.cache_warmup import warm_short_url_cache
+from app.services.link_expiry import link_expiry_sweeper
+from app.services.scheduler import Job
+from app.services.view_log_partitions import view_log_partition_manager
+from app.services.view_rollup import view_rollup_worker
+
+
+def background_jobs() -> list[Job]:
+    """The periodic jobs enabled by the settings, for the scheduler started by the lifespan."""
+    jobs = []
+    if settings.VIEW_ROLLUP_ENABLED:
+        jobs.append(
+            Job("view_rollup", view_rollup_worker.run_once, interval=settings.VIEW_ROLLUP_INTERVAL, singleton=True)
+        )
+    if settings.VIEW_LOG_PARTITION_MAINTENANCE_ENABLED:
+        jobs.append(
+            Job(
+                "view_log_partitions",
+                view_log_partition_manager.run_once,
+                interval=None if settings.VIEW_LOG_PARTITION_CRON else settings.VIEW_LOG_PARTITION_INTERVAL,
+                cron=settings.VIEW_LOG_PARTITION_CRON or None,
+                singleton=True,
+            )
+        )
+    if settings.LINK_EXPIRY_SWEEP_ENABLED:
+        jobs.append(
+            Job(
+                "link_expiry",
+                link_expiry_sweeper.run_once,
+                interval=settings.LINK_EXPIRY_SWEEP_INTERVAL,
+                singleton=True,
+            )
+        )
+    if settings.CACHE_REFRESH_INTERVAL > 0:
+        # The lifespan warms the cache before serving; the job keeps the hottest links in it afterwards.
+        jobs.append(
+            Job(
+                "cache_refresh",
+                partial(warm_short_url_cache, short_url_cache, async_session_factory, settings.CACHE_WARMUP_SIZE),
+                interval=settings.CACHE_REFRESH_INTERVAL,
+                run_at_start=False,
+            )
+        )
+    return jobs
@@ -0,0 +1,75 @@
+import asyncio
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from logging import getLogger
+from pathlib import Path
+from typing import Callable
+
+from app.core.setting import settings
+from app.db.session import async_session_factory
+from app.repositories.short_url import ShortURLRepository
+
+logger = getLogger(__name__)
+
+
+def _append(path: Path, data: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+
+
+class LinkExpirySweeper:
+    """
+    Deletes links that expired more than `grace` seconds ago, `batch_size` per transaction,
+    found through the partial index on `expires_at`. Until then they answer 410 Gone,
+    afterwards 404, so expired campaign links leave the table, its indexes and the caches.
+
+    With an `archive_dir`, each batch is appended to a monthly NDJSON file there, with the
+    final view count of every link, before it commits. The scheduler runs it on one worker
+    as the `link_expiry` job.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable,
+        batch_size: int = 1_000,
+        grace: float = 86_400.0,
+        archive_dir: str | None = None,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.grace = grace
+        self.archive_dir = Path(archive_dir) if archive_dir else None
+
+    async def run_once(self, now: datetime | None = None) -> int:
+        """Delete batches until no link past the grace period is left; returns how many were deleted."""
+        now = now or datetime.now(timezone.utc)
+        before = now - timedelta(seconds=self.grace)
+        archive = self._archive if self.archive_dir is not None else None
+        total = 0
+        while True:
+            async with self.session_factory() as session:
+                deleted = await ShortURLRepository(session).delete_expired(before, self.batch_size, archive)
+            total += len(deleted)
+            if len(deleted) < self.batch_size:
+                break
+        if total:
+            logger.info("Deleted %d links that expired before %s", total, before.isoformat())
+        return total
+
+    async def _archive(self, links: list[dict]):
+        now = datetime.now(timezone.utc)
+        path = self.archive_dir / f"shorturl_expired_{now.year:04d}_{now.month:02d}.ndjson"
+        data = "".join(json.dumps(link, default=datetime.isoformat) + "\n" for link in links)
+        await asyncio.to_thread(_append, path, data)
+
+
+link_expiry_sweeper = LinkExpirySweeper(
+    session_factory=async_session_factory,
+    batch_size=settings.LINK_EXPIRY_SWEEP_BATCH_SIZE,
+    grace=settings.LINK_EXPIRY_GRACE,
+    archive_dir=settings.LINK_EXPIRY_ARCHIVE_DIR,
+)
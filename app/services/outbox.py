@@ -0,0 +1,149 @@
+import asyncio
+import json
+import os
+from logging import getLogger
+from pathlib import Path
+from typing import Callable
+
+from app.core.metrics import registry
+from app.core.setting import settings
+from app.db.models.outbox import OutboxEvent
+from app.db.session import async_session_factory
+from app.repositories.outbox import OutboxRepository
+
+logger = getLogger(__name__)
+
+OUTBOX_EVENTS = registry.counter("outbox_events", "Outbox events handled by the relay per outcome", ("outcome",))
+_published = OUTBOX_EVENTS.labels("published")
+_failed = OUTBOX_EVENTS.labels("failed")
+
+
+def event_message(event: OutboxEvent) -> dict:
+    """The published form of an outbox row; consumers deduplicate redeliveries by `id`."""
+    return {
+        "id": event.id,
+        "type": event.event_type,
+        "created_at": event.created_at.isoformat(),
+        "payload": event.payload,
+    }
+
+
+class EventSink:
+    """Where the relay publishes to. `publish` must only return once the events are durable."""
+
+    async def publish(self, messages: list[dict]):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class InMemorySink(EventSink):
+    def __init__(self):
+        self.messages: list[dict] = []
+
+    async def publish(self, messages: list[dict]):
+        self.messages.extend(messages)
+
+
+class NDJSONFileSink(EventSink):
+    """Appends one JSON object per line to `path` and fsyncs each batch, for running without a broker."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._file = None
+
+    async def publish(self, messages: list[dict]):
+        data = "".join(json.dumps(message, separators=(",", ":")) + "\n" for message in messages)
+        await asyncio.to_thread(self._write, data)
+
+    async def close(self):
+        if self._file is not None:
+            await asyncio.to_thread(self._file.close)
+            self._file = None
+
+    def _write(self, data: str):
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.path.open("a", encoding="utf-8")
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+
+def build_sink(kind: str, path: str) -> EventSink:
+    if kind == "memory":
+        return InMemorySink()
+    if kind == "file":
+        return NDJSONFileSink(path)
+    raise ValueError(f"Unknown outbox sink {kind!r}")
+
+
+class OutboxRelay:
+    """
+    Publishes outbox events to a sink in batches, in the background.
+
+    Each batch is locked, published and deleted in one transaction, so an event is deleted
+    only after the sink accepted it and is published again if the relay dies in between
+    (at-least-once). Full batches are relayed back to back; otherwise the relay lingers
+    for `linger` seconds so that the next batch has time to fill up.
+    """
+
+    def __init__(self, session_factory: Callable, sink: EventSink, batch_size: int = 500, linger: float = 0.5):
+        self.session_factory = session_factory
+        self.sink = sink
+        self.batch_size = batch_size
+        self.linger = linger
+        self._task: asyncio.Task | None = None
+
+    async def run_once(self, max_batches: int | None = None) -> int:
+        """Relay batches until the outbox is drained (or `max_batches` ran); returns the number of events published."""
+        total = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            async with self.session_factory() as session:
+                repository = OutboxRepository(session)
+                events = await repository.claim_batch(self.batch_size)
+                if events:
+                    try:
+                        await self.sink.publish([event_message(event) for event in events])
+                    except Exception:
+                        _failed.inc(len(events))
+                        raise
+                await repository.delete([event.id for event in events])
+            _published.inc(len(events))
+            total += len(events)
+            batches += 1
+            if len(events) < self.batch_size:
+                break
+        return total
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="outbox-relay")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.sink.close()
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Outbox relay failed")
+            await asyncio.sleep(self.linger)
+
+
+outbox_relay = OutboxRelay(
+    session_factory=async_session_factory,
+    sink=build_sink(settings.OUTBOX_SINK, settings.OUTBOX_FILE_PATH),
+    batch_size=settings.OUTBOX_BATCH_SIZE,
+    linger=settings.OUTBOX_LINGER,
+)
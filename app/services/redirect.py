@@ -0,0 +1,106 @@
+import asyncio
+from datetime import datetime, timezone
+from time import perf_counter
+from typing import Callable
+
+from asyncpg import InterfaceError, PostgresConnectionError
+
+from app.cache.short_url import CachedShortURL, ShortURLCache, short_url_cache
+from app.core.metrics import DB_QUERY_DURATION
+from app.db.raw import RawPool
+from app.db.replicas import ReplicaRouter
+from app.db.session import async_session_factory, raw_pool, replica_router
+from app.exceptions.short_url import ShortURLExpiredError
+from app.repositories.view_log import ViewLogRepository
+from app.services.view_ingestion import ViewIngestionPipeline, view_ingestion_pipeline
+from app.utils.singleflight import SingleFlight
+
+# The rolled-up view count is only read for links with `max_clicks`; CASE keeps the
+# subquery from running for any other link.
+SELECT_BY_CODE = """
+    SELECT id, original_url, short_code, created_at, expires_at, max_clicks,
+        CASE WHEN max_clicks IS NULL THEN NULL
+        ELSE coalesce((SELECT view_count FROM shorturlviewcounter WHERE shorturl_id = shorturl.id), 0) END
+    FROM shorturl WHERE short_code = $1
+"""
+
+_fetch_duration = DB_QUERY_DURATION.labels("redirect", "fetch")
+
+
+class RedirectResolver:
+    """
+    Resolves short codes for the redirect endpoint without a session or ORM entities.
+
+    Lookups are answered from the cache when possible, otherwise with one prepared
+    statement on a raw asyncpg connection from a healthy read replica (confirmed on the
+    primary when the replica does not know the code). A session is only opened to log a
+    view when the ingestion pipeline is not running. Expiry and click quotas are checked
+    against the cached entry, so they cost no query either.
+    """
+
+    def __init__(
+        self,
+        cache: ShortURLCache,
+        primary: RawPool,
+        replicas: ReplicaRouter,
+        pipeline: ViewIngestionPipeline,
+        session_factory: Callable,
+    ):
+        self.cache = cache
+        self.primary = primary
+        self.replicas = replicas
+        self.pipeline = pipeline
+        self.session_factory = session_factory
+        self.lookups = SingleFlight("redirect_lookup")
+
+    async def resolve(self, short_code: str) -> CachedShortURL | None:
+        cached, entry = await self.cache.lookup(short_code)
+        # An entry cached from an ORM entity lacks the click count a quota link is checked against.
+        if cached and (entry is None or entry.max_clicks is None or entry.clicks is not None):
+            return entry
+        # Concurrent misses for one code, e.g. a viral link right after a deploy, share one query.
+        return await self.lookups.do(short_code, lambda: self._fetch_and_store(short_code))
+
+    async def admit(self, entry: CachedShortURL):
+        """Count a click of a link with a lifetime, or raise `ShortURLExpiredError` when it is over."""
+        if not entry.has_lifetime:
+            return
+        if entry.expired(datetime.now(timezone.utc)):
+            raise ShortURLExpiredError(f"Short URL '{entry.short_code}' has expired")
+        if entry.max_clicks is not None and await self.cache.count_click(entry) > entry.max_clicks:
+            raise ShortURLExpiredError(f"Short URL '{entry.short_code}' has used up its clicks")
+
+    async def _fetch_and_store(self, short_code: str) -> CachedShortURL | None:
+        return await self.cache.store(short_code, await self.fetch(short_code))
+
+    async def fetch(self, short_code: str) -> CachedShortURL | None:
+        started = perf_counter()
+        try:
+            row = None
+            replica = self.replicas.choose()
+            if replica is not None:
+                try:
+                    row = await replica.raw_pool.fetchrow(SELECT_BY_CODE, short_code)
+                except (OSError, asyncio.TimeoutError, InterfaceError, PostgresConnectionError):
+                    self.replicas.mark_failed(replica)
+            if row is None:
+                row = await self.primary.fetchrow(SELECT_BY_CODE, short_code)
+        finally:
+            _fetch_duration.observe(perf_counter() - started)
+        return CachedShortURL(*row) if row is not None else None
+
+    async def log_view(self, shorturl_id: int):
+        if self.pipeline.is_running:
+            await self.pipeline.submit(shorturl_id)
+            return
+        async with self.session_factory() as session:
+            await ViewLogRepository(session).create_view_log(shorturl_id)
+
+
+redirect_resolver = RedirectResolver(
+    cache=short_url_cache,
+    primary=raw_pool,
+    replicas=replica_router,
+    pipeline=view_ingestion_pipeline,
+    session_factory=async_session_factory,
+)
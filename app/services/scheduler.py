@@ -0,0 +1,310 @@
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from logging import getLogger
+from time import perf_counter, time
+from typing import Awaitable, Callable
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.metrics import registry
+from app.core.setting import settings
+from app.db.session import primary
+
+logger = getLogger(__name__)
+
+JOB_RUNS = registry.counter("scheduler_job_runs", "Scheduled job runs by outcome", ("job", "outcome"))
+JOB_DURATION = registry.histogram(
+    "scheduler_job_duration_seconds",
+    "Duration of scheduled job runs",
+    ("job",),
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0),
+)
+JOB_ITEMS = registry.counter("scheduler_job_items", "Rows or other items processed by scheduled jobs", ("job",))
+
+LEADER_LOCK = text("SELECT pg_try_advisory_lock(hashtext(:name))")
+LEADER_UNLOCK = text("SELECT pg_advisory_unlock(hashtext(:name))")
+LEADER_PING = text("SELECT 1")
+
+
+class CronSchedule:
+    """
+    Five-field cron expression, "minute hour day-of-month month day-of-week", evaluated in UTC.
+
+    Fields take `*`, numbers, ranges `a-b`, steps `*/n` or `a-b/n` and comma separated lists
+    of those; Sunday is 0 or 7. As in cron, when both day fields are restricted a day
+    matching either one fires.
+    """
+
+    FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression {expression!r} needs 5 fields")
+        self.expression = expression
+        minutes, hours, days, months, weekdays = (
+            self._parse(field, low, high) for field, (low, high) in zip(fields, self.FIELDS)
+        )
+        self.minutes, self.hours, self.days, self.months = minutes, hours, days, months
+        self.weekdays = {weekday % 7 for weekday in weekdays}
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    @staticmethod
+    def _parse(field: str, low: int, high: int) -> set[int]:
+        values = set()
+        for part in field.split(","):
+            span, _, step = part.partition("/")
+            if span == "*":
+                start, end = low, high
+            elif "-" in span:
+                start, end = (int(value) for value in span.split("-", 1))
+            else:
+                start = end = int(span)
+            if not low <= start <= end <= high:
+                raise ValueError(f"Cron field {field!r} is outside {low}-{high}")
+            values.update(range(start, end + 1, int(step) if step else 1))
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day = moment.day in self.days
+        weekday = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def next_after(self, moment: datetime) -> datetime:
+        """First matching minute strictly after `moment`."""
+        moment = moment.astimezone(timezone.utc).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Jumps to the next month, day or hour as soon as one does not match; 5 years covers any valid expression.
+        limit = moment + timedelta(days=5 * 366)
+        while moment < limit:
+            if moment.month not in self.months:
+                month_index = moment.year * 12 + moment.month
+                moment = moment.replace(year=month_index // 12, month=month_index % 12 + 1, day=1, hour=0, minute=0)
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError(f"Cron expression {self.expression!r} never fires")
+
+
+@dataclass
+class Job:
+    """
+    A background job: `func` runs every `interval` seconds after the previous run ended, or at
+    the times of the `cron` expression, and returns how many items it processed (or None).
+
+    Singleton jobs only run on the worker holding the scheduler's leader lock.
+    """
+
+    name: str
+    func: Callable[[], Awaitable[int | None]]
+    interval: float | None = None
+    cron: str | None = None
+    singleton: bool = False
+    run_at_start: bool = True
+
+    def __post_init__(self):
+        if (self.interval is None) == (self.cron is None):
+            raise ValueError(f"Job {self.name} needs either an interval or a cron expression")
+        self.schedule = CronSchedule(self.cron) if self.cron is not None else None
+        self.last_duration: float | None = None
+        self.last_items: int | None = None
+        self.last_success: float | None = None
+
+    def delay(self, first: bool) -> float:
+        """Seconds until the next run."""
+        if self.schedule is not None:
+            now = datetime.now(timezone.utc)
+            return (self.schedule.next_after(now) - now).total_seconds()
+        return 0.0 if first and self.run_at_start else self.interval
+
+
+class LeaderElection:
+    """
+    Elects one worker across all processes and servers by a Postgres session-level advisory lock.
+
+    The lock is held on a dedicated connection of the primary for as long as the worker
+    leads. It goes away with that connection, so when the leader exits, crashes or loses
+    the database, whichever worker checks next takes over. The connection is verified
+    every `interval` seconds and a leader that cannot reach it steps down at once, but a
+    handover can still overlap by up to one interval: singleton jobs must tolerate that,
+    e.g. by locking what they work on.
+    """
+
+    def __init__(self, connect: Callable[[], AsyncConnection], name: str = "scheduler", interval: float = 10.0):
+        self.connect = connect
+        self.name = name
+        self.interval = interval
+        self._connection: AsyncConnection | None = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._connection is not None
+
+    async def check(self) -> bool:
+        """Verify leadership, or try to take it; returns whether this worker leads."""
+        if self._connection is not None:
+            try:
+                await self._connection.execute(LEADER_PING)
+                await self._connection.commit()
+                return True
+            except Exception as e:
+                logger.warning("Lost the %s leader lock: %r", self.name, e)
+                await self._drop()
+                return False
+
+        connection = await self.connect().start()
+        try:
+            acquired = (await connection.execute(LEADER_LOCK, {"name": self.name})).scalar()
+            await connection.commit()
+        except BaseException:
+            await connection.invalidate()
+            await connection.close()
+            raise
+        if not acquired:
+            await connection.close()
+            return False
+        self._connection = connection
+        logger.info("Acquired the %s leader lock", self.name)
+        return True
+
+    async def release(self):
+        if self._connection is None:
+            return
+        try:
+            await self._connection.execute(LEADER_UNLOCK, {"name": self.name})
+            await self._connection.commit()
+            await self._connection.close()
+            self._connection = None
+        except Exception:
+            await self._drop()
+
+    async def _drop(self):
+        # Closing the physical connection is what releases the lock; never hand it back to the pool.
+        connection, self._connection = self._connection, None
+        try:
+            await connection.invalidate()
+            await connection.close()
+        except Exception:  # noqa
+            pass
+
+
+class Scheduler:
+    """
+    Runs `Job`s in background tasks of this worker, at most `max_concurrency` at a time.
+
+    A job never overlaps with itself: the next run is scheduled once the previous one has
+    finished. Failures are logged and counted, and the job runs again at its next time.
+    """
+
+    def __init__(self, leader: LeaderElection | None = None, max_concurrency: int = 2):
+        self.leader = leader
+        self.max_concurrency = max_concurrency
+        self.jobs: dict[str, Job] = {}
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tasks: list[asyncio.Task] = []
+
+    def add(self, job: Job):
+        self.jobs[job.name] = job
+
+    async def run_job(self, job: Job) -> int | None:
+        if job.singleton and self.leader is not None and not self.leader.is_leader:
+            JOB_RUNS.labels(job.name, "skipped").inc()
+            return None
+        async with self._semaphore:
+            started = perf_counter()
+            try:
+                items = await job.func()
+            except Exception:
+                JOB_DURATION.labels(job.name).observe(perf_counter() - started)
+                JOB_RUNS.labels(job.name, "error").inc()
+                logger.exception("Job %s failed", job.name)
+                return None
+        duration = job.last_duration = perf_counter() - started
+        JOB_DURATION.labels(job.name).observe(duration)
+        JOB_RUNS.labels(job.name, "success").inc()
+        job.last_success = time()
+        job.last_items = items
+        if items:
+            JOB_ITEMS.labels(job.name).inc(items)
+            logger.info(
+                "Job %s processed %d items in %.3fs (%.0f/s)", job.name, items, duration, items / max(duration, 1e-9)
+            )
+        return items
+
+    async def start(self):
+        if self._tasks or not self.jobs:
+            return
+        if self.leader is not None and any(job.singleton for job in self.jobs.values()):
+            # Decided before the first runs, so the leader does not skip its singleton jobs at startup.
+            try:
+                await self.leader.check()
+            except Exception as e:
+                logger.warning("Leader election failed: %r", e)
+            self._tasks.append(asyncio.create_task(self._run_leader(), name="scheduler-leader"))
+        for job in self.jobs.values():
+            self._tasks.append(asyncio.create_task(self._run_job(job), name=f"job-{job.name}"))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        if self.leader is not None:
+            await self.leader.release()
+
+    async def _run_leader(self):
+        while True:
+            await asyncio.sleep(self.leader.interval)
+            try:
+                await self.leader.check()
+            except Exception as e:
+                logger.warning("Leader election failed: %r", e)
+
+    async def _run_job(self, job: Job):
+        first = True
+        while True:
+            await asyncio.sleep(job.delay(first))
+            first = False
+            await self.run_job(job)
+
+
+def _job_state():
+    for job in scheduler.jobs.values():
+        if job.last_duration is not None:
+            yield (job.name, "last_duration_seconds"), job.last_duration
+        if job.last_items is not None and job.last_duration:
+            yield (job.name, "last_items_per_second"), job.last_items / job.last_duration
+        if job.last_success is not None:
+            yield (job.name, "last_success_timestamp"), job.last_success
+
+
+scheduler = Scheduler(
+    leader=(
+        LeaderElection(primary.connect, interval=settings.SCHEDULER_LEADER_CHECK_INTERVAL)
+        if settings.SCHEDULER_LEADER_ELECTION
+        else None
+    ),
+    max_concurrency=settings.SCHEDULER_MAX_CONCURRENCY,
+)
+
+registry.callback(
+    "scheduler_job", "Duration, throughput and last success of each job's latest run", _job_state, ("job", "state")
+)
+registry.callback(
+    "scheduler_leader",
+    "1 when this worker holds the leader lock and runs the singleton jobs",
+    lambda: [((), int(scheduler.leader is None or scheduler.leader.is_leader))],
+)
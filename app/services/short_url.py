@@ -1,63 +1,186 @@
+from datetime import datetime
+
+from app.cache.short_url import CachedShortURL, ShortURLCache
+from app.core.metrics import SHORT_CODE_COLLISIONS
 from app.db.models.short_url import ShortURL
 from app.exceptions.short_url import ShortURLGenerationError, ShortURLNotFoundError
 from app.repositories.short_url import ShortURLRepository
+from app.schemas.view_log import ViewGranularity
+from app.services.code_allocator import CodeAllocator, RandomCodeAllocator
 from app.services.view_log import ViewLogService
-from app.utils.shortener import generate_short_code
-from app.utils.url import normalize_url
+from app.utils.shortener import RESERVED_SHORT_CODES
+from app.utils.singleflight import SingleFlight
+from app.utils.url import normalize_url, normalize_urls
+
+# Shared by all requests of the worker: concurrent cache misses for one code run one query
+# and concurrent shortenings of one URL run one create.
+code_lookups = SingleFlight("short_url_lookup")
+url_creates = SingleFlight("short_url_create")
 
 
 class ShortURLService:
-    def __init__(self, repo: ShortURLRepository | None = None, session=None):
+    def __init__(
+        self,
+        repo: ShortURLRepository | None = None,
+        session=None,
+        read_session=None,
+        cache: ShortURLCache | None = None,
+        allocator: CodeAllocator | None = None,
+    ):
         if repo:
             self.repo = repo
         else:
             if session is None:
                 raise ValueError("Session must be provided if repo is not given")
             self.repo = ShortURLRepository(session)
+        # Lookups that need not see this request's own writes may go to a read replica.
+        self.read_session = read_session if read_session is not None else self.repo.session
+        self.read_repo = ShortURLRepository(read_session) if read_session is not None else self.repo
+        self.cache = cache
+        self.allocator = allocator or RandomCodeAllocator()
+        self.collision_retries = 0
 
-    async def _generate_unique_short_code(self, attempts: int = 5) -> str:
-        for _ in range(attempts):
-            code = generate_short_code()
-            if not await self.repo.get_by_code(code):
-                return code
-        raise ShortURLGenerationError("Could not generate unique short code")
+    async def _read_by_code(self, short_code: str) -> ShortURL | None:
+        short_url = await self.read_repo.get_by_code(short_code)
+        if short_url is None and self.read_repo is not self.repo:
+            # A lagging replica may not have a link created moments ago; only the primary can say it is missing.
+            short_url = await self.repo.get_by_code(short_code)
+        return short_url
+
+    async def _get_by_code(self, short_code: str) -> ShortURL | CachedShortURL | None:
+        if self.cache is None:
+            return await self._read_by_code(short_code)
 
-    async def create_short_url(self, original_url: str) -> ShortURL:
+        cached, entry = await self.cache.lookup(short_code)
+        if cached:
+            return entry
+        return await code_lookups.do(short_code, lambda: self._read_and_store(short_code))
+
+    async def _read_and_store(self, short_code: str) -> CachedShortURL | None:
+        return await self.cache.store(short_code, await self._read_by_code(short_code))
+
+    async def create_short_url(
+        self, original_url: str, expires_at: datetime | None = None, max_clicks: int | None = None
+    ) -> ShortURL:
+        """
+        Shorten `original_url`. Links without a lifetime are shared: shortening the same URL
+        again returns the existing link. Links with `expires_at` or `max_clicks` are always new.
+        """
         original_url = normalize_url(original_url)
-        existing: ShortURL = await self.repo.get_by_original_url(original_url)
-        if existing:
-            return existing
-        short_code = await self._generate_unique_short_code()
-        short_url: ShortURL = await self.repo.create(original_url, short_code)
+        if expires_at is not None or max_clicks is not None:
+            return await self._create_and_store(original_url, expires_at, max_clicks)
+        return await url_creates.do(original_url, lambda: self._create_and_store(original_url))
+
+    async def _create_and_store(
+        self, original_url: str, expires_at: datetime | None = None, max_clicks: int | None = None
+    ) -> ShortURL:
+        short_url: ShortURL = await self._create_with_unique_code(original_url, expires_at, max_clicks)
+        if self.cache is not None:
+            # A new link has no clicks yet, so it is cached as ready to be checked against its quota.
+            await self.cache.store(short_url.short_code, CachedShortURL.from_model(short_url, clicks=0))
         return short_url
 
-    async def get_original_url(self, short_code: str) -> str:
-        short_url = await self.repo.get_by_code(short_code)
-        if not short_url:
-            raise ShortURLNotFoundError(f"Short URL '{short_code}' not found")
-        return short_url.original_url
+    async def create_short_urls(self, original_urls: list[str], chunk_size: int = 1_000) -> list[ShortURL]:
+        """
+        Shorten many URLs at once and return the links in request order.
+
+        URLs are deduplicated within the request and against the table with one IN query per
+        chunk, codes are allocated in bulk and new links are inserted with one multi-row
+        statement per chunk, so retrying a batch returns the same links.
+        """
+        normalized = normalize_urls(original_urls)
+        unique_urls = list(dict.fromkeys(normalized))
+        links: dict[str, ShortURL] = {}
+
+        for start in range(0, len(unique_urls), chunk_size):
+            chunk = unique_urls[start : start + chunk_size]
+            links.update(await self.repo.get_by_original_urls(chunk))
+            missing = [url for url in chunk if url not in links]
+            for _ in range(5):
+                if not missing:
+                    break
+                codes = await self.allocator.allocate_many(self.repo, len(missing))
+                rows = [(url, code) for url, code in zip(missing, codes) if not self._code_taken(code)]
+                created = await self.repo.bulk_create(rows)
+                for short_url in created:
+                    links[short_url.original_url] = short_url
+                if self.cache is not None:
+                    # Replaces not-found entries left by lookups of codes that were free until now.
+                    for short_url in created:
+                        await self.cache.store(short_url.short_code, short_url)
+                missing = [url for url in missing if url not in links]
+                if missing:
+                    # Either a concurrent request stored the same URL or the code was taken.
+                    links.update(await self.repo.get_by_original_urls(missing))
+                    missing = [url for url in missing if url not in links]
+                    self.collision_retries += len(missing)
+                    SHORT_CODE_COLLISIONS.inc(len(missing))
+            if missing:
+                raise ShortURLGenerationError("Could not generate unique short code")
+
+        return [links[url] for url in normalized]
+
+    def _code_taken(self, short_code: str) -> bool:
+        """Reserved codes and codes the code index has seen are skipped without trying the insert."""
+        return short_code in RESERVED_SHORT_CODES or (self.cache is not None and self.cache.probably_taken(short_code))
+
+    async def _create_with_unique_code(
+        self,
+        original_url: str,
+        expires_at: datetime | None = None,
+        max_clicks: int | None = None,
+        attempts: int = 5,
+    ) -> ShortURL:
+        """Insert first and look up on conflict, so concurrent creates of one URL share a row."""
+        shared = expires_at is None and max_clicks is None
+        for _ in range(attempts):
+            short_code = await self.allocator.allocate(self.repo)
+            if not self._code_taken(short_code):
+                short_url = await self.repo.create(original_url, short_code, expires_at, max_clicks)
+                if short_url is not None:
+                    return short_url
+                existing = await self.repo.get_by_original_url(original_url) if shared else None
+                if existing is not None:
+                    return existing
+            self.collision_retries += 1
+            SHORT_CODE_COLLISIONS.inc()
+        raise ShortURLGenerationError("Could not generate unique short code")
 
     async def get_short_url_with_stats(self, short_code: str):
-        short_url = await self.repo.get_by_code(short_code)
+        short_url = await self._get_by_code(short_code)
         if not short_url:
             raise ShortURLNotFoundError(f"Short URL '{short_code}' not found")
 
-        view_service = ViewLogService(session=self.repo.session)
+        view_service = ViewLogService(session=self.read_session)
         view_count = await view_service.get_view_count(short_url.id)
 
         return {
+            "id": short_url.id,
             "short_code": short_url.short_code,
             "original_url": short_url.original_url,
             "view_count": view_count,
             "created_at": short_url.created_at,
         }
 
-    async def log_view_and_get_url(self, short_code: str) -> str:
-        short_url = await self.repo.get_by_code(short_code)
+    async def get_short_url_view_timeseries(
+        self,
+        short_code: str,
+        granularity: ViewGranularity,
+        start: datetime,
+        end: datetime,
+        max_points: int,
+    ):
+        short_url = await self._get_by_code(short_code)
         if not short_url:
             raise ShortURLNotFoundError(f"Short URL '{short_code}' not found")
 
-        view_service = ViewLogService(session=self.repo.session)
-        await view_service.log_view(short_url.id)
+        view_service = ViewLogService(session=self.read_session)
+        points = await view_service.get_view_timeseries(short_url.id, granularity, start, end, max_points)
 
-        return short_url.original_url
+        return {
+            "short_code": short_url.short_code,
+            "granularity": granularity,
+            "start": points[0][0],
+            "end": end,
+            "points": [{"bucket_start": bucket_start, "view_count": count} for bucket_start, count in points],
+        }
@@ -0,0 +1,177 @@
+import asyncio
+from datetime import datetime, timezone
+from logging import getLogger
+from typing import Callable
+
+from app.core.metrics import registry
+from app.core.setting import settings
+from app.db.session import async_session_factory
+from app.repositories.view_log import ViewLogRepository
+
+logger = getLogger(__name__)
+
+_STOP = object()
+
+
+class ViewIngestionPipeline:
+    """
+    Buffers view logs in an in-process queue and writes them in batches.
+
+    Redirects only enqueue a (shorturl_id, viewed_at) pair; a single background flusher
+    drains the queue into multi-row inserts whenever `batch_size` views are buffered or
+    `flush_interval` seconds have passed since the first buffered view. When the queue
+    is full, `submit` waits up to `enqueue_timeout` seconds for space (backpressure)
+    and then drops the view instead of stalling the redirect indefinitely.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable,
+        queue_size: int = 50_000,
+        batch_size: int = 1_000,
+        flush_interval: float = 0.5,
+        enqueue_timeout: float = 1.0,
+    ):
+        self.session_factory = session_factory
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self._running = False
+
+        self.enqueued = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.failed = 0
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self):
+        if self._running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task = asyncio.create_task(self._run(), name="view-ingestion-flusher")
+        self._running = True
+
+    async def stop(self):
+        """Stop accepting views and flush everything that is still buffered."""
+        if not self._running:
+            return
+        self._running = False
+        await self._queue.put(_STOP)
+        await self._task
+
+        remaining = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not _STOP:
+                remaining.append(item)
+        for start in range(0, len(remaining), self.batch_size):
+            await self._flush(remaining[start : start + self.batch_size])
+
+        self._task = None
+        self._queue = None
+
+    async def submit(self, shorturl_id: int) -> bool:
+        item = (shorturl_id, datetime.now(timezone.utc))
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(self._queue.put(item), timeout=self.enqueue_timeout)
+            except asyncio.TimeoutError:
+                self.dropped += 1
+                logger.warning("View ingestion queue is full, dropping view for shorturl_id=%s", shorturl_id)
+                return False
+        self.enqueued += 1
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "running": self._running,
+            "depth": self.depth,
+            "enqueued": self.enqueued,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            stopping = False
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout=timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+            if stopping:
+                return
+
+    async def _flush(self, batch: list[tuple[int, datetime]]):
+        if not batch:
+            return
+        try:
+            async with self.session_factory() as session:
+                await ViewLogRepository(session).bulk_create_view_logs(batch)
+            self.flushed += len(batch)
+        except Exception:
+            self.failed += len(batch)
+            logger.exception("Failed to flush %d view logs", len(batch))
+
+
+view_ingestion_pipeline = ViewIngestionPipeline(
+    session_factory=async_session_factory,
+    queue_size=settings.VIEW_INGEST_QUEUE_SIZE,
+    batch_size=settings.VIEW_INGEST_BATCH_SIZE,
+    flush_interval=settings.VIEW_INGEST_FLUSH_INTERVAL,
+    enqueue_timeout=settings.VIEW_INGEST_ENQUEUE_TIMEOUT,
+)
+
+
+registry.callback(
+    "view_ingestion_queue_depth",
+    "View events waiting to be flushed",
+    lambda: [((), view_ingestion_pipeline.depth)],
+)
+
+
+def _view_ingestion_events():
+    yield ("enqueued",), view_ingestion_pipeline.enqueued
+    yield ("flushed",), view_ingestion_pipeline.flushed
+    yield ("dropped",), view_ingestion_pipeline.dropped
+    yield ("failed",), view_ingestion_pipeline.failed
+
+
+registry.callback(
+    "view_ingestion_events",
+    "View events by outcome",
+    _view_ingestion_events,
+    ("outcome",),
+    metric_type="counter",
+)
@@ -1,17 +1,85 @@
+from datetime import datetime, timedelta, timezone
+
+from app.exceptions.view_log import ViewTimeseriesRangeError
 from app.repositories.view_log import ViewLogRepository
+from app.schemas.view_log import ViewGranularity
+from app.services.view_ingestion import ViewIngestionPipeline
+from app.utils.singleflight import SingleFlight
+
+# Shared by all requests of the worker, so concurrent stats polls of one link run one count.
+view_counts = SingleFlight("view_count")
+
+BUCKET_STEPS = {
+    ViewGranularity.minute: timedelta(minutes=1),
+    ViewGranularity.hour: timedelta(hours=1),
+    ViewGranularity.day: timedelta(days=1),
+}
+
+
+def truncate_to_bucket(value: datetime, granularity: ViewGranularity) -> datetime:
+    """Start of the UTC bucket containing `value`; naive datetimes are taken as UTC."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    value = value.astimezone(timezone.utc).replace(second=0, microsecond=0)
+    if granularity is ViewGranularity.minute:
+        return value
+    value = value.replace(minute=0)
+    if granularity is ViewGranularity.hour:
+        return value
+    return value.replace(hour=0)
 
 
 class ViewLogService:
-    def __init__(self, repo: ViewLogRepository | None = None, session=None):
+    def __init__(
+        self,
+        repo: ViewLogRepository | None = None,
+        session=None,
+        pipeline: ViewIngestionPipeline | None = None,
+    ):
         if repo:
             self.repo = repo
         else:
             if session is None:
                 raise ValueError("Session must be provided if repo is not given")
             self.repo = ViewLogRepository(session)
+        self.pipeline = pipeline
 
     async def log_view(self, shorturl_id: int):
+        if self.pipeline is not None and self.pipeline.is_running:
+            return await self.pipeline.submit(shorturl_id)
         return await self.repo.create_view_log(shorturl_id)
 
     async def get_view_count(self, shorturl_id: int) -> int:
-        return await self.repo.get_view_count(shorturl_id)
+        return await view_counts.do(shorturl_id, lambda: self.repo.get_view_count(shorturl_id))
+
+    async def get_view_timeseries(
+        self,
+        shorturl_id: int,
+        granularity: ViewGranularity,
+        start: datetime,
+        end: datetime,
+        max_points: int,
+    ) -> list[tuple[datetime, int]]:
+        """
+        Zero-filled view counts per bucket, read from the rollups only.
+
+        `start` is aligned down to its bucket and the range is half-open, so the cost depends
+        on the number of buckets, not on the number of views. Views that have not been rolled
+        up yet are not included.
+        """
+        step = BUCKET_STEPS[granularity]
+        start = truncate_to_bucket(start, granularity)
+        if end.tzinfo is None:
+            end = end.replace(tzinfo=timezone.utc)
+        if end <= start:
+            raise ViewTimeseriesRangeError("'to' must be after 'from'")
+        if (end - start) / step > max_points:
+            raise ViewTimeseriesRangeError(f"Range covers more than {max_points} {granularity.value} buckets")
+
+        counts = dict(await self.repo.get_view_buckets(shorturl_id, granularity.value, start, end))
+        points = []
+        bucket = start
+        while bucket < end:
+            points.append((bucket, counts.get(bucket, 0)))
+            bucket += step
+        return points
@@ -0,0 +1,138 @@
+import asyncio
+import gzip
+import os
+import re
+from datetime import datetime, timezone
+from logging import getLogger
+from pathlib import Path
+from typing import Callable
+
+from app.core.setting import settings
+from app.db.session import async_session_factory
+from app.repositories.view_log import ViewLogRepository
+
+logger = getLogger(__name__)
+
+PARTITION_NAME = re.compile(r"^urlviewlog_p(\d{4})_(\d{2})$")
+
+
+def month_start(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"urlviewlog_p{month.year:04d}_{month.month:02d}"
+
+
+def partition_month(name: str) -> datetime | None:
+    """Month a partition named by `partition_name` covers; None for any other partition (e.g. the default one)."""
+    match = PARTITION_NAME.match(name)
+    if match is None:
+        return None
+    return datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)
+
+
+class ViewLogPartitionManager:
+    """
+    Keeps the monthly `urlviewlog` partitions ahead of time and archives expired ones.
+
+    Each run creates the partitions for the current month and the next `premake_months`.
+    With `retention_months` set, partitions that ended more than that many months before
+    the current month are exported to `archive_dir` as gzipped CSV, then detached and
+    dropped, so purging history never deletes rows one by one. The scheduler runs it on
+    one worker as the `view_log_partitions` job.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable,
+        premake_months: int = 3,
+        retention_months: int = 0,
+        archive_dir: str = "archive",
+    ):
+        self.session_factory = session_factory
+        self.premake_months = premake_months
+        self.retention_months = retention_months
+        self.archive_dir = Path(archive_dir)
+
+    async def ensure_partitions(self, now: datetime | None = None) -> list[str]:
+        """Create any missing partition from the current month up to `premake_months` ahead."""
+        current = month_start(now or datetime.now(timezone.utc))
+        months = [add_months(current, offset) for offset in range(self.premake_months + 1)]
+        partitions = [(partition_name(month), month, add_months(month, 1)) for month in months]
+        async with self.session_factory() as session:
+            created = await ViewLogRepository(session).create_partitions(partitions)
+        for name, moved in created.items():
+            if moved:
+                logger.warning(
+                    "Created view log partition %s late: moved %d views out of the default partition", name, moved
+                )
+            else:
+                logger.info("Created view log partition %s", name)
+        return list(created)
+
+    async def archive_expired(self, now: datetime | None = None) -> list[Path]:
+        """Export, detach and drop every partition past the retention window; returns the archive files."""
+        if self.retention_months <= 0:
+            return []
+        cutoff = add_months(month_start(now or datetime.now(timezone.utc)), -self.retention_months)
+        async with self.session_factory() as session:
+            names = await ViewLogRepository(session).list_partitions()
+
+        archived = []
+        for name in names:
+            month = partition_month(name)
+            if month is None or add_months(month, 1) > cutoff:
+                continue
+            path = await self._archive_partition(name)
+            if path is not None:
+                archived.append(path)
+        return archived
+
+    async def _archive_partition(self, name: str) -> Path | None:
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        path = self.archive_dir / f"{name}.csv.gz"
+        partial = path.with_name(f"{path.name}.{os.getpid()}.partial")
+        archive = await asyncio.to_thread(gzip.open, partial, "wb")
+
+        async def write(chunk: bytes):
+            await asyncio.to_thread(archive.write, chunk)
+
+        exported = False
+        try:
+            async with self.session_factory() as session:
+                exported = await ViewLogRepository(session).export_partition(name, write)
+        finally:
+            await asyncio.to_thread(archive.close)
+            if not exported:
+                partial.unlink(missing_ok=True)
+        if not exported:
+            logger.info("Skipped archiving %s: it has pending views or maintenance runs elsewhere", name)
+            return None
+
+        # The partition is only dropped once its complete archive is in place.
+        os.replace(partial, path)
+        async with self.session_factory() as session:
+            dropped = await ViewLogRepository(session).drop_partition(name)
+        if dropped:
+            logger.info("Archived view log partition %s to %s", name, path)
+        return path if dropped else None
+
+    async def run_once(self, now: datetime | None = None) -> int:
+        """One maintenance pass; returns the number of partitions created and archived."""
+        created = await self.ensure_partitions(now)
+        archived = await self.archive_expired(now)
+        return len(created) + len(archived)
+
+
+view_log_partition_manager = ViewLogPartitionManager(
+    session_factory=async_session_factory,
+    premake_months=settings.VIEW_LOG_PARTITION_PREMAKE_MONTHS,
+    retention_months=settings.VIEW_LOG_RETENTION_MONTHS,
+    archive_dir=settings.VIEW_LOG_ARCHIVE_DIR,
+)
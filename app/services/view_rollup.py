@@ -0,0 +1,39 @@
+from typing import Callable
+
+from app.core.setting import settings
+from app.db.session import async_session_factory
+from app.repositories.view_log import ViewLogRepository
+
+
+class ViewRollupWorker:
+    """
+    Folds unprocessed `URLViewLog` rows into `ShortURLViewCounter`; the scheduler runs it
+    every VIEW_ROLLUP_INTERVAL seconds as the `view_rollup` job.
+
+    Each batch locks its rows with SKIP LOCKED, so folds never count a view twice. The job
+    is a singleton all the same: concurrent folds would contend for the counter and bucket
+    rows of the same popular links.
+    """
+
+    def __init__(self, session_factory: Callable, batch_size: int = 10_000):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+
+    async def run_once(self, max_batches: int | None = None) -> int:
+        """Fold batches until the backlog is empty (or `max_batches` ran); returns the number of views folded."""
+        total = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            async with self.session_factory() as session:
+                folded = await ViewLogRepository(session).fold_unprocessed_views(self.batch_size)
+            total += folded
+            batches += 1
+            if folded < self.batch_size:
+                break
+        return total
+
+
+view_rollup_worker = ViewRollupWorker(
+    session_factory=async_session_factory,
+    batch_size=settings.VIEW_ROLLUP_BATCH_SIZE,
+)
@@ -0,0 +1,128 @@
+import fcntl
+import mmap
+import os
+import struct
+from hashlib import blake2b
+from math import ceil, log
+from typing import Iterable
+
+MAGIC = b"SCBF"
+VERSION = 1
+# magic, version, hashes, bits, count, watermark; padded so the bit array starts aligned.
+HEADER = struct.Struct("<4sHHQQQ")
+HEADER_SIZE = 64
+
+
+def bloom_parameters(capacity: int, error_rate: float) -> tuple[int, int]:
+    """(bits, hashes) of the smallest filter holding `capacity` keys at `error_rate` false positives."""
+    bits = max(8, ceil(-capacity * log(error_rate) / log(2) ** 2))
+    bits = (bits + 7) // 8 * 8
+    hashes = max(1, round(bits / capacity * log(2)))
+    return bits, hashes
+
+
+class BloomFilter:
+    """
+    Bloom filter over strings, kept in one flat buffer: a small header followed by the bits.
+
+    The buffer is either a private bytearray or a shared mmap of a file, so processes that
+    open the same file see each other's additions. Additions to a file-backed filter hold
+    an exclusive flock, as setting a bit rewrites its whole byte. `watermark` is a spare
+    header field for the owner to record how far the filter is up to date.
+    """
+
+    def __init__(self, buffer, fd: int | None = None):
+        magic, version, hashes, bits, _, _ = HEADER.unpack_from(buffer)
+        if magic != MAGIC or version != VERSION or len(buffer) < HEADER_SIZE + bits // 8:
+            raise ValueError("Not a bloom filter buffer")
+        self.buffer = buffer
+        self.hashes = hashes
+        self.bits = bits
+        self._fd = fd
+
+    @classmethod
+    def create(cls, capacity: int, error_rate: float, path: str | None = None) -> "BloomFilter":
+        bits, hashes = bloom_parameters(capacity, error_rate)
+        size = HEADER_SIZE + bits // 8
+        if path is None:
+            buffer = bytearray(size)
+            HEADER.pack_into(buffer, 0, MAGIC, VERSION, hashes, bits, 0, 0)
+            return cls(buffer)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        os.ftruncate(fd, size)
+        buffer = mmap.mmap(fd, size)
+        HEADER.pack_into(buffer, 0, MAGIC, VERSION, hashes, bits, 0, 0)
+        return cls(buffer, fd)
+
+    @classmethod
+    def open(cls, path: str) -> "BloomFilter":
+        fd = os.open(path, os.O_RDWR)
+        try:
+            return cls(mmap.mmap(fd, 0), fd)
+        except (ValueError, struct.error):
+            os.close(fd)
+            raise ValueError(f"{path} is not a bloom filter file")
+
+    @property
+    def count(self) -> int:
+        return HEADER.unpack_from(self.buffer)[4]
+
+    @property
+    def watermark(self) -> int:
+        return HEADER.unpack_from(self.buffer)[5]
+
+    @watermark.setter
+    def watermark(self, value: int):
+        struct.pack_into("<Q", self.buffer, 24, value)
+
+    def _positions(self, key: str):
+        digest = blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        bits = self.bits
+        return [(h1 + i * h2) % bits for i in range(self.hashes)]
+
+    def __contains__(self, key: str) -> bool:
+        buffer = self.buffer
+        for position in self._positions(key):
+            if not buffer[HEADER_SIZE + (position >> 3)] & (1 << (position & 7)):
+                return False
+        return True
+
+    def add_many(self, keys: Iterable[str]) -> int:
+        """Add `keys`; returns how many were new, which is what `count` keeps track of."""
+        positions = [self._positions(key) for key in keys]
+        if not positions:
+            return 0
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        added = 0
+        try:
+            buffer = self.buffer
+            for key_positions in positions:
+                new = False
+                for position in key_positions:
+                    index, mask = HEADER_SIZE + (position >> 3), 1 << (position & 7)
+                    if not buffer[index] & mask:
+                        buffer[index] |= mask
+                        new = True
+                added += new
+            struct.pack_into("<Q", buffer, 16, self.count + added)
+        finally:
+            if self._fd is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return added
+
+    def add(self, key: str):
+        self.add_many((key,))
+
+    def flush(self):
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.flush()
+
+    def close(self):
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
@@ -1,7 +1,72 @@
 import random
 import string
+from hashlib import blake2b
+
+BASE62_ALPHABET = string.digits + string.ascii_letters
+BASE = len(BASE62_ALPHABET)
+
+# Codes that would be shadowed by application routes matched before `/{short_code}`.
+RESERVED_SHORT_CODES = frozenset({"docs", "redoc", "metrics"})
 
 
 def generate_short_code(length: int = 6) -> str:
     chars = string.ascii_letters + string.digits
     return "".join(random.choices(chars, k=length))
+
+
+def base62_encode(value: int, length: int) -> str:
+    """Encode a non-negative integer as a base62 string left-padded to `length` characters."""
+    chars = []
+    while value:
+        value, remainder = divmod(value, BASE)
+        chars.append(BASE62_ALPHABET[remainder])
+    return "".join(reversed(chars)).rjust(length, BASE62_ALPHABET[0])
+
+
+def code_length_for(value: int, min_length: int) -> int:
+    """Smallest code length, at least `min_length`, whose keyspace contains `value`."""
+    length = min_length
+    while value >= BASE**length:
+        length += 1
+    return length
+
+
+def code_length_for_population(population: int, min_length: int, max_load: float = 0.01) -> int:
+    """Smallest code length that keeps `population` codes under `max_load` of the keyspace."""
+    length = min_length
+    while population > max_load * BASE**length:
+        length += 1
+    return length
+
+
+def _feistel(value: int, half_bits: int, key: bytes, rounds: int = 4) -> int:
+    mask = (1 << half_bits) - 1
+    left, right = value >> half_bits, value & mask
+    for round_number in range(rounds):
+        digest = blake2b(right.to_bytes(16, "big") + bytes((round_number,)), key=key, digest_size=8).digest()
+        left, right = right, left ^ (int.from_bytes(digest, "big") & mask)
+    return (left << half_bits) | right
+
+
+def permute(value: int, length: int, key: bytes) -> int:
+    """
+    Keyed bijection on [0, 62**length) so that sequential ids do not produce guessable codes.
+
+    A Feistel network over the smallest even bit width covering the keyspace is applied
+    repeatedly (cycle walking) until the result falls back inside the keyspace.
+    This is obfuscation, not encryption.
+    """
+    domain = BASE**length
+    half_bits = ((domain - 1).bit_length() + 1) // 2
+    while True:
+        value = _feistel(value, half_bits, key)
+        if value < domain:
+            return value
+
+
+def encode_short_code(value: int, min_length: int, key: bytes | None = None) -> str:
+    """Turn a unique integer into a unique short code; longer codes are used as `value` grows."""
+    length = code_length_for(value, min_length)
+    if key:
+        value = permute(value, length, key)
+    return base62_encode(value, length)
@@ -0,0 +1,48 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+from app.core.metrics import registry
+
+T = TypeVar("T")
+
+SINGLE_FLIGHT_CALLS = registry.counter(
+    "single_flight_calls", "Coalesced calls per flight, by whether they ran or joined one", ("flight", "role")
+)
+
+
+class SingleFlight:
+    """
+    Concurrent calls with the same key share one in-flight call instead of each running their own.
+
+    The first caller runs `func`; callers arriving before it finishes await the same result
+    or exception. Nothing is remembered afterwards, so this coalesces, it does not cache.
+    If the first caller is cancelled (e.g. its client went away), the call is cancelled
+    with it and the callers that joined start over, one of them running `func` again.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: dict[Hashable, asyncio.Task] = {}
+        self._leaders = SINGLE_FLIGHT_CALLS.labels(name, "leader")
+        self._followers = SINGLE_FLIGHT_CALLS.labels(name, "follower")
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        while True:
+            task = self._calls.get(key)
+            if task is None:
+                task = asyncio.ensure_future(func())
+                self._calls[key] = task
+                task.add_done_callback(lambda _, key=key, task=task: self._forget(key, task))
+                self._leaders.inc()
+                return await task
+
+            self._followers.inc()
+            try:
+                return await asyncio.shield(task)
+            except asyncio.CancelledError:
+                if not task.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
@@ -1,4 +1,134 @@
+import re
+from functools import lru_cache
+from hashlib import sha256
+from typing import Iterable
+from urllib.parse import quote, unquote, urlsplit, urlunsplit
+
+from app.core.setting import settings
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+TRACKING_PARAMS = frozenset(
+    {
+        "fbclid",
+        "gclid",
+        "dclid",
+        "gbraid",
+        "wbraid",
+        "msclkid",
+        "mc_cid",
+        "mc_eid",
+        "igshid",
+        "yclid",
+        "_hsenc",
+        "_hsmi",
+    }
+)
+TRACKING_PARAM_PREFIXES = ("utm_",)
+
+_UNRESERVED = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~")
+_PERCENT_ESCAPE = re.compile(r"%([0-9A-Fa-f]{2})")
+_NEEDS_QUOTING = re.compile(r"[^A-Za-z0-9/:@!$&'()*+,;=\-._~?]")
+# Everything that may appear unescaped in a path or query, plus "%" so existing escapes survive.
+_PATH_SAFE = "/:@!$&'()*+,;=-._~%"
+_QUERY_SAFE = _PATH_SAFE + "?"
+
+
+def _normalize_escapes(value: str, safe: str) -> str:
+    """Decode escaped unreserved characters, uppercase the remaining escapes and escape what must be."""
+    if "%" not in value and value.isascii() and not _NEEDS_QUOTING.search(value):
+        return value
+
+    def replace(match: re.Match) -> str:
+        char = chr(int(match.group(1), 16))
+        return char if char in _UNRESERVED else "%" + match.group(1).upper()
+
+    return quote(_PERCENT_ESCAPE.sub(replace, value), safe=safe)
+
+
+def _normalize_host(host: str) -> str:
+    try:
+        return host.encode("idna").decode("ascii")
+    except UnicodeError:
+        return host
+
+
+def _is_tracking_param(pair: str) -> bool:
+    key = unquote(pair.split("=", 1)[0]).lower()
+    return key in TRACKING_PARAMS or key.startswith(TRACKING_PARAM_PREFIXES)
+
+
+def canonicalize_url(url: str, sort_query: bool = False, strip_tracking: bool = False) -> str:
+    """
+    Canonical form of `url`, so equivalent spellings of a link map to one row and one cache key.
+
+    Adds a missing scheme, lowercases the scheme and host, IDNA-encodes the host, drops the
+    default port, adds the root path and normalizes percent-encoding. Optionally strips
+    known tracking parameters and sorts the query parameters by name. Raises ValueError
+    for a port that is not a number in 0-65535.
+    """
+    url = url.strip()
+    if not url.lower().startswith(("http://", "https://")):
+        url = "http://" + url
+
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+
+    host = _normalize_host(parts.hostname or "")
+    if ":" in host:
+        host = f"[{host}]"
+    try:
+        port = parts.port
+    except ValueError:
+        # Dropping it would silently point the link somewhere else.
+        raise ValueError(f"Invalid port in URL {url!r}") from None
+    netloc = host if port is None or port == DEFAULT_PORTS.get(scheme) else f"{host}:{port}"
+    if parts.username is not None:
+        userinfo = parts.username if parts.password is None else f"{parts.username}:{parts.password}"
+        netloc = f"{userinfo}@{netloc}"
+
+    path = _normalize_escapes(parts.path, _PATH_SAFE) or "/"
+
+    query = parts.query
+    if query:
+        pairs = [pair for pair in _normalize_escapes(query, _QUERY_SAFE).split("&") if pair]
+        if strip_tracking:
+            pairs = [pair for pair in pairs if not _is_tracking_param(pair)]
+        if sort_query:
+            pairs.sort(key=lambda pair: pair.split("=", 1)[0])
+        query = "&".join(pairs)
+
+    return urlunsplit((scheme, netloc, path, query, parts.fragment))
+
+
+@lru_cache(maxsize=settings.URL_NORMALIZE_CACHE_SIZE)
+def _normalize_url_cached(url: str, sort_query: bool, strip_tracking: bool) -> str:
+    return canonicalize_url(url, sort_query=sort_query, strip_tracking=strip_tracking)
+
+
 def normalize_url(url: str) -> str:
-    if not url.startswith(("http://", "https://")):
-        return "http://" + url
-    return url
+    """Memoized `canonicalize_url` with the options configured in `Settings`."""
+    return _normalize_url_cached(url, settings.URL_SORT_QUERY_PARAMS, settings.URL_STRIP_TRACKING_PARAMS)
+
+
+def normalize_urls(urls: Iterable[str]) -> list[str]:
+    """Batch form of `normalize_url`; repeated URLs in the batch are only canonicalized once."""
+    sort_query = settings.URL_SORT_QUERY_PARAMS
+    strip_tracking = settings.URL_STRIP_TRACKING_PARAMS
+    seen: dict[str, str] = {}
+    normalized = []
+    for url in urls:
+        canonical = seen.get(url)
+        if canonical is None:
+            canonical = seen[url] = _normalize_url_cached(url, sort_query, strip_tracking)
+        normalized.append(canonical)
+    return normalized
+
+
+def normalize_url_cache_info():
+    return _normalize_url_cached.cache_info()
+
+
+def url_digest(url: str) -> bytes:
+    """Fixed-width SHA-256 digest of an already normalized URL, used to deduplicate long URLs."""
+    return sha256(url.encode("utf-8")).digest()
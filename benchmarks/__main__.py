@@ -0,0 +1,116 @@
+"""
+Benchmarks for the shortener hot paths.
+
+    python -m benchmarks                       # HTTP + micro, against the configured Postgres
+    python -m benchmarks http --standin        # HTTP against the in-memory stand-in
+    python -m benchmarks micro
+    python -m benchmarks --compare before.json after.json
+
+The database settings are read from the environment / .env like the app itself. Results
+are written as JSON (with the git commit) so two runs can be diffed with --compare.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:  # noqa
+        return None
+
+
+def _flatten(data: dict, prefix: str = "") -> dict[str, float]:
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)):
+            flat[name] = value
+    return flat
+
+
+def compare(before_path: str, after_path: str):
+    before = _flatten(json.loads(Path(before_path).read_text())["results"])
+    after = _flatten(json.loads(Path(after_path).read_text())["results"])
+    for name in sorted(before.keys() & after.keys()):
+        if not name.endswith(("rps", "p50_ms", "p95_ms", "p99_ms", "ns_per_op")):
+            continue
+        old, new = before[name], after[name]
+        change = (new - old) / old * 100 if old else 0.0
+        print(f"{name:<60} {old:>12.2f} -> {new:>12.2f} ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("suite", nargs="?", choices=["all", "http", "micro"], default="all")
+    parser.add_argument("--standin", action="store_true", help="use the in-memory stand-in instead of Postgres")
+    parser.add_argument("--standin-latency-ms", type=float, default=0.0, help="simulated database round trip")
+    parser.add_argument("--links", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=2_000, help="requests per endpoint and concurrency level")
+    parser.add_argument("--concurrency", default="1,10,50", help="comma separated concurrency levels")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent for link popularity")
+    parser.add_argument("--loops", type=int, default=20_000, help="iterations per micro-benchmark")
+    parser.add_argument("--output", help="results file (default: bench-<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="diff two results files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    results: dict = {}
+    if args.suite in ("all", "micro"):
+        from benchmarks.micro import run_micro_benchmarks  # noqa: PLC0415
+
+        results["micro"] = run_micro_benchmarks(args.loops)
+
+    if args.suite in ("all", "http"):
+        from app.main import create_app  # noqa: PLC0415
+        from benchmarks.http import run_http_benchmarks  # noqa: PLC0415
+        from benchmarks.standin import install_standin  # noqa: PLC0415
+
+        run = run_http_benchmarks(
+            create_app(),
+            links=args.links,
+            requests_per_level=args.requests,
+            concurrency_levels=tuple(int(level) for level in args.concurrency.split(",")),
+            zipf_s=args.zipf,
+        )
+        if args.standin:
+            with install_standin(latency=args.standin_latency_ms / 1000):
+                results["http"] = asyncio.run(run)
+        else:
+            results["http"] = asyncio.run(run)
+
+    commit = _git_commit()
+    output = Path(args.output or f"bench-{commit or 'local'}.json")
+    output.write_text(
+        json.dumps(
+            {
+                "commit": commit,
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "standin": args.standin,
+                "args": vars(args),
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+    print(f"results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
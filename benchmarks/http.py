@@ -0,0 +1,106 @@
+"""
+End-to-end throughput and latency of the HTTP hot paths.
+
+The FastAPI `app` runs in-process behind httpx's ASGI transport, including its lifespan, so
+the numbers cover middleware, routing, services, cache and database access but no network
+or server overhead. Link popularity follows a Zipf distribution.
+"""
+
+import asyncio
+import random
+from itertools import accumulate
+from time import perf_counter
+from uuid import uuid4
+
+import httpx
+
+from benchmarks.stats import summarize
+
+
+class ZipfSampler:
+    """Picks items so that the k-th most popular one is chosen with weight 1 / k**s."""
+
+    def __init__(self, items: list[str], s: float, seed: int):
+        self.items = items
+        self.cum_weights = list(accumulate(1 / rank**s for rank in range(1, len(items) + 1)))
+        self.random = random.Random(seed)
+
+    def sample(self) -> str:
+        return self.random.choices(self.items, cum_weights=self.cum_weights)[0]
+
+
+async def _seed_links(client: httpx.AsyncClient, count: int, chunk_size: int = 1_000) -> list[str]:
+    codes: list[str] = []
+    run_id = uuid4().hex[:8]
+    for start in range(0, count, chunk_size):
+        payload = [
+            {"original_url": f"https://bench.example.com/{run_id}/{index}"}
+            for index in range(start, min(start + chunk_size, count))
+        ]
+        response = await client.post("/shorten/batch", json=payload)
+        response.raise_for_status()
+        codes.extend(item["short_code"] for item in response.json())
+    return codes
+
+
+async def _run_level(client: httpx.AsyncClient, make_request, expected_status: int, total: int, concurrency: int):
+    latencies: list[float] = []
+    errors = 0
+    remaining = total
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            method, url, kwargs = make_request()
+            started = perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(perf_counter() - started)
+            if response.status_code != expected_status:
+                errors += 1
+
+    started = perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, perf_counter() - started, errors)
+
+
+async def run_http_benchmarks(
+    app,
+    links: int = 10_000,
+    requests_per_level: int = 2_000,
+    concurrency_levels: tuple[int, ...] = (1, 10, 50),
+    zipf_s: float = 1.1,
+    seed: int = 42,
+) -> dict:
+    results: dict[str, dict] = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            codes = await _seed_links(client, links)
+            sampler = ZipfSampler(codes, zipf_s, seed)
+            run_id = uuid4().hex[:8]
+            counter = iter(range(10**12))
+
+            scenarios = {
+                "POST /shorten": (
+                    lambda: (
+                        "POST",
+                        "/shorten",
+                        {"json": {"original_url": f"https://bench.example.com/new/{run_id}/{next(counter)}"}},
+                    ),
+                    200,
+                ),
+                "GET /{short_code}": (lambda: ("GET", f"/{sampler.sample()}", {}), 302),
+                "GET /{short_code}/stats": (lambda: ("GET", f"/{sampler.sample()}/stats", {}), 200),
+            }
+            for name, (make_request, expected_status) in scenarios.items():
+                results[name] = {}
+                for concurrency in concurrency_levels:
+                    summary = await _run_level(client, make_request, expected_status, requests_per_level, concurrency)
+                    results[name][f"c{concurrency}"] = summary
+                    print(
+                        f"{name:<26} c={concurrency:<4} {summary['rps']:>9.0f} req/s  "
+                        f"p50={summary['p50_ms']:.2f}ms p95={summary['p95_ms']:.2f}ms p99={summary['p99_ms']:.2f}ms "
+                        f"errors={summary['errors']}"
+                    )
+    return results
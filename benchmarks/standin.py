@@ -0,0 +1,226 @@
+"""
+In-memory stand-in for Postgres.
+
+Replaces the repository methods with dict-backed versions so the HTTP benchmarks can run
+without a database. An optional per-call delay approximates a database round trip.
+What is measured is the application's own overhead (routing, services, cache, middleware),
+not query plans.
+"""
+
+import asyncio
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from itertools import count
+
+from app.cache.short_url import CachedShortURL
+from app.db.models import OutboxEvent, ShortURL, URLViewLog
+from app.repositories.outbox import OutboxRepository
+from app.repositories.short_url import ShortURLRepository
+from app.repositories.view_log import ViewLogRepository
+from app.services.redirect import RedirectResolver
+
+
+class InMemoryStore:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.by_code: dict[str, ShortURL] = {}
+        self.by_url: dict[str, ShortURL] = {}
+        self.by_id: dict[int, ShortURL] = {}
+        self.views: Counter[int] = Counter()
+        self.outbox: dict[int, OutboxEvent] = {}
+        self.event_ids = count(1)
+        self.ids = count(1)
+        self.sequence = count(0)
+        self.queries = 0
+
+    async def round_trip(self):
+        self.queries += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def add(self, original_url: str, short_code: str, expires_at=None, max_clicks=None) -> ShortURL | None:
+        has_lifetime = expires_at is not None or max_clicks is not None
+        if short_code in self.by_code or (not has_lifetime and original_url in self.by_url):
+            return None
+        short_url = ShortURL(
+            id=next(self.ids),
+            original_url=original_url,
+            short_code=short_code,
+            created_at=datetime.now(timezone.utc),
+            expires_at=expires_at,
+            max_clicks=max_clicks,
+        )
+        self.by_code[short_code] = self.by_id[short_url.id] = short_url
+        if not has_lifetime:
+            self.by_url[original_url] = short_url
+        return short_url
+
+
+def _short_url_methods(store: InMemoryStore) -> dict:
+    async def get_by_original_url(self, original_url):
+        await store.round_trip()
+        return store.by_url.get(original_url)
+
+    async def get_by_original_urls(self, original_urls):
+        await store.round_trip()
+        return {url: store.by_url[url] for url in original_urls if url in store.by_url}
+
+    async def get_by_code(self, short_code):
+        await store.round_trip()
+        return store.by_code.get(short_code)
+
+    async def get_most_viewed(self, limit):
+        await store.round_trip()
+        return [store.by_id[shorturl_id] for shorturl_id, _ in store.views.most_common(limit)]
+
+    async def iter_codes(self, from_id=1, batch_size=10_000):
+        await store.round_trip()
+        rows = sorted((short_url_id, short_url.short_code) for short_url_id, short_url in store.by_id.items())
+        rows = [row for row in rows if row[0] >= from_id]
+        for start in range(0, len(rows), batch_size):
+            yield rows[start : start + batch_size]
+
+    async def get_existing_codes(self, short_codes):
+        await store.round_trip()
+        return {code for code in short_codes if code in store.by_code}
+
+    async def estimate_count(self):
+        await store.round_trip()
+        return len(store.by_code)
+
+    async def get_code_block_size(self):
+        await store.round_trip()
+        return 1000
+
+    async def lease_code_block(self):
+        await store.round_trip()
+        return next(store.sequence) * 1000 + 1
+
+    async def create(self, original_url, short_code, expires_at=None, max_clicks=None):
+        await store.round_trip()
+        short_url = store.add(original_url, short_code, expires_at, max_clicks)
+        if short_url is not None and self.outbox is not None:
+            await self.outbox.add_created([short_url])
+        return short_url
+
+    async def bulk_create(self, rows):
+        await store.round_trip()
+        created = [short_url for short_url in (store.add(url, code) for url, code in rows) if short_url is not None]
+        if self.outbox is not None:
+            await self.outbox.add_created(created)
+        return created
+
+    async def delete_expired(self, before, batch_size, archive=None):
+        await store.round_trip()
+        expired = [url for url in store.by_id.values() if url.expires_at is not None and url.expires_at <= before]
+        expired = sorted(expired, key=lambda short_url: short_url.expires_at)[:batch_size]
+        deleted = [
+            short_url.model_dump(exclude={"original_url_hash"}) | {"view_count": store.views.pop(short_url.id, 0)}
+            for short_url in expired
+        ]
+        for short_url in expired:
+            del store.by_id[short_url.id], store.by_code[short_url.short_code]
+        if archive is not None and deleted:
+            await archive(deleted)
+        return deleted
+
+    return {name: value for name, value in locals().items() if name != "store"}
+
+
+def _view_log_methods(store: InMemoryStore) -> dict:
+    async def create_view_log(self, shorturl_id):
+        await store.round_trip()
+        store.views[shorturl_id] += 1
+        view_log = URLViewLog(id=sum(store.views.values()), shorturl_id=shorturl_id)
+        if self.outbox is not None:
+            await self.outbox.add_viewed([(shorturl_id, view_log.viewed_at)])
+        return view_log
+
+    async def bulk_create_view_logs(self, views):
+        await store.round_trip()
+        for shorturl_id, _ in views:
+            store.views[shorturl_id] += 1
+        if self.outbox is not None:
+            await self.outbox.add_viewed(views)
+        return len(views)
+
+    async def fold_unprocessed_views(self, batch_size):
+        await store.round_trip()
+        # Views are counted as they are logged; what is left is expiring links that used up their clicks.
+        now = datetime.now(timezone.utc)
+        for short_url in store.by_id.values():
+            if short_url.max_clicks is None or store.views[short_url.id] < short_url.max_clicks:
+                continue
+            if short_url.expires_at is None or short_url.expires_at > now:
+                short_url.expires_at = now
+        return 0
+
+    async def get_view_count(self, shorturl_id):
+        await store.round_trip()
+        return store.views[shorturl_id]
+
+    async def get_view_buckets(self, shorturl_id, granularity, start, end):
+        await store.round_trip()
+        return []
+
+    async def list_partitions(self):
+        await store.round_trip()
+        return []
+
+    async def create_partitions(self, partitions):
+        await store.round_trip()
+        return {}
+
+    return {name: value for name, value in locals().items() if name != "store"}
+
+
+def _outbox_methods(store: InMemoryStore) -> dict:
+    async def add(self, events):
+        for event_type, payload, created_at in events:
+            event = OutboxEvent(id=next(store.event_ids), event_type=event_type, payload=payload, created_at=created_at)
+            store.outbox[event.id] = event
+
+    async def claim_batch(self, limit):
+        await store.round_trip()
+        return [store.outbox[event_id] for event_id in sorted(store.outbox)[:limit]]
+
+    async def delete(self, ids):
+        await store.round_trip()
+        for event_id in ids:
+            store.outbox.pop(event_id, None)
+
+    return {name: value for name, value in locals().items() if name != "store"}
+
+
+def _redirect_methods(store: InMemoryStore) -> dict:
+    async def fetch(self, short_code):
+        await store.round_trip()
+        short_url = store.by_code.get(short_code)
+        if short_url is None:
+            return None
+        return CachedShortURL.from_model(short_url, clicks=store.views[short_url.id] if short_url.max_clicks else None)
+
+    return {name: value for name, value in locals().items() if name != "store"}
+
+
+@contextmanager
+def install_standin(latency: float = 0.0):
+    """Patch the repositories to use an `InMemoryStore` for the duration of the block."""
+    store = InMemoryStore(latency=latency)
+    patches = [
+        (ShortURLRepository, _short_url_methods(store)),
+        (ViewLogRepository, _view_log_methods(store)),
+        (OutboxRepository, _outbox_methods(store)),
+        (RedirectResolver, _redirect_methods(store)),
+    ]
+    originals = [(cls, {name: cls.__dict__[name] for name in methods}) for cls, methods in patches]
+    for cls, methods in patches:
+        for name, method in methods.items():
+            setattr(cls, name, method)
+    try:
+        yield store
+    finally:
+        for cls, methods in originals:
+            for name, method in methods.items():
+                setattr(cls, name, method)
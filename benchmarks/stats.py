@@ -0,0 +1,23 @@
+from math import ceil
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = max(ceil(fraction * len(sorted_values)) - 1, 0)
+    return sorted_values[index]
+
+
+def summarize(latencies: list[float], elapsed: float, errors: int = 0) -> dict:
+    """Throughput and latency percentiles (in milliseconds) for one benchmark run."""
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "rps": len(values) / elapsed if elapsed else 0.0,
+        "mean_ms": sum(values) / len(values) * 1000 if values else 0.0,
+        "p50_ms": percentile(values, 0.50) * 1000,
+        "p95_ms": percentile(values, 0.95) * 1000,
+        "p99_ms": percentile(values, 0.99) * 1000,
+        "max_ms": values[-1] * 1000 if values else 0.0,
+    }
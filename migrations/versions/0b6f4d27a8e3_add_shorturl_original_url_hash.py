@@ -0,0 +1,69 @@
+"""add shorturl original_url_hash
+
+Revision ID: 0b6f4d27a8e3
+Revises: e7a93c0b5f14
+Create Date: 2025-09-04 09:22:16.047381
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0b6f4d27a8e3"
+down_revision: Union[str, Sequence[str], None] = "e7a93c0b5f14"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 10_000
+
+# Same statement as ShortURLRepository.backfill_original_url_hashes: only the oldest row per
+# URL gets the digest, later duplicates keep NULL so the unique index can be built.
+BACKFILL_PAGE = sa.text(
+    """
+    WITH page AS (
+        SELECT id, original_url_hash IS NULL AS missing, sha256(convert_to(original_url, 'UTF8')) AS digest
+        FROM shorturl
+        WHERE id > :after_id
+        ORDER BY id
+        LIMIT :batch_size
+    ), candidates AS (
+        SELECT DISTINCT ON (digest) id, digest FROM page WHERE missing ORDER BY digest, id
+    ), updated AS (
+        UPDATE shorturl SET original_url_hash = candidates.digest
+        FROM candidates
+        WHERE shorturl.id = candidates.id
+        AND NOT EXISTS (SELECT 1 FROM shorturl AS other WHERE other.original_url_hash = candidates.digest)
+        RETURNING shorturl.id
+    )
+    SELECT (SELECT max(id) FROM page), (SELECT count(*) FROM updated)
+    """
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("shorturl", sa.Column("original_url_hash", sa.LargeBinary(), nullable=True))
+    # Plain index first so the NOT EXISTS check in the backfill stays cheap.
+    op.create_index("ix_shorturl_original_url_hash_backfill", "shorturl", ["original_url_hash"], unique=False)
+
+    connection = op.get_bind()
+    after_id = 0
+    while True:
+        last_id, _ = connection.execute(BACKFILL_PAGE, {"after_id": after_id, "batch_size": BACKFILL_BATCH_SIZE}).one()
+        if last_id is None:
+            break
+        after_id = last_id
+
+    op.drop_index("ix_shorturl_original_url_hash_backfill", table_name="shorturl")
+    op.create_index("ux_shorturl_original_url_hash", "shorturl", ["original_url_hash"], unique=True)
+    op.drop_index(op.f("ix_shorturl_original_url"), table_name="shorturl")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f("ix_shorturl_original_url"), "shorturl", ["original_url"], unique=False)
+    op.drop_index("ux_shorturl_original_url_hash", table_name="shorturl")
+    op.drop_column("shorturl", "original_url_hash")
@@ -0,0 +1,129 @@
+"""partition urlviewlog by viewed_at
+
+Revision ID: 3f8c21d6e9a4
+Revises: 0b6f4d27a8e3
+Create Date: 2025-09-05 10:12:38.604219
+
+"""
+
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f8c21d6e9a4"
+down_revision: Union[str, Sequence[str], None] = "0b6f4d27a8e3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Same naming and horizon as ViewLogPartitionManager, which keeps creating them from here on.
+PREMAKE_MONTHS = 3
+
+
+def _add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def _month_start(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    connection = op.get_bind()
+
+    # The old indexes go with the old table; drop them first so the names can be reused.
+    op.drop_index(
+        "ix_urlviewlog_unprocessed_id", table_name="urlviewlog", postgresql_where=sa.text("processed = false")
+    )
+    op.drop_index(op.f("ix_urlviewlog_shorturl_id"), table_name="urlviewlog")
+    op.drop_index(op.f("ix_urlviewlog_processed"), table_name="urlviewlog")
+    op.drop_index("is_shorturl_processed", table_name="urlviewlog")
+    op.rename_table("urlviewlog", "urlviewlog_unpartitioned")
+    op.execute(
+        "ALTER TABLE urlviewlog_unpartitioned RENAME CONSTRAINT urlviewlog_pkey TO urlviewlog_unpartitioned_pkey"
+    )
+
+    # The partition key has to be part of the primary key; ids move to bigint as the table no
+    # longer gets purged row by row.
+    op.execute("ALTER SEQUENCE urlviewlog_id_seq AS bigint")
+    op.execute(
+        """
+        CREATE TABLE urlviewlog (
+            id BIGINT NOT NULL DEFAULT nextval('urlviewlog_id_seq'),
+            shorturl_id INTEGER NOT NULL REFERENCES shorturl (id),
+            viewed_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            processed BOOLEAN NOT NULL,
+            PRIMARY KEY (id, viewed_at)
+        ) PARTITION BY RANGE (viewed_at)
+        """
+    )
+    op.execute("ALTER SEQUENCE urlviewlog_id_seq OWNED BY urlviewlog.id")
+
+    now = datetime.now(timezone.utc)
+    oldest = connection.execute(sa.text("SELECT min(viewed_at) FROM urlviewlog_unpartitioned")).scalar()
+    month = _month_start(oldest or now)
+    last = _add_months(_month_start(now), PREMAKE_MONTHS)
+    while month <= last:
+        end = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE urlviewlog_p{month.year:04d}_{month.month:02d} PARTITION OF urlviewlog "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{end.isoformat()}')"
+        )
+        month = end
+    # Catches views outside the premade months (e.g. clock skew) instead of failing the insert.
+    op.execute("CREATE TABLE urlviewlog_default PARTITION OF urlviewlog DEFAULT")
+
+    op.execute(
+        """
+        INSERT INTO urlviewlog (id, shorturl_id, viewed_at, processed)
+        SELECT id, shorturl_id, viewed_at, processed FROM urlviewlog_unpartitioned
+        """
+    )
+    op.drop_table("urlviewlog_unpartitioned")
+
+    # Only pending views are indexed beyond the primary key: the rollup scans them by id
+    # and view counts look them up per link.
+    op.create_index("ix_urlviewlog_unprocessed_id", "urlviewlog", ["id"], postgresql_where=sa.text("processed = false"))
+    op.create_index(
+        "ix_urlviewlog_unprocessed_shorturl_id",
+        "urlviewlog",
+        ["shorturl_id"],
+        postgresql_where=sa.text("processed = false"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_urlviewlog_unprocessed_shorturl_id", table_name="urlviewlog")
+    op.drop_index("ix_urlviewlog_unprocessed_id", table_name="urlviewlog")
+    op.rename_table("urlviewlog", "urlviewlog_partitioned")
+    op.execute("ALTER TABLE urlviewlog_partitioned RENAME CONSTRAINT urlviewlog_pkey TO urlviewlog_partitioned_pkey")
+
+    op.execute(
+        """
+        CREATE TABLE urlviewlog (
+            id BIGINT NOT NULL DEFAULT nextval('urlviewlog_id_seq'),
+            shorturl_id INTEGER NOT NULL REFERENCES shorturl (id),
+            viewed_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            processed BOOLEAN NOT NULL,
+            PRIMARY KEY (id)
+        )
+        """
+    )
+    op.execute("ALTER SEQUENCE urlviewlog_id_seq OWNED BY urlviewlog.id")
+    op.execute(
+        """
+        INSERT INTO urlviewlog (id, shorturl_id, viewed_at, processed)
+        SELECT id, shorturl_id, viewed_at, processed FROM urlviewlog_partitioned
+        """
+    )
+    op.drop_table("urlviewlog_partitioned")
+
+    op.create_index("is_shorturl_processed", "urlviewlog", ["shorturl_id", "processed"], unique=False)
+    op.create_index(op.f("ix_urlviewlog_processed"), "urlviewlog", ["processed"], unique=False)
+    op.create_index(op.f("ix_urlviewlog_shorturl_id"), "urlviewlog", ["shorturl_id"], unique=False)
+    op.create_index("ix_urlviewlog_unprocessed_id", "urlviewlog", ["id"], postgresql_where=sa.text("processed = false"))
@@ -0,0 +1,49 @@
+"""add shorturlviewcounter table
+
+Revision ID: 5d2b8e91c3af
+Revises: c4e1f0a7d2b9
+Create Date: 2025-09-02 16:41:08.902715
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5d2b8e91c3af"
+down_revision: Union[str, Sequence[str], None] = "c4e1f0a7d2b9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "shorturlviewcounter",
+        sa.Column("shorturl_id", sa.Integer(), nullable=False),
+        sa.Column("view_count", sa.BigInteger(), server_default="0", nullable=False),
+        sa.Column("updated_at", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["shorturl_id"],
+            ["shorturl.id"],
+        ),
+        sa.PrimaryKeyConstraint("shorturl_id"),
+    )
+    op.create_index(
+        "ix_urlviewlog_unprocessed_id",
+        "urlviewlog",
+        ["id"],
+        unique=False,
+        postgresql_where=sa.text("processed = false"),
+    )
+    # Existing view logs are folded by `python -m app.commands.backfill_view_counters`.
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_urlviewlog_unprocessed_id", table_name="urlviewlog", postgresql_where=sa.text("processed = false")
+    )
+    op.drop_table("shorturlviewcounter")
@@ -0,0 +1,30 @@
+"""add shorturl code sequence
+
+Revision ID: c4e1f0a7d2b9
+Revises: 9bcfec6163bc
+Create Date: 2025-09-02 10:14:32.518204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c4e1f0a7d2b9"
+down_revision: Union[str, Sequence[str], None] = "9bcfec6163bc"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Each nextval() leases a whole block of ids to one worker.
+CODE_BLOCK_SIZE = 1000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(f"CREATE SEQUENCE IF NOT EXISTS shorturl_code_seq AS bigint START WITH 1 INCREMENT BY {CODE_BLOCK_SIZE}")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP SEQUENCE IF EXISTS shorturl_code_seq")
@@ -0,0 +1,45 @@
+"""add shorturl expiry
+
+Revision ID: d8a2f61c4b37
+Revises: b5e0c9d3a716
+Create Date: 2025-09-10 11:03:47.290615
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d8a2f61c4b37"
+down_revision: Union[str, Sequence[str], None] = "b5e0c9d3a716"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Both columns are nullable without a default, so adding them does not rewrite the table,
+    # and the partial index starts out empty.
+    op.add_column("shorturl", sa.Column("expires_at", sa.TIMESTAMP(timezone=True), nullable=True))
+    op.add_column("shorturl", sa.Column("max_clicks", sa.Integer(), nullable=True))
+    op.create_index(
+        "ix_shorturl_expires_at", "shorturl", ["expires_at"], postgresql_where=sa.text("expires_at IS NOT NULL")
+    )
+    # Deleting an expired link would otherwise have every view log partition scanned for
+    # references, as views are only indexed by link while unprocessed. History now outlives
+    # its link and is purged with its partition.
+    op.drop_constraint("urlviewlog_shorturl_id_fkey", "urlviewlog", type_="foreignkey")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Views of links deleted by the expiry sweep have to go before the key can come back.
+    op.execute(
+        "DELETE FROM urlviewlog WHERE NOT EXISTS (SELECT 1 FROM shorturl WHERE shorturl.id = urlviewlog.shorturl_id)"
+    )
+    op.create_foreign_key("urlviewlog_shorturl_id_fkey", "urlviewlog", "shorturl", ["shorturl_id"], ["id"])
+    op.drop_index("ix_shorturl_expires_at", table_name="shorturl", postgresql_where=sa.text("expires_at IS NOT NULL"))
+    op.drop_column("shorturl", "max_clicks")
+    op.drop_column("shorturl", "expires_at")
@@ -0,0 +1,50 @@
+"""add shorturlviewbucket table
+
+Revision ID: e7a93c0b5f14
+Revises: 5d2b8e91c3af
+Create Date: 2025-09-03 11:05:47.331960
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlmodel
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e7a93c0b5f14"
+down_revision: Union[str, Sequence[str], None] = "5d2b8e91c3af"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "shorturlviewbucket",
+        sa.Column("shorturl_id", sa.Integer(), nullable=False),
+        sa.Column("granularity", sqlmodel.sql.sqltypes.AutoString(length=8), nullable=False),
+        sa.Column("bucket_start", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column("view_count", sa.BigInteger(), server_default="0", nullable=False),
+        sa.ForeignKeyConstraint(
+            ["shorturl_id"],
+            ["shorturl.id"],
+        ),
+        sa.PrimaryKeyConstraint("shorturl_id", "granularity", "bucket_start"),
+    )
+    # Views already folded into the counters are bucketed here; pending ones are bucketed by the rollup worker.
+    op.execute(
+        """
+        INSERT INTO shorturlviewbucket (shorturl_id, granularity, bucket_start, view_count)
+        SELECT v.shorturl_id, g.granularity, date_trunc(g.granularity, v.viewed_at, 'UTC'), count(*)
+        FROM urlviewlog AS v CROSS JOIN (VALUES ('minute'), ('hour'), ('day')) AS g (granularity)
+        WHERE v.processed = true
+        GROUP BY 1, 2, 3
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("shorturlviewbucket")
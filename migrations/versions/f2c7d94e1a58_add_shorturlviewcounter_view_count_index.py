@@ -0,0 +1,29 @@
+"""add shorturlviewcounter view_count index
+
+Revision ID: f2c7d94e1a58
+Revises: d8a2f61c4b37
+Create Date: 2025-09-12 09:41:18.503127
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f2c7d94e1a58"
+down_revision: Union[str, Sequence[str], None] = "d8a2f61c4b37"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The most viewed links were found by sorting the whole counter table on every call.
+    op.create_index("ix_shorturlviewcounter_view_count", "shorturlviewcounter", [sa.text("view_count DESC")])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_shorturlviewcounter_view_count", table_name="shorturlviewcounter")
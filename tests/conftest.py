@@ -0,0 +1,37 @@
+import os
+
+import httpx
+import pytest
+import pytest_asyncio
+
+# Settings require a database; unit tests never connect, so any values will do.
+for name, value in {
+    "POSTGRES_HOST": "localhost",
+    "POSTGRES_PORT": "5432",
+    "POSTGRES_USER": "test",
+    "POSTGRES_PASSWORD": "test",
+    "POSTGRES_DBNAME": "test",
+}.items():
+    os.environ.setdefault(name, value)
+
+
+@pytest.fixture
+def store():
+    """The in-memory stand-in for Postgres, with the local cache emptied."""
+    from app.cache.short_url import short_url_cache  # noqa: PLC0415
+    from benchmarks.standin import install_standin  # noqa: PLC0415
+
+    short_url_cache.local.clear()
+    short_url_cache.clicks.clear()
+    with install_standin() as store:
+        yield store
+
+
+@pytest_asyncio.fixture
+async def api(store):
+    """A client of a freshly built app running on `store`."""
+    from app.main import create_app  # noqa: PLC0415
+
+    transport = httpx.ASGITransport(app=create_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
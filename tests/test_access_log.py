@@ -0,0 +1,19 @@
+import pytest
+
+from app.middleware.logging import _PathSet
+
+
+@pytest.mark.parametrize(
+    "path, excluded",
+    [
+        ("/metrics", True),
+        ("/metrics/", True),
+        ("/health_check", True),
+        ("/health_check/db", True),
+        ("/metricsAb1", False),
+        ("/health_checkX", False),
+        ("/abc123", False),
+    ],
+)
+def test_excluded_paths_cover_subpaths_but_not_short_codes(path, excluded):
+    assert (path in _PathSet(["/health_check", "/metrics"])) is excluded
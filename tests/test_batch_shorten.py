@@ -0,0 +1,99 @@
+import json
+
+import pytest
+
+from app.core.setting import settings
+from app.services.code_allocator import code_allocator
+
+
+@pytest.mark.asyncio
+async def test_json_batch_returns_links_in_request_order_and_shares_duplicates(api, store):
+    urls = ["https://example.com/a", "https://example.com/b", "https://example.com/a"]
+
+    response = await api.post("/shorten/batch", json=[{"original_url": url} for url in urls])
+
+    assert response.status_code == 200
+    links = response.json()
+    assert [link["original_url"] for link in links] == urls
+    assert links[0] == links[2]
+    assert links[0]["short_code"] != links[1]["short_code"]
+    assert len(store.by_code) == 2
+
+
+@pytest.mark.asyncio
+async def test_batch_returns_existing_links(api):
+    existing = (await api.post("/shorten", json={"original_url": "https://example.com/a"})).json()
+
+    response = await api.post("/shorten/batch", json=[{"original_url": "https://example.com/a"}])
+
+    assert response.json()[0]["short_code"] == existing["short_code"]
+
+
+@pytest.mark.asyncio
+async def test_ndjson_batch_is_read_line_by_line(api):
+    body = "\n".join(json.dumps({"original_url": f"https://example.com/{i}"}) for i in range(3))
+
+    response = await api.post("/shorten/batch", content=body + "\n\n", headers={"content-type": "application/x-ndjson"})
+
+    assert response.status_code == 200
+    assert [link["original_url"] for link in response.json()] == [f"https://example.com/{i}" for i in range(3)]
+
+
+@pytest.mark.parametrize(
+    "content, content_type",
+    [
+        ('[{"original_url": "not a url"}]', "application/json"),
+        ('{"original_url": "https://example.com/a"}', "application/json"),
+        ('{"original_url": "https://example.com/a"}\n{"original_url": 5}\n', "application/x-ndjson"),
+        ('{"original_url": "https://example.com/a"}\nnot json', "application/x-ndjson"),
+    ],
+)
+@pytest.mark.asyncio
+async def test_invalid_items_fail_the_batch_with_422(api, store, content, content_type):
+    response = await api.post("/shorten/batch", content=content, headers={"content-type": content_type})
+
+    assert response.status_code == 422
+    assert store.by_code == {}
+
+
+@pytest.mark.asyncio
+async def test_oversized_batch_is_rejected(api, monkeypatch):
+    monkeypatch.setattr(settings, "SHORTEN_BATCH_MAX_ITEMS", 2)
+
+    response = await api.post("/shorten/batch", json=[{"original_url": f"https://example.com/{i}"} for i in range(3)])
+
+    assert response.status_code == 413
+
+
+@pytest.mark.asyncio
+async def test_colliding_codes_are_allocated_again(api, store, monkeypatch):
+    taken = (await api.post("/shorten", json={"original_url": "https://example.com/taken"})).json()["short_code"]
+    allocate_many = code_allocator.allocate_many
+    calls = []
+
+    async def first_code_taken(repo, count):
+        codes = await allocate_many(repo, count)
+        calls.append(count)
+        return [taken, *codes[1:]] if len(calls) == 1 else codes
+
+    monkeypatch.setattr(code_allocator, "allocate_many", first_code_taken)
+    urls = ["https://example.com/a", "https://example.com/b"]
+
+    response = await api.post("/shorten/batch", json=[{"original_url": url} for url in urls])
+
+    assert response.status_code == 200
+    assert calls == [2, 1]
+    codes = [link["short_code"] for link in response.json()]
+    assert taken not in codes
+    assert len(set(codes)) == 2
+    assert store.by_code[taken].original_url == "https://example.com/taken"
+
+
+@pytest.mark.asyncio
+async def test_ndjson_errors_are_located_by_line(api):
+    body = '{"original_url": "https://example.com/a"}\n{"original_url": "not a url"}\n'
+
+    response = await api.post("/shorten/batch", content=body, headers={"content-type": "application/x-ndjson"})
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == [1, "original_url"]
@@ -0,0 +1,69 @@
+import pytest
+
+from app.utils.bloom import BloomFilter, bloom_parameters
+
+
+def test_added_keys_are_members():
+    bloom = BloomFilter.create(capacity=1_000, error_rate=0.01)
+    keys = [f"code{i}" for i in range(1_000)]
+
+    added = bloom.add_many(keys)
+
+    assert all(key in bloom for key in keys)
+    # Keys whose bits were all set already (false positives) do not count as new.
+    assert 980 <= added <= 1_000
+    assert bloom.count == added
+
+
+def test_adding_a_key_twice_counts_it_once():
+    bloom = BloomFilter.create(capacity=100, error_rate=0.01)
+    bloom.add("abc123")
+    bloom.add("abc123")
+
+    assert bloom.count == 1
+    assert "abc124" not in bloom
+
+
+@pytest.mark.parametrize("error_rate", [0.01, 0.001])
+def test_false_positive_rate_stays_near_the_target_at_capacity(error_rate):
+    capacity = 20_000
+    bloom = BloomFilter.create(capacity=capacity, error_rate=error_rate)
+    bloom.add_many(f"member-{i}" for i in range(capacity))
+
+    probes = 100_000
+    false_positives = sum(f"other-{i}" in bloom for i in range(probes))
+
+    assert false_positives / probes < error_rate * 1.5
+
+
+def test_parameters_grow_with_capacity_and_precision():
+    bits, hashes = bloom_parameters(1_000, 0.01)
+
+    assert bits % 8 == 0
+    assert hashes == 7
+    assert bloom_parameters(2_000, 0.01)[0] > bits
+    assert bloom_parameters(1_000, 0.001)[0] > bits
+
+
+def test_file_backed_filters_share_additions(tmp_path):
+    path = str(tmp_path / "codes.bloom")
+    writer = BloomFilter.create(capacity=1_000, error_rate=0.01, path=path)
+    reader = BloomFilter.open(path)
+    try:
+        writer.add("abc123")
+        writer.watermark = 42
+
+        assert "abc123" in reader
+        assert reader.count == 1
+        assert reader.watermark == 42
+    finally:
+        writer.close()
+        reader.close()
+
+
+def test_opening_another_file_fails(tmp_path):
+    path = tmp_path / "not.bloom"
+    path.write_bytes(b"x" * 128)
+
+    with pytest.raises(ValueError):
+        BloomFilter.open(str(path))
@@ -0,0 +1,74 @@
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.cache.code_index import ShortCodeIndex
+from app.cache.short_url import ShortURLCache
+from app.repositories.short_url import ShortURLRepository
+
+# Rows of `shorturl` as (id, short_code), as the index scans them.
+ROWS: list[tuple[int, str]] = []
+
+
+@asynccontextmanager
+async def no_session():
+    yield None
+
+
+async def iter_codes(repo, from_id=1, batch_size=10_000):
+    yield [row for row in ROWS if row[0] >= from_id]
+
+
+@pytest.fixture(autouse=True)
+def table(monkeypatch):
+    monkeypatch.setattr(ShortURLRepository, "iter_codes", iter_codes)
+    ROWS[:] = [(1, "old111")]
+    yield ROWS
+    ROWS.clear()
+
+
+async def worker(path: str | None = None) -> ShortURLCache:
+    """A worker's cache over a loaded code index, without Redis."""
+    index = ShortCodeIndex(no_session, capacity=1_000, path=path)
+    await index.load()
+    return ShortURLCache(local_max_size=100, local_ttl=60, shared_ttl=60, negative_ttl=30, code_index=index)
+
+
+def create(cache: ShortURLCache, short_url_id: int, short_code: str):
+    ROWS.append((short_url_id, short_code))
+    cache.add_codes((short_code,))
+
+
+@pytest.mark.asyncio
+async def test_per_process_index_never_answers_lookups():
+    first, second = await worker(), await worker()
+    try:
+        create(first, 2, "new222")
+
+        # The second worker has not seen the code yet and must ask the database.
+        assert not second.code_index.contains("new222")
+        assert await second.lookup("new222") == (False, None)
+        assert await second.lookup("none00") == (False, None)
+        assert second.code_index.rejected == 0
+
+        await second.code_index.refresh()
+        assert second.probably_taken("new222")
+    finally:
+        await first.code_index.stop()
+        await second.code_index.stop()
+
+
+@pytest.mark.asyncio
+async def test_shared_index_answers_codes_it_has_never_seen(tmp_path):
+    path = str(tmp_path / "codes.bloom")
+    first, second = await worker(path), await worker(path)
+    try:
+        create(first, 2, "new222")
+
+        assert await second.lookup("new222") == (False, None)
+        assert await second.lookup("old111") == (False, None)
+        assert await second.lookup("none00") == (True, None)
+        assert second.code_index.rejected == 1
+    finally:
+        await first.code_index.stop()
+        await second.code_index.stop()
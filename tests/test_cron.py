@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.services.scheduler import CronSchedule
+
+
+def utc(*args) -> datetime:
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def test_fields_are_parsed_into_value_sets():
+    cron = CronSchedule("*/15 1-3,22 1,15 */6 1-5")
+
+    assert cron.minutes == {0, 15, 30, 45}
+    assert cron.hours == {1, 2, 3, 22}
+    assert cron.days == {1, 15}
+    assert cron.months == {1, 7}
+    assert cron.weekdays == {1, 2, 3, 4, 5}
+
+
+def test_sunday_is_zero_or_seven():
+    assert CronSchedule("0 0 * * 7").weekdays == {0}
+    assert CronSchedule("0 0 * * 0,7").weekdays == {0}
+
+
+@pytest.mark.parametrize(
+    "expression",
+    ["* * * *", "* * * * * *", "60 * * * *", "* 24 * * *", "* * 0 * *", "* * * 13 *", "* * * * 8", "5-1 * * * *", "x"],
+)
+def test_invalid_expressions_are_rejected(expression):
+    with pytest.raises(ValueError):
+        CronSchedule(expression)
+
+
+@pytest.mark.parametrize(
+    "expression, moment, expected",
+    [
+        # Strictly after: a matching minute fires at the next match, not again.
+        ("15 3 * * *", utc(2025, 9, 10, 3, 15), utc(2025, 9, 11, 3, 15)),
+        ("15 3 * * *", utc(2025, 9, 10, 3, 14, 59), utc(2025, 9, 10, 3, 15)),
+        ("*/20 * * * *", utc(2025, 9, 10, 23, 41), utc(2025, 9, 11, 0, 0)),
+        # Month and year rollover.
+        ("0 0 1 * *", utc(2025, 1, 31, 12, 0), utc(2025, 2, 1, 0, 0)),
+        ("0 0 1 * *", utc(2025, 12, 15, 0, 0), utc(2026, 1, 1, 0, 0)),
+        ("30 12 31 * *", utc(2025, 4, 1, 0, 0), utc(2025, 5, 31, 12, 30)),
+        ("0 0 29 2 *", utc(2025, 3, 1, 0, 0), utc(2028, 2, 29, 0, 0)),
+        ("0 9 * 3 *", utc(2025, 12, 31, 23, 59), utc(2026, 3, 1, 9, 0)),
+        # Weekdays: 2025-09-10 is a Wednesday.
+        ("0 8 * * 1", utc(2025, 9, 10, 0, 0), utc(2025, 9, 15, 8, 0)),
+        ("0 8 * * 0", utc(2025, 9, 10, 0, 0), utc(2025, 9, 14, 8, 0)),
+        # Both day fields restricted: either one matches.
+        ("0 0 20 * 5", utc(2025, 9, 10, 0, 0), utc(2025, 9, 12, 0, 0)),
+        ("0 0 11 * 5", utc(2025, 9, 10, 0, 0), utc(2025, 9, 11, 0, 0)),
+    ],
+)
+def test_next_after(expression, moment, expected):
+    assert CronSchedule(expression).next_after(moment) == expected
+
+
+def test_next_after_converts_to_utc():
+    tehran = timezone(timedelta(hours=3, minutes=30))
+
+    # 05:00 in Tehran is 01:30 UTC.
+    assert CronSchedule("0 4 * * *").next_after(datetime(2025, 9, 10, 5, 0, tzinfo=tehran)) == utc(2025, 9, 10, 4, 0)
+
+
+def test_expression_that_never_fires_is_rejected():
+    with pytest.raises(ValueError):
+        CronSchedule("0 0 31 2 *").next_after(utc(2025, 1, 1))
@@ -0,0 +1,38 @@
+import pytest
+
+from app.api.routing import etag_matches
+
+
+@pytest.mark.parametrize(
+    "if_none_match, expected",
+    [
+        (None, False),
+        ('W/"1-5"', True),
+        ('"1-5"', True),
+        ('"1-4", W/"1-5"', True),
+        ("*", True),
+        ('W/"1-4"', False),
+    ],
+)
+def test_etag_matches_uses_weak_comparison(if_none_match, expected):
+    assert etag_matches(if_none_match, 'W/"1-5"') is expected
+
+
+@pytest.mark.asyncio
+async def test_stats_answer_304_while_the_etag_matches(api, store):
+    link = (await api.post("/shorten", json={"original_url": "https://example.com/etag"})).json()
+    short_code = link["short_code"]
+    response = await api.get(f"/{short_code}/stats")
+    etag = response.headers["etag"]
+    assert response.status_code == 200
+
+    response = await api.get(f"/{short_code}/stats", headers={"if-none-match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+
+    # A new view changes the count, which versions the response.
+    store.views[link["id"]] += 1
+    response = await api.get(f"/{short_code}/stats", headers={"if-none-match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
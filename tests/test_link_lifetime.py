@@ -0,0 +1,138 @@
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.cache.short_url import ShortURLCache, short_url_cache
+from app.repositories.view_log import ViewLogRepository
+from app.services.link_expiry import LinkExpirySweeper
+
+
+@asynccontextmanager
+async def no_session():
+    yield None
+
+
+@pytest.fixture
+def shared_cache(monkeypatch):
+    """Redis configured but unreachable: clicks are counted by this worker alone."""
+    monkeypatch.setattr(short_url_cache, "redis_url", "redis://cache:6379/0")
+    monkeypatch.setattr(ShortURLCache, "redis", property(lambda cache: None))
+
+
+def new_worker():
+    """Forget what this worker cached, as another worker or a restart would."""
+    short_url_cache.local.clear()
+    short_url_cache.clicks.clear()
+
+
+@pytest.mark.asyncio
+async def test_link_answers_410_once_expired(api, store):
+    expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
+    response = await api.post(
+        "/shorten", json={"original_url": "https://example.com/sale", "expires_at": expires_at.isoformat()}
+    )
+    link = response.json()
+    assert response.status_code == 200
+    assert datetime.fromisoformat(link["expires_at"]) == expires_at
+
+    response = await api.get(f"/{link['short_code']}")
+    assert response.status_code == 302
+    assert response.headers["location"] == "https://example.com/sale"
+    assert response.headers["cache-control"] == "no-store"
+
+    store.by_code[link["short_code"]].expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    new_worker()
+    response = await api.get(f"/{link['short_code']}")
+    assert response.status_code == 410
+    assert store.views[link["id"]] == 1
+
+
+@pytest.mark.asyncio
+async def test_links_with_a_lifetime_are_never_shared(api, store):
+    plain = {"original_url": "https://example.com/"}
+    expiring = plain | {"expires_at": (datetime.now(timezone.utc) + timedelta(hours=1)).isoformat()}
+    codes = [(await api.post("/shorten", json=body)).json()["short_code"] for body in (plain, expiring, expiring)]
+
+    assert len(set(codes)) == 3
+    assert (await api.post("/shorten", json=plain)).json()["short_code"] == codes[0]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "lifetime",
+    [
+        {"expires_at": "2000-01-01T00:00:00Z"},
+        {"max_clicks": 0},
+    ],
+)
+async def test_invalid_lifetimes_are_rejected(api, store, shared_cache, lifetime):
+    response = await api.post("/shorten", json={"original_url": "https://example.com/"} | lifetime)
+
+    assert response.status_code == 422
+    assert store.by_code == {}
+
+
+@pytest.mark.asyncio
+async def test_max_clicks_needs_redis(api, store):
+    response = await api.post("/shorten", json={"original_url": "https://example.com/", "max_clicks": 3})
+
+    assert response.status_code == 422
+    assert response.json() == {"detail": "max_clicks needs a shared cache, set REDIS_URL"}
+    assert store.by_code == {}
+
+
+@pytest.mark.asyncio
+async def test_batches_reject_lifetimes(api, store, shared_cache):
+    response = await api.post("/shorten/batch", json=[{"original_url": "https://example.com/", "max_clicks": 3}])
+
+    assert response.status_code == 422
+    assert store.by_code == {}
+
+
+@pytest.mark.asyncio
+async def test_click_limited_link_answers_410_after_its_last_click(api, store, shared_cache):
+    link = (await api.post("/shorten", json={"original_url": "https://example.com/", "max_clicks": 2})).json()
+    assert link["max_clicks"] == 2
+
+    for _ in range(2):
+        response = await api.get(f"/{link['short_code']}")
+        assert response.status_code == 302
+        assert response.headers["cache-control"] == "no-store"
+    assert (await api.get(f"/{link['short_code']}")).status_code == 410
+    # Refused clicks are not logged as views.
+    assert store.views[link["id"]] == 2
+
+
+@pytest.mark.asyncio
+async def test_click_limited_link_counts_from_its_logged_views(api, store, shared_cache):
+    link = (await api.post("/shorten", json={"original_url": "https://example.com/", "max_clicks": 3})).json()
+    store.views[link["id"]] = 2
+    new_worker()
+
+    assert (await api.get(f"/{link['short_code']}")).status_code == 302
+    assert (await api.get(f"/{link['short_code']}")).status_code == 410
+
+
+@pytest.mark.asyncio
+async def test_exhausted_links_expire_and_are_swept(api, store, shared_cache):
+    link = (await api.post("/shorten", json={"original_url": "https://example.com/", "max_clicks": 1})).json()
+    other = (await api.post("/shorten", json={"original_url": "https://example.com/", "max_clicks": 5})).json()
+    assert (await api.get(f"/{link['short_code']}")).status_code == 302
+    assert (await api.get(f"/{other['short_code']}")).status_code == 302
+
+    # The rollup marks links whose counted views reached max_clicks as expired.
+    await ViewLogRepository(None).fold_unprocessed_views(1_000)
+    assert store.by_code[link["short_code"]].expires_at is not None
+    assert store.by_code[other["short_code"]].expires_at is None
+
+    new_worker()
+    assert (await api.get(f"/{link['short_code']}")).status_code == 410
+
+    # After the grace period the sweeper deletes it, and it is no longer known at all.
+    sweeper = LinkExpirySweeper(no_session, grace=60)
+    assert await sweeper.run_once() == 0
+    assert await sweeper.run_once(now=datetime.now(timezone.utc) + timedelta(seconds=61)) == 1
+    new_worker()
+    assert (await api.get(f"/{link['short_code']}")).status_code == 404
+    assert (await api.get(f"/{other['short_code']}")).status_code == 302
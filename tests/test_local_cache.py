@@ -0,0 +1,58 @@
+import pytest
+
+from app.cache import local
+from app.cache.local import MISSING, LocalTTLCache
+from app.cache.short_url import ShortURLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000.0]
+    monkeypatch.setattr(local, "monotonic", lambda: now[0])
+    return now
+
+
+def test_entry_expires_after_ttl(clock):
+    cache = LocalTTLCache(max_size=10, ttl=30)
+    cache.set("a", 1)
+
+    clock[0] += 29
+    assert cache.get("a") == 1
+    clock[0] += 1
+    assert cache.get("a") is MISSING
+    assert cache.expirations == 1
+    assert len(cache) == 0
+
+
+def test_per_entry_ttl_overrides_default(clock):
+    cache = LocalTTLCache(max_size=10, ttl=30)
+    cache.set("short", 1, ttl=5)
+    cache.set("long", 2)
+
+    clock[0] += 5
+    assert cache.get("short", None) is None
+    assert cache.get("long") == 2
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = LocalTTLCache(max_size=2, ttl=30)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+@pytest.mark.asyncio
+async def test_missing_code_is_remembered_for_negative_ttl(clock):
+    cache = ShortURLCache(local_max_size=10, local_ttl=60, shared_ttl=3600, negative_ttl=5)
+    await cache.store("abc123", None)
+
+    assert await cache.lookup("abc123") == (True, None)
+    assert cache.negative_hits == 1
+    clock[0] += 5
+    assert await cache.lookup("abc123") == (False, None)
@@ -0,0 +1,51 @@
+from app.core.metrics import MetricsRegistry
+
+
+def test_counter_exposition_escapes_label_values():
+    registry = MetricsRegistry()
+    counter = registry.counter("requests", "Requests by path", ("path",))
+    counter.labels('a"b\\c\nd').inc()
+    counter.labels("/plain").inc(2)
+
+    assert registry.expose().splitlines() == [
+        "# HELP requests Requests by path",
+        "# TYPE requests counter",
+        'requests_total{path="a\\"b\\\\c\\nd"} 1',
+        'requests_total{path="/plain"} 2',
+    ]
+
+
+def test_histogram_exposition_has_cumulative_buckets_sum_and_count():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.5, 0.1))
+    child = histogram.labels("/r")
+    for value in (0.05, 0.1, 0.3, 2.0):
+        child.observe(value)
+
+    assert registry.expose().splitlines() == [
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/r",le="0.1"} 2',
+        'latency_seconds_bucket{route="/r",le="0.5"} 3',
+        'latency_seconds_bucket{route="/r",le="+Inf"} 4',
+        'latency_seconds_sum{route="/r"} 2.45',
+        'latency_seconds_count{route="/r"} 4',
+    ]
+
+
+def test_unlabelled_metrics_and_callbacks():
+    registry = MetricsRegistry()
+    registry.gauge("depth", "Queue depth").set(3)
+    registry.callback("events", "Events by outcome", lambda: [(("ok",), 5)], ("outcome",), metric_type="counter")
+    registry.counter("unused", "Never incremented")
+
+    assert registry.expose() == (
+        "# HELP depth Queue depth\n"
+        "# TYPE depth gauge\n"
+        "depth 3\n"
+        "# HELP events Events by outcome\n"
+        "# TYPE events counter\n"
+        'events_total{outcome="ok"} 5\n'
+        "# HELP unused Never incremented\n"
+        "# TYPE unused counter\n"
+    )
@@ -0,0 +1,111 @@
+import pytest
+from fastapi import FastAPI
+
+from app.middleware import rate_limit
+from app.middleware.rate_limit import PolicyMatcher, RateLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000.0]
+    monkeypatch.setattr(rate_limit, "monotonic", lambda: now[0])
+    # Wall time at the start of a counting window, so a block lasts the whole window.
+    monkeypatch.setattr(rate_limit, "time", lambda: 1_700_000_000.0)
+    return now
+
+
+def make_limiter(**kwargs) -> RateLimiter:
+    return RateLimiter({"GET /{short_code}": {"rate": 2, "burst": 3}}, **kwargs)
+
+
+def test_bucket_admits_a_burst_then_is_exhausted(clock):
+    limiter = make_limiter()
+    policy = limiter.matcher.match("GET", "/abc123")
+
+    assert [limiter.acquire(policy, "1.2.3.4") for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.acquire(policy, "1.2.3.4") == pytest.approx(0.5)
+    assert limiter.acquire(policy, "5.6.7.8") == 0.0
+
+
+def test_bucket_refills_at_the_policy_rate_up_to_the_burst(clock):
+    limiter = make_limiter()
+    policy = limiter.matcher.match("GET", "/abc123")
+    for _ in range(3):
+        limiter.acquire(policy, "client")
+
+    clock[0] += 0.5
+    assert limiter.acquire(policy, "client") == 0.0
+    assert limiter.acquire(policy, "client") > 0
+
+    clock[0] += 60
+    assert [limiter.acquire(policy, "client") for _ in range(4)][-1] > 0
+
+
+class FakePipeline:
+    def __init__(self, totals: dict):
+        self.totals = totals
+        self.results = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def incrby(self, key, amount):
+        self.totals[key] = self.totals.get(key, 0) + amount
+        self.results.append(self.totals[key])
+
+    def expire(self, key, seconds):
+        self.results.append(True)
+
+    async def execute(self):
+        return self.results
+
+
+class FakeRedis:
+    def __init__(self):
+        self.totals = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self.totals)
+
+
+@pytest.mark.asyncio
+async def test_clients_over_the_cluster_allowance_are_blocked_until_the_window_ends(clock):
+    limiter = make_limiter(redis_url="redis://unused", window=10.0)
+    limiter._redis = FakeRedis()
+    policy = limiter.matcher.match("GET", "/abc123")
+    # Other workers already admitted 20 of the window's 3 + 2 * 10 requests.
+    limiter._redis.totals["ratelimit:GET /{short_code}:client:170000000"] = 20
+    for _ in range(3):
+        limiter.acquire(policy, "client")
+
+    await limiter.sync()
+    clock[0] += 5
+    assert limiter.acquire(policy, "client") == pytest.approx(5.0)
+    assert limiter.acquire(policy, "other") == 0.0
+
+    clock[0] += 5
+    await limiter.sync()
+    assert limiter._blocked == {}
+    assert limiter.acquire(policy, "client") == 0.0
+
+
+def test_parametrized_policy_skips_static_routes():
+    app = FastAPI()
+
+    @app.get("/health_check")
+    async def health_check():
+        return {}
+
+    @app.get("/{short_code}")
+    async def redirect(short_code: str):
+        return {}
+
+    matcher = PolicyMatcher({"GET /{short_code}": {"rate": 1}})
+
+    assert matcher.match("GET", "/abc123", app).name == "GET /{short_code}"
+    assert matcher.match("GET", "/health_check", app) is None
+    assert matcher.match("GET", "/docs", app) is None
+    assert matcher.match("POST", "/abc123", app) is None
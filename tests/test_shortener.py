@@ -0,0 +1,26 @@
+import pytest
+
+from app.utils.shortener import BASE, base62_encode, encode_short_code, permute
+
+KEY = b"test-permutation-key"
+
+
+@pytest.mark.parametrize("length", [1, 2])
+def test_permute_is_a_bijection_on_the_code_space(length):
+    domain = BASE**length
+    permuted = [permute(value, length, KEY) for value in range(domain)]
+
+    assert sorted(permuted) == list(range(domain))
+
+
+def test_permute_depends_on_the_key():
+    values = range(BASE**2)
+    assert [permute(v, 2, KEY) for v in values] != [permute(v, 2, b"another-key") for v in values]
+
+
+def test_sequential_ids_do_not_give_sequential_codes():
+    codes = [encode_short_code(value, 6, KEY) for value in range(1, 6)]
+
+    assert len(set(codes)) == 5
+    assert codes != [base62_encode(value, 6) for value in range(1, 6)]
+    assert all(len(code) == 6 for code in codes)
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from app.utils.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_with_one_key_share_one_call():
+    flight = SingleFlight("test_shared")
+    release = asyncio.Event()
+    runs = []
+
+    async def fetch():
+        runs.append(1)
+        await release.wait()
+        return "value"
+
+    calls = [asyncio.create_task(flight.do("key", fetch)) for _ in range(10)]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*calls) == ["value"] * 10
+    assert len(runs) == 1
+
+
+@pytest.mark.asyncio
+async def test_different_keys_and_later_calls_run_their_own():
+    flight = SingleFlight("test_keys")
+    runs = []
+
+    async def fetch(value):
+        runs.append(value)
+        await asyncio.sleep(0)
+        return value
+
+    assert await asyncio.gather(flight.do("a", lambda: fetch("a")), flight.do("b", lambda: fetch("b"))) == ["a", "b"]
+    assert await flight.do("a", lambda: fetch("a")) == "a"
+    assert runs == ["a", "b", "a"]
+
+
+@pytest.mark.asyncio
+async def test_exceptions_reach_every_caller():
+    flight = SingleFlight("test_errors")
+
+    async def fail():
+        await asyncio.sleep(0)
+        raise LookupError("missing")
+
+    results = await asyncio.gather(*(flight.do("key", fail) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(result, LookupError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_follower_leaves_the_call_running():
+    flight = SingleFlight("test_follower_cancel")
+    release = asyncio.Event()
+
+    async def fetch():
+        await release.wait()
+        return "value"
+
+    leader = asyncio.create_task(flight.do("key", fetch))
+    follower = asyncio.create_task(flight.do("key", fetch))
+    await asyncio.sleep(0)
+    follower.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await leader == "value"
+    assert follower.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_followers_start_over_when_the_leader_is_cancelled():
+    flight = SingleFlight("test_leader_cancel")
+    release = asyncio.Event()
+    runs = []
+
+    async def fetch():
+        runs.append(1)
+        await release.wait()
+        return "value"
+
+    leader = asyncio.create_task(flight.do("key", fetch))
+    await asyncio.sleep(0)
+    followers = [asyncio.create_task(flight.do("key", fetch)) for _ in range(3)]
+    await asyncio.sleep(0)
+    leader.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*followers) == ["value"] * 3
+    assert leader.cancelled()
+    assert len(runs) == 2
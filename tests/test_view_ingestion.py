@@ -0,0 +1,106 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.repositories.view_log import ViewLogRepository
+from app.services.view_ingestion import ViewIngestionPipeline
+
+
+@asynccontextmanager
+async def no_session():
+    yield None
+
+
+class Flushes:
+    """Batches written by the pipeline, as lists of shorturl ids; writes wait while `gate` is clear."""
+
+    def __init__(self):
+        self.batches: list[list[int]] = []
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def bulk_create_view_logs(self, repo, views) -> int:
+        await self.gate.wait()
+        self.batches.append([shorturl_id for shorturl_id, _ in views])
+        return len(views)
+
+
+@pytest.fixture
+def flushes(monkeypatch) -> Flushes:
+    flushes = Flushes()
+    monkeypatch.setattr(
+        ViewLogRepository, "bulk_create_view_logs", lambda repo, views: flushes.bulk_create_view_logs(repo, views)
+    )
+    return flushes
+
+
+def make_pipeline(**kwargs) -> ViewIngestionPipeline:
+    options = {"queue_size": 100, "batch_size": 3, "flush_interval": 10.0, "enqueue_timeout": 0.01} | kwargs
+    return ViewIngestionPipeline(no_session, **options)
+
+
+@pytest.mark.asyncio
+async def test_full_batches_flush_at_once_and_the_rest_drains_at_shutdown(flushes):
+    pipeline = make_pipeline()
+    await pipeline.start()
+    for shorturl_id in range(7):
+        assert await pipeline.submit(shorturl_id)
+    await asyncio.sleep(0.01)
+
+    assert flushes.batches == [[0, 1, 2], [3, 4, 5]]
+    await pipeline.stop()
+    assert flushes.batches == [[0, 1, 2], [3, 4, 5], [6]]
+    assert pipeline.stats() | {"running": None} == {
+        "running": None,
+        "depth": 0,
+        "enqueued": 7,
+        "flushed": 7,
+        "dropped": 0,
+        "failed": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_partial_batch_flushes_after_the_interval(flushes):
+    pipeline = make_pipeline(batch_size=100, flush_interval=0.02)
+    await pipeline.start()
+    await pipeline.submit(1)
+    await pipeline.submit(2)
+
+    await asyncio.sleep(0.1)
+    assert flushes.batches == [[1, 2]]
+    await pipeline.stop()
+    assert pipeline.flushed == 2
+
+
+@pytest.mark.asyncio
+async def test_views_are_dropped_when_the_queue_stays_full(flushes):
+    pipeline = make_pipeline(queue_size=1, batch_size=1)
+    flushes.gate.clear()
+    await pipeline.start()
+    assert await pipeline.submit(1)
+    await asyncio.sleep(0)  # the flusher takes it and waits on the database
+    assert await pipeline.submit(2)
+
+    assert not await pipeline.submit(3)
+    assert pipeline.dropped == 1
+    flushes.gate.set()
+    await pipeline.stop()
+    assert flushes.batches == [[1], [2]]
+    assert (pipeline.enqueued, pipeline.flushed) == (2, 2)
+
+
+@pytest.mark.asyncio
+async def test_failed_flushes_are_counted(monkeypatch):
+    async def bulk_create_view_logs(self, views):
+        raise ConnectionError("database is down")
+
+    monkeypatch.setattr(ViewLogRepository, "bulk_create_view_logs", bulk_create_view_logs)
+    pipeline = make_pipeline()
+    await pipeline.start()
+    for shorturl_id in range(4):
+        await pipeline.submit(shorturl_id)
+    await pipeline.stop()
+
+    assert (pipeline.flushed, pipeline.failed) == (0, 4)